@@ -89,10 +89,17 @@ export class MyDepopStack extends cdk.Stack {
     //allowing lambdas to connect to the db
     dbSecurityGroup.addIngressRule(lambdaSecurityGroup, ec2.Port.tcp(5432), "Lambda to Postgres");
 
+    //db connection, credentials cache and invocation logging used by both handlers
+    const sharedLayer = new lambda.LayerVersion(this, "LambdaSharedLayer", {
+      code: lambda.Code.fromAsset("../lambdas/shared"),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_11],
+    });
+
     const apiFn = new lambda.Function(this, "ApiLambda", {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: "handler.main",
       code: lambda.Code.fromAsset("../lambdas/api"),
+      layers: [sharedLayer],
       vpc,
       securityGroups: [lambdaSecurityGroup],
       environment: {
@@ -108,6 +115,7 @@ export class MyDepopStack extends cdk.Stack {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: "handler.main",
       code: lambda.Code.fromAsset("../lambdas/ingest_csv"),
+      layers: [sharedLayer],
       vpc,
       securityGroups: [lambdaSecurityGroup],
       environment: {
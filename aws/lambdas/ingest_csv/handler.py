@@ -1,56 +1,25 @@
+import init_clock  #first, so init_ms covers the imports below
 import os
+import time
 import json
 import csv
+import codecs
+import io
 import hashlib
 import boto3
-import ssl
 import pg8000
 
+from lambda_db import get_db_conn, discard_db_conn, log_invocation
+
+CHUNK_SIZE = 64 * 1024
+#every character str.splitlines() breaks on
+_LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+#rows per COPY + INSERT ... SELECT; each batch is one commit, so bigger batches pay fewer fsyncs
+INSERT_BATCH_ROWS = int(os.environ.get("INSERT_BATCH_ROWS", "5000"))
+
 s3 = boto3.client("s3")
-secrets = boto3.client("secretsmanager")
 
 UPLOADS_BUCKET = os.environ["UPLOADS_BUCKET"]
-DB_SECRET_ARN = os.environ["DB_SECRET_ARN"]
-DB_HOST = os.environ["DB_HOST"]
-DB_NAME = os.environ["DB_NAME"]
-
-def _get_db_creds():
-    resp = secrets.get_secret_value(SecretId=DB_SECRET_ARN)
-    secret_obj = json.loads(resp["SecretString"])
-    return secret_obj["username"], secret_obj["password"]
-
-def connect_db(db_host, db_name, db_user, db_password):
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE  # ok for demo
-
-    conn = pg8000.connect(
-        host=db_host,
-        database=db_name,
-        user=db_user,
-        password=db_password,
-        port=5432,
-        ssl_context=ssl_context,
-    )
-    return conn
-
-def _ensure_schema(conn):
-    cur = conn.cursor()
-    cur.execute("""
-      CREATE TABLE IF NOT EXISTS orders (
-        id BIGSERIAL PRIMARY KEY,
-        seller_key TEXT NOT NULL,
-        source_row_hash TEXT NOT NULL,
-        sold_price_cents BIGINT NOT NULL DEFAULT 0,
-        fees_cents BIGINT NOT NULL DEFAULT 0,
-        shipping_cents BIGINT NOT NULL DEFAULT 0,
-        item_cost_cents BIGINT NOT NULL DEFAULT 0,
-        sold_at TIMESTAMPTZ NULL,
-        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-        UNIQUE (seller_key, source_row_hash)
-      );
-    """)
-    conn.commit()
 
 def _parse_money_to_cents(value):
     if value is None:
@@ -66,29 +35,225 @@ def _parse_money_to_cents(value):
     except:
         return 0
 
-def _row_hash(row_dict):
-    #deterministic hash of full row content
-    items = list()
-    for key in sorted(row_dict.keys()):
-        items.append(f"{key}={row_dict.get(key)}")
-    raw = "|".join(items).encode("utf-8")
-    return hashlib.sha256(raw).hexdigest()
+class _RowLayout:
+    #per-file column positions, worked out once from the header instead of per row
+
+    def __init__(self, header):
+        #a repeated header name keeps its last column, like csv.DictReader
+        positions = dict()
+        for i, name in enumerate(header):
+            positions[name] = i
+        self.positions = positions
+        self.width = len(header)
+        #deterministic hash of full row content: "name=value" for the sorted column names
+        self.hash_fields = [(name + "=", positions[name]) for name in sorted(positions.keys())]
+
+    def indexes(self, *names):
+        return [self.positions[n] for n in names if n in self.positions]
+
+    def row_hash(self, row):
+        #missing trailing values hash as "None", as they did when rows were read with csv.DictReader
+        width = len(row)
+        parts = [prefix + (row[i] if i < width else "None") for prefix, i in self.hash_fields]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+def _first_value(row, indexes):
+    #first non-empty of the candidate columns (the old `row.get(a) or row.get(b)` chain)
+    width = len(row)
+    for i in indexes:
+        if i < width and row[i]:
+            return row[i]
+    return None
+
+#batches are COPYed into a per-connection temp table, then merged with one INSERT ... SELECT
+#that also adds the new rows to seller_kpis; ON COMMIT DELETE ROWS empties it per batch
+_BATCH_TABLE_SQL = """
+  CREATE TEMP TABLE IF NOT EXISTS ingest_batch (
+    seller_key TEXT NOT NULL,
+    source_row_hash TEXT NOT NULL,
+    sold_price_cents BIGINT NOT NULL,
+    fees_cents BIGINT NOT NULL,
+    shipping_cents BIGINT NOT NULL,
+    item_cost_cents BIGINT NOT NULL
+  ) ON COMMIT DELETE ROWS;
+"""
+
+_MERGE_BATCH_SQL = """
+  WITH inserted AS (
+    INSERT INTO orders
+      (seller_key, source_row_hash, sold_price_cents, fees_cents, shipping_cents, item_cost_cents)
+    SELECT seller_key, source_row_hash, sold_price_cents, fees_cents, shipping_cents, item_cost_cents
+    FROM ingest_batch
+    ON CONFLICT (seller_key, source_row_hash) DO NOTHING
+    RETURNING sold_price_cents, fees_cents, shipping_cents, item_cost_cents
+  )
+  SELECT
+    COUNT(*),
+    COALESCE(SUM(sold_price_cents), 0),
+    COALESCE(SUM(sold_price_cents - fees_cents - shipping_cents - item_cost_cents), 0)
+  FROM inserted;
+"""
+
+_ADD_TO_KPIS_SQL = """
+  UPDATE seller_kpis
+  SET
+    gmv_cents = gmv_cents + %s,
+    profit_cents = profit_cents + %s,
+    units_sold = units_sold + %s,
+    updated_at = NOW()
+  WHERE seller_key = %s;
+"""
+
+#first write for a seller: seed from all of its orders (this batch's included). if another
+#ingest seeds it first we wait for its commit and add just our batch
+_SEED_KPIS_SQL = """
+  INSERT INTO seller_kpis (seller_key, gmv_cents, profit_cents, units_sold)
+  SELECT
+    %s,
+    COALESCE(SUM(sold_price_cents), 0),
+    COALESCE(SUM(sold_price_cents - fees_cents - shipping_cents - item_cost_cents), 0),
+    COUNT(*)
+  FROM orders
+  WHERE seller_key = %s
+  ON CONFLICT (seller_key) DO UPDATE SET
+    gmv_cents = seller_kpis.gmv_cents + %s,
+    profit_cents = seller_kpis.profit_cents + %s,
+    units_sold = seller_kpis.units_sold + %s,
+    updated_at = NOW();
+"""
+
+def _insert_rows(cur, seller_key, rows):
+    #orders + the seller_kpis delta, in the caller's transaction -> inserted count
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cur.execute("COPY ingest_batch FROM STDIN WITH (FORMAT csv)", stream=buf)
+    cur.execute(_MERGE_BATCH_SQL)
+    inserted, gmv_cents, profit_cents = cur.fetchone()
+    if inserted == 0:
+        return 0
+
+    cur.execute(_ADD_TO_KPIS_SQL, (gmv_cents, profit_cents, inserted, seller_key))
+    if cur.rowcount == 0:
+        cur.execute(_SEED_KPIS_SQL, (seller_key, seller_key, gmv_cents, profit_cents, inserted))
+    return inserted
+
+def _insert_batch(conn, seller_key, batch):
+    #inserts and commits one batch -> (inserted, duplicate, skipped). rows the INSERT doesn't
+    #return already existed (or repeated within the batch), so the counts are exact. a failing
+    #batch is retried row by row so one bad row doesn't take the rest of the batch down with it
+    cur = conn.cursor()
+    try:
+        inserted = _insert_rows(cur, seller_key, batch)
+        conn.commit()
+        return inserted, len(batch) - inserted, 0
+    except pg8000.DatabaseError as e:
+        conn.rollback()
+        print(f"WARNING: batch insert failed ({e}), retrying {len(batch)} rows one by one")
+
+    inserted = 0
+    skipped = 0
+    for row in batch:
+        try:
+            inserted += _insert_rows(cur, seller_key, [row])
+            conn.commit()
+        except pg8000.DatabaseError:
+            conn.rollback()
+            skipped += 1
+    return inserted, len(batch) - inserted - skipped, skipped
+
+def _ingest_object(conn, seller_key, lines):
+    #streams one csv through fixed-size batches: only INSERT_BATCH_ROWS rows are held at a time
+    #and each batch is committed, so a retried S3 event resumes cheaply (committed rows come
+    #back as duplicates)
+    counts = {"rows": 0, "inserted": 0, "duplicate": 0, "skipped": 0}
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return counts
+
+    #committed on its own so a rolled-back batch can't take the table with it
+    conn.cursor().execute(_BATCH_TABLE_SQL)
+    conn.commit()
+
+    layout = _RowLayout(header)
+    #best-effort columns (will adjust later)
+    sold_price_cols = layout.indexes("sold_price", "Sold price", "Price", "Total")
+    fees_cols = layout.indexes("fees", "Fees", "Depop fee")
+    shipping_cols = layout.indexes("shipping", "Shipping")
+    item_cost_cols = layout.indexes("item_cost", "Item cost", "Cost")
+
+    def flush(batch):
+        inserted, duplicate, skipped = _insert_batch(conn, seller_key, batch)
+        counts["inserted"] += inserted
+        counts["duplicate"] += duplicate
+        counts["skipped"] += skipped
+        batch.clear()
+
+    batch = list()
+    for row in reader:
+        if len(row) == 0:
+            continue
+        counts["rows"] += 1
+        batch.append((
+            seller_key,
+            layout.row_hash(row),
+            _parse_money_to_cents(_first_value(row, sold_price_cols)),
+            _parse_money_to_cents(_first_value(row, fees_cols)),
+            _parse_money_to_cents(_first_value(row, shipping_cols)),
+            _parse_money_to_cents(_first_value(row, item_cost_cols)),
+        ))
+        if len(batch) >= INSERT_BATCH_ROWS:
+            flush(batch)
+
+    if len(batch) > 0:
+        flush(batch)
+    return counts
+
+def _iter_text_lines(chunks):
+    #incremental decode so the object is never held in memory as a whole
+    #(same approach as backend ingest_service.iter_text_lines). yields exactly the lines of
+    #str.splitlines() on the whole text, without endings, like the old read-all + splitlines():
+    #a multi-line quoted field is then joined with nothing in between and hashes as it always did
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        if pending == "":
+            continue
+        lines = pending.splitlines()
+        last = pending[-1]
+        if last not in _LINE_BREAKS:
+            pending = lines.pop()
+        elif last == "\r":
+            #may be the first half of a \r\n split across chunks
+            pending = lines.pop() + "\r"
+        else:
+            pending = ""
+        yield from lines
+
+    pending += decoder.decode(b"", final=True)
+    yield from pending.splitlines()
 
 def main(event, context):
+    started = time.perf_counter()
+    timing = {"db_ready": None}
+    try:
+        return _ingest(event, timing)
+    finally:
+        log_invocation(started, timing["db_ready"])
+
+def _ingest(event, timing):
     #S3 event
     records = event.get("Records", [])
     if len(records) == 0:
         return {"ok": True, "message": "No records"}
 
-    conn = None
-    inserted = 0
-    skipped = 0
+    totals = {"rows": 0, "inserted": 0, "duplicate": 0, "skipped": 0}
 
+    conn = get_db_conn()
+    timing["db_ready"] = time.perf_counter()
     try:
-        conn = connect_db()
-        _ensure_schema(conn)
-        cur = conn.cursor()
-
         for rec in records:
             bucket = rec["s3"]["bucket"]["name"]
             key = rec["s3"]["object"]["key"]
@@ -98,44 +263,15 @@ def main(event, context):
             seller_key = parts[1] if len(parts) >= 2 else "dev"
 
             obj = s3.get_object(Bucket=bucket, Key=key)
-            body_bytes = obj["Body"].read()
-            text = body_bytes.decode("utf-8", errors="replace").splitlines()
-
-            reader = csv.DictReader(text)
-            for row in reader:
-                h = _row_hash(row)
-
-                #best-effort columns (will adjust later)
-                sold_price_cents = _parse_money_to_cents(
-                    row.get("sold_price") or row.get("Sold price") or row.get("Price") or row.get("Total")
-                )
-                fees_cents = _parse_money_to_cents(
-                    row.get("fees") or row.get("Fees") or row.get("Depop fee")
-                )
-                shipping_cents = _parse_money_to_cents(
-                    row.get("shipping") or row.get("Shipping")
-                )
-                item_cost_cents = _parse_money_to_cents(
-                    row.get("item_cost") or row.get("Item cost") or row.get("Cost")
-                )
-
-                try:
-                    cur.execute("""
-                      INSERT INTO orders
-                        (seller_key, source_row_hash, sold_price_cents, fees_cents, shipping_cents, item_cost_cents)
-                      VALUES
-                        (%s, %s, %s, %s, %s, %s)
-                      ON CONFLICT (seller_key, source_row_hash) DO NOTHING;
-                    """, (seller_key, h, sold_price_cents, fees_cents, shipping_cents, item_cost_cents))
-                    #pg8000 cursor.rowcount isn't always reliable so treat as inserted if no exception
-                    inserted += 1
-                except Exception:
-                    skipped += 1
+            lines = _iter_text_lines(obj["Body"].iter_chunks(chunk_size=CHUNK_SIZE))
 
-            conn.commit()
+            counts = _ingest_object(conn, seller_key, lines)
+            print(json.dumps({"metric": "ingest_object", "key": key, **counts}))
+            for name, value in counts.items():
+                totals[name] += value
 
-        return {"ok": True, "inserted_attempts": inserted, "skipped_attempts": skipped}
+        return {"ok": True, **totals}
 
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+    except Exception:
+        discard_db_conn()
+        raise
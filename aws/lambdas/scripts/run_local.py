@@ -0,0 +1,218 @@
+#runs both lambda handlers in this process against a local postgres, with stand-ins for
+#secrets manager and s3, and checks the cold path, the warm path and reconnect. first it checks,
+#without the db, that streamed ingest hashes rows exactly as the original read-all ingest did.
+#
+#usage (from aws/lambdas/, pg8000 + boto3 installed):
+#    DB_HOST=127.0.0.1 DB_PORT=5432 DB_NAME=lambda_test LOCAL_DB_USER=postgres LOCAL_DB_PASSWORD= \
+#        python scripts/run_local.py
+#
+#--hashes-only runs just the db-free row hash check.
+#the database must exist; the script creates/drops its own orders and seller_kpis rows for seller "local".
+import contextlib
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LAMBDAS_DIR = os.path.dirname(HERE)
+
+os.environ.setdefault("UPLOADS_BUCKET", "local-uploads")
+os.environ.setdefault("DB_SECRET_ARN", "local-db-secret")
+os.environ.setdefault("DB_HOST", "127.0.0.1")
+os.environ.setdefault("DB_NAME", "lambda_test")
+os.environ.setdefault("DB_SSL", "0")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+LOCAL_DB_USER = os.environ.get("LOCAL_DB_USER", "postgres")
+LOCAL_DB_PASSWORD = os.environ.get("LOCAL_DB_PASSWORD", "")
+#stand-in for the secrets manager round trip a cold start pays
+SECRETS_LATENCY_SECONDS = float(os.environ.get("SECRETS_LATENCY_SECONDS", "0.05"))
+SELLER_KEY = "local"
+
+#the layer directory is on sys.path in the deployed lambdas
+sys.path.insert(0, os.path.join(LAMBDAS_DIR, "shared", "python"))
+
+import pg8000  # noqa: E402
+import lambda_db  # noqa: E402
+
+
+class FakeSecrets:
+    def __init__(self):
+        self.calls = 0
+
+    def get_secret_value(self, SecretId):
+        self.calls += 1
+        time.sleep(SECRETS_LATENCY_SECONDS)
+        return {"SecretString": json.dumps({"username": LOCAL_DB_USER, "password": LOCAL_DB_PASSWORD})}
+
+
+class FakeBody:
+    def __init__(self, data):
+        self.data = data
+
+    def iter_chunks(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = dict()
+
+    def get_object(self, Bucket, Key):
+        return {"Body": FakeBody(self.objects[Key])}
+
+
+def load_handler(name):
+    path = os.path.join(LAMBDAS_DIR, name, "handler.py")
+    spec = importlib.util.spec_from_file_location(f"{name}_handler", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def invoke(handler, event):
+    #this returns (response, invocation metric, captured stdout)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        response = handler.main(event, None)
+    lines = out.getvalue().splitlines()
+    metric = [json.loads(line) for line in lines if '"metric": "invocation"' in line][-1]
+    return response, metric, lines
+
+
+def check(ok, message):
+    print(("ok    " if ok else "FAIL  ") + message)
+    if not ok:
+        sys.exit(1)
+
+
+def admin_connect():
+    conn = pg8000.connect(
+        host=lambda_db.DB_HOST, port=lambda_db.DB_PORT, database=lambda_db.DB_NAME,
+        user=LOCAL_DB_USER, password=LOCAL_DB_PASSWORD,
+    )
+    conn.autocommit = True
+    return conn
+
+
+def make_csv(rows):
+    lines = ["Date,Sold price,Fees,Shipping,Cost,Description"]
+    lines += [f"2024-01-01,{10 + i % 40}.50,1.00,3.00,2.00,local item {i}" for i in range(rows)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+#exports with quoted fields that span lines, and rows shorter than the header
+HASH_CHECK_CSV = (
+    'Date,Sold price,Fees,Description\r\n'
+    '2024-01-01,10.50,1.00,"Great top\r\nworn once"\r\n'
+    '2024-01-02,12.00,1.20,"line one\nline two\rline three"\r\n'
+    '\r\n'
+    '2024-01-03,9.00\r\n'
+    '2024-01-04,"1,200.00",3.00,plain\n'
+).encode("utf-8")
+
+
+def old_row_hash(row_dict):
+    #the original ingest's _row_hash, applied to csv.DictReader rows
+    items = list()
+    for key in sorted(row_dict.keys()):
+        items.append(f"{key}={row_dict.get(key)}")
+    raw = "|".join(items).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def check_row_hashes(ingest):
+    text = HASH_CHECK_CSV.decode("utf-8", errors="replace").splitlines()
+    expected = [old_row_hash(row) for row in csv.DictReader(text)]
+
+    for chunk_size in (1, 3, 7, len(HASH_CHECK_CSV)):
+        chunks = [HASH_CHECK_CSV[i:i + chunk_size] for i in range(0, len(HASH_CHECK_CSV), chunk_size)]
+        reader = csv.reader(ingest._iter_text_lines(chunks))
+        layout = ingest._RowLayout(next(reader))
+        got = [layout.row_hash(row) for row in reader if len(row) > 0]
+        check(got == expected, f"row hashes match the original ingest ({chunk_size}-byte chunks)")
+
+
+def main():
+    ingest = load_handler("ingest_csv")
+    check_row_hashes(ingest)
+    if "--hashes-only" in sys.argv[1:]:
+        return
+
+    secrets = FakeSecrets()
+    s3 = FakeS3()
+    lambda_db.secrets = secrets
+
+    api = load_handler("api")
+    ingest.s3 = s3
+
+    kpis_event = {"requestContext": {"http": {"method": "GET"}}, "rawPath": "/kpis"}
+
+    #cold path: credentials fetched, connection opened, schema checked
+    response, metric, _ = invoke(api, kpis_event)
+    check(response["statusCode"] == 200, f"cold /kpis -> {response['statusCode']}")
+    check(metric["cold_start"] and metric["init_ms"] > 0, f"cold start logged, init_ms={metric['init_ms']}")
+    check(secrets.calls == 1, f"secrets fetched once on the cold path (calls={secrets.calls})")
+    cold_conn = lambda_db._db_conn
+
+    admin = admin_connect()
+    admin.run("DELETE FROM orders WHERE seller_key = :k", k=SELLER_KEY)
+    admin.run("DELETE FROM seller_kpis WHERE seller_key = :k", k=SELLER_KEY)
+
+    #warm path: same credentials and connection
+    durations = list()
+    for _ in range(3):
+        response, metric, _ = invoke(api, kpis_event)
+        check(response["statusCode"] == 200 and not metric["cold_start"], f"warm /kpis, {metric['duration_ms']} ms")
+        durations.append(metric["duration_ms"])
+    check(secrets.calls == 1, f"no secrets calls on the warm path (calls={secrets.calls})")
+    check(lambda_db._db_conn is cold_conn, "warm invocations reuse the cold start's connection")
+
+    #ingest on the same container, then the api sees the running totals
+    key = f"uploads/{SELLER_KEY}/local.csv"
+    s3.objects[key] = make_csv(500)
+    event = {"Records": [{"s3": {"bucket": {"name": "local-uploads"}, "object": {"key": key}}}]}
+    response, metric, _ = invoke(ingest, event)
+    check(response.get("inserted") == 500, f"ingest inserted {response.get('inserted')} rows")
+    gmv, profit, units = admin.run(
+        "SELECT gmv_cents, profit_cents, units_sold FROM seller_kpis WHERE seller_key = :k", k=SELLER_KEY
+    )[0]
+    check(units == 500, f"seller_kpis updated (gmv_cents={gmv}, units_sold={units})")
+
+    #reconnect: the server drops the cached connection between invocations
+    admin.run(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = :db AND pid <> pg_backend_pid()",
+        db=lambda_db.DB_NAME,
+    )
+    response, metric, lines = invoke(api, kpis_event)
+    check(response["statusCode"] == 200, f"/kpis after the connection was killed -> {response['statusCode']}")
+    check(any(line.startswith("WARNING: cached db connection is gone") for line in lines), "reconnect was logged")
+    check(lambda_db._db_conn is not cold_conn, "a new connection replaced the dead one")
+    check(secrets.calls == 1, f"reconnect reused the cached credentials (calls={secrets.calls})")
+
+    #credentials past their TTL are fetched again
+    lambda_db._db_creds_fetched_at -= lambda_db.DB_CREDS_TTL_SECONDS
+    lambda_db.discard_db_conn()
+    response, metric, _ = invoke(api, kpis_event)
+    check(response["statusCode"] == 200 and secrets.calls == 2, f"expired credentials refetched (calls={secrets.calls})")
+
+    idle = admin.run(
+        "SELECT count(*) FROM pg_stat_activity WHERE datname = :db AND state = 'idle in transaction'",
+        db=lambda_db.DB_NAME,
+    )[0][0]
+    check(idle == 0, "no connection left idle in transaction")
+
+    admin.run("DELETE FROM orders WHERE seller_key = :k", k=SELLER_KEY)
+    admin.run("DELETE FROM seller_kpis WHERE seller_key = :k", k=SELLER_KEY)
+    admin.close()
+    print(f"warm /kpis median {sorted(durations)[len(durations) // 2]} ms")
+
+
+if __name__ == "__main__":
+    main()
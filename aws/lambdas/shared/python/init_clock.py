@@ -0,0 +1,5 @@
+#import this first in a handler module: the lambda's init phase (and init_ms in the
+#invocation log line) is measured from here, so it covers boto3/pg8000 and everything after
+import time
+
+STARTED = time.perf_counter()
@@ -0,0 +1,155 @@
+#db connection, credentials cache and invocation logging shared by the api and ingest lambdas.
+#ships as a lambda layer (aws/lambdas/shared), so it is importable as a top-level module
+import os
+import json
+import time
+import ssl
+import boto3
+import pg8000
+
+import init_clock
+
+secrets = boto3.client("secretsmanager")
+
+DB_SECRET_ARN = os.environ["DB_SECRET_ARN"]
+DB_HOST = os.environ["DB_HOST"]
+DB_NAME = os.environ["DB_NAME"]
+DB_PORT = int(os.environ.get("DB_PORT", "5432"))
+#DB_SSL=0 for a local postgres stand-in without TLS
+DB_SSL = os.environ.get("DB_SSL", "1") != "0"
+DB_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("DB_CONNECT_TIMEOUT_SECONDS", "10"))
+DB_CREDS_TTL_SECONDS = float(os.environ.get("DB_CREDS_TTL_SECONDS", "900"))
+
+#module state survives between warm invocations of the same container
+_db_creds = None
+_db_creds_fetched_at = 0.0
+_db_conn = None
+_schema_ready = False
+_cold_start = True
+
+def _get_db_creds(force_refresh=False):
+    #cached for the life of the container, refetched after the TTL or a failed login (rotation)
+    global _db_creds, _db_creds_fetched_at
+    now = time.monotonic()
+    if not force_refresh and _db_creds is not None and now - _db_creds_fetched_at < DB_CREDS_TTL_SECONDS:
+        return _db_creds
+
+    resp = secrets.get_secret_value(SecretId=DB_SECRET_ARN)
+    secret_obj = json.loads(resp["SecretString"])
+    _db_creds = (secret_obj["username"], secret_obj["password"])
+    _db_creds_fetched_at = now
+    return _db_creds
+
+def connect_db(db_host, db_name, db_user, db_password):
+    ssl_context = None
+    if DB_SSL:
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE  # ok for demo
+
+    conn = pg8000.connect(
+        host=db_host,
+        database=db_name,
+        user=db_user,
+        password=db_password,
+        port=DB_PORT,
+        ssl_context=ssl_context,
+        timeout=DB_CONNECT_TIMEOUT_SECONDS,
+    )
+    return conn
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def _is_alive(conn):
+    #one round trip, outside any transaction so nothing is left open while the container is frozen
+    try:
+        conn.rollback()
+        autocommit = conn.autocommit
+        conn.autocommit = True
+        try:
+            conn.run("SELECT 1")
+        finally:
+            conn.autocommit = autocommit
+        return True
+    except Exception:
+        return False
+
+def get_db_conn(autocommit=False):
+    #reuses the connection from the previous (warm) invocation if it still answers
+    global _db_conn, _schema_ready
+    if _db_conn is not None:
+        if _is_alive(_db_conn):
+            _db_conn.autocommit = autocommit
+            return _db_conn
+        print("WARNING: cached db connection is gone, reconnecting")
+        _close_quietly(_db_conn)
+        _db_conn = None
+
+    db_user, db_password = _get_db_creds()
+    try:
+        conn = connect_db(DB_HOST, DB_NAME, db_user, db_password)
+    except pg8000.DatabaseError:
+        #the secret may have been rotated since we cached it
+        db_user, db_password = _get_db_creds(force_refresh=True)
+        conn = connect_db(DB_HOST, DB_NAME, db_user, db_password)
+
+    if not _schema_ready:
+        ensure_schema(conn)
+        _schema_ready = True
+    #read-only callers skip the BEGIN / COMMIT round trips around each lookup
+    conn.autocommit = autocommit
+
+    _db_conn = conn
+    return conn
+
+def discard_db_conn():
+    #after an error mid-transaction; the next invocation opens a fresh connection
+    global _db_conn
+    if _db_conn is not None:
+        _close_quietly(_db_conn)
+        _db_conn = None
+
+def log_invocation(started, db_ready):
+    #one json line per invocation; filter on cold_start to separate the two latencies
+    global _cold_start
+    finished = time.perf_counter()
+    print(json.dumps({
+        "metric": "invocation",
+        "cold_start": _cold_start,
+        "init_ms": round((started - init_clock.STARTED) * 1000.0, 1) if _cold_start else 0.0,
+        "db_ms": None if db_ready is None else round((db_ready - started) * 1000.0, 1),
+        "duration_ms": round((finished - started) * 1000.0, 1),
+    }))
+    _cold_start = False
+
+def ensure_schema(conn):
+    cur = conn.cursor()
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS orders (
+        id BIGSERIAL PRIMARY KEY,
+        seller_key TEXT NOT NULL,
+        source_row_hash TEXT NOT NULL,
+        sold_price_cents BIGINT NOT NULL DEFAULT 0,
+        fees_cents BIGINT NOT NULL DEFAULT 0,
+        shipping_cents BIGINT NOT NULL DEFAULT 0,
+        item_cost_cents BIGINT NOT NULL DEFAULT 0,
+        sold_at TIMESTAMPTZ NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        UNIQUE (seller_key, source_row_hash)
+      );
+    """)
+    #running totals per seller_key, kept up to date by the ingest lambda in its insert transactions
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS seller_kpis (
+        seller_key TEXT PRIMARY KEY,
+        gmv_cents BIGINT NOT NULL DEFAULT 0,
+        profit_cents BIGINT NOT NULL DEFAULT 0,
+        units_sold BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+      );
+    """)
+    conn.commit()
@@ -1,7 +1,56 @@
-from fastapi import APIRouter
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.auth import get_auth_cache_stats, get_token_from_header
+from app.db.connection import get_pool_stats
+from app.db.queries import get_query_stats
+from app.metrics import TimedRoute, render_metrics
+from app.services.ingest_service import get_parse_cache_stats
+
+# /metrics and /health/* expose query timings, pool and cache internals, so they are off (404)
+# unless METRICS_TOKEN is set, and then need "Authorization: Bearer <METRICS_TOKEN>".
+# plain /health stays open for load balancer probes.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def require_metrics_token(authorization: Optional[str] = Header(default=None)) -> None:
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    token = get_token_from_header(authorization)
+    if not hmac.compare_digest(token.encode("utf-8"), METRICS_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
 
-router = APIRouter()
 
 @router.get("/health")
 def health() -> dict:
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@router.get("/health/queries", dependencies=[Depends(require_metrics_token)])
+def query_stats() -> dict:
+    return get_query_stats()
+
+
+@router.get("/health/parse-cache", dependencies=[Depends(require_metrics_token)])
+def parse_cache_stats() -> dict:
+    return get_parse_cache_stats()
+
+
+@router.get("/health/auth-cache", dependencies=[Depends(require_metrics_token)])
+def auth_cache_stats() -> dict:
+    return get_auth_cache_stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_token)])
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        render_metrics(get_query_stats(), get_pool_stats()),
+        media_type="text/plain; version=0.0.4",
+    )
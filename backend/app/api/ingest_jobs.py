@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any
+
+from app.schemas.jobs import IngestJob
+from app.services.job_service import get_ingest_job
+from app.services.async_analytics_service import get_seller_summary
+from app.auth import get_current_user
+from app.metrics import TimedRoute
+
+router = APIRouter(prefix="/ingest-jobs", tags=["upload"], route_class=TimedRoute)
+
+
+@router.get("/{job_id}", response_model=IngestJob)
+async def ingest_job_status(
+    job_id: int,
+    _user: Dict[str, Any] = Depends(get_current_user),
+) -> IngestJob:
+    row = await run_in_threadpool(get_ingest_job, job_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    elapsed_seconds = float(row.get("elapsed_seconds") or 0.0)
+    rows_processed = int(row.get("rows_processed") or 0)
+    if elapsed_seconds > 0:
+        rows_per_second = rows_processed / elapsed_seconds
+    else:
+        rows_per_second = 0.0
+
+    summary = None
+    if row["status"] == "succeeded" and row["include_summary"] and row["seller_id"] is not None:
+        summary = await get_seller_summary(int(row["seller_id"]), data_version=row["data_version"])
+
+    return IngestJob(
+        job_id=int(row["id"]),
+        seller_username=row["seller_username"],
+        status=row["status"],
+        replace=bool(row["replace"]),
+        payload_bytes=int(row["payload_bytes"]),
+        rows_processed=rows_processed,
+        rows_skipped=int(row.get("rows_skipped") or 0),
+        rows_per_second=round(rows_per_second, 1),
+        seller_id=row["seller_id"],
+        listings_inserted=row["listings_inserted"],
+        listings_updated=row["listings_updated"],
+        listings_deleted=row["listings_deleted"],
+        orders_inserted=row["orders_inserted"],
+        orders_updated=row["orders_updated"],
+        orders_deleted=row["orders_deleted"],
+        orders_duplicate=row["orders_duplicate"],
+        error=row["error"],
+        attempts=int(row["attempts"]),
+        created_at=row["created_at"],
+        started_at=row["started_at"],
+        finished_at=row["finished_at"],
+        summary=summary,
+    )
@@ -1,63 +1,229 @@
-from fastapi import APIRouter, Query, HTTPException, Depends
-from typing import Dict, Any
-from app.services.analytics_service import (
+import hashlib
+from datetime import date
+from fastapi import APIRouter, Query, HTTPException, Depends, Request, Response
+from typing import Dict, Any, Literal, Optional, Tuple
+from app.services.async_analytics_service import (
     get_seller_summary, get_top_items,
-    get_sales_over_time, get_category_breakdown,
+    get_sales_over_time, get_category_breakdown, get_seller_dashboard,
 )
-from app.schemas.seller import SellerSummary, MonthlySales, CategoryBreakdown
+from app.schemas.seller import SellerSummary, MonthlySales, CategoryBreakdown, SellerDashboard
 from app.schemas.items import TopItem
-from app.db.sellers import get_seller_id_by_username
+from app.schemas.records import OrderPage, ListingPage
+from app.services.records_service import PAGE_SIZE_MAX, get_orders_page, get_listings_page
+from app.db.sellers import get_seller_by_username_async
 from app.auth import get_current_user
+from app.metrics import TimedRoute
 
-router = APIRouter(prefix="/sellers", tags=["sellers"])
+router = APIRouter(prefix="/sellers", tags=["sellers"], route_class=TimedRoute)
+
+# bump when a response shape changes so clients drop their cached payloads
+ETAG_FORMAT_VERSION = "2"
+
+Granularity = Literal["day", "week", "month"]
+
+
+def make_etag(seller_id: int, data_version: int, request: Request) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    raw = f"{ETAG_FORMAT_VERSION}|{seller_id}|{data_version}|{request.url.path}|{query}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses weak comparison
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+async def resolve_seller(
+    seller_username: str,
+    request: Request,
+    response: Response,
+) -> Tuple[int, int, Optional[Response]]:
+    """
+    this returns (seller_id, data_version, not_modified). not_modified is a ready 304
+    when the client already has the current version, so the caller can skip all analytics work.
+    """
+    seller = await get_seller_by_username_async(seller_username)
+    if seller is None:
+        raise HTTPException(status_code=404, detail="Seller not found")
+    seller_id, data_version = seller
+
+    etag = make_etag(seller_id, data_version, request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return (seller_id, data_version, Response(status_code=304, headers=headers))
+
+    response.headers.update(headers)
+    return (seller_id, data_version, None)
 
 
 @router.get("/{seller_username}/summary", response_model=SellerSummary)
-def seller_summary(
+async def seller_summary(
     seller_username: str,
+    request: Request,
+    response: Response,
     _user: Dict[str, Any] = Depends(get_current_user),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
 ) -> SellerSummary:
-    seller_id = get_seller_id_by_username(seller_username)
-    if seller_id is None:
-        raise HTTPException(status_code=404, detail="Seller not found")
+    seller_id, data_version, not_modified = await resolve_seller(seller_username, request, response)
+    if not_modified is not None:
+        return not_modified
 
-    summary = get_seller_summary(seller_id)
+    try:
+        summary = await get_seller_summary(seller_id, date_from=date_from, date_to=date_to, data_version=data_version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return summary
 
 
 @router.get("/{seller_username}/top-items", response_model=list[TopItem])
-def top_items(
+async def top_items(
     seller_username: str,
+    request: Request,
+    response: Response,
     _user: Dict[str, Any] = Depends(get_current_user),
     limit: int = Query(10, ge=1, le=50),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
 ) -> list[TopItem]:
-    seller_id = get_seller_id_by_username(seller_username)
-    if seller_id is None:
-        raise HTTPException(status_code=404, detail="Seller not found")
+    seller_id, data_version, not_modified = await resolve_seller(seller_username, request, response)
+    if not_modified is not None:
+        return not_modified
 
-    items = get_top_items(seller_id=seller_id, limit=limit)
+    try:
+        items = await get_top_items(
+            seller_id, limit=limit, date_from=date_from, date_to=date_to, data_version=data_version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return items
 
 
 @router.get("/{seller_username}/sales-over-time", response_model=list[MonthlySales])
-def sales_over_time(
+async def sales_over_time(
     seller_username: str,
+    request: Request,
+    response: Response,
     _user: Dict[str, Any] = Depends(get_current_user),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: Granularity = Query("month"),
 ) -> list[MonthlySales]:
-    seller_id = get_seller_id_by_username(seller_username)
-    if seller_id is None:
-        raise HTTPException(status_code=404, detail="Seller not found")
+    seller_id, data_version, not_modified = await resolve_seller(seller_username, request, response)
+    if not_modified is not None:
+        return not_modified
 
-    return get_sales_over_time(seller_id)
+    try:
+        return await get_sales_over_time(
+            seller_id, date_from=date_from, date_to=date_to, granularity=granularity, data_version=data_version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{seller_username}/category-breakdown", response_model=list[CategoryBreakdown])
-def category_breakdown(
+async def category_breakdown(
     seller_username: str,
+    request: Request,
+    response: Response,
     _user: Dict[str, Any] = Depends(get_current_user),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
 ) -> list[CategoryBreakdown]:
-    seller_id = get_seller_id_by_username(seller_username)
-    if seller_id is None:
-        raise HTTPException(status_code=404, detail="Seller not found")
+    seller_id, data_version, not_modified = await resolve_seller(seller_username, request, response)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        return await get_category_breakdown(
+            seller_id, date_from=date_from, date_to=date_to, data_version=data_version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{seller_username}/dashboard", response_model=SellerDashboard)
+async def seller_dashboard(
+    seller_username: str,
+    request: Request,
+    response: Response,
+    _user: Dict[str, Any] = Depends(get_current_user),
+    limit: int = Query(10, ge=1, le=50),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: Granularity = Query("month"),
+) -> SellerDashboard:
+    seller_id, data_version, not_modified = await resolve_seller(seller_username, request, response)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        return await get_seller_dashboard(
+            seller_id=seller_id,
+            limit=limit,
+            data_version=data_version,
+            date_from=date_from,
+            date_to=date_to,
+            granularity=granularity,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{seller_username}/orders", response_model=OrderPage)
+async def seller_orders(
+    seller_username: str,
+    request: Request,
+    response: Response,
+    _user: Dict[str, Any] = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    category: Optional[str] = Query(None),
+) -> OrderPage:
+    seller_id, data_version, not_modified = await resolve_seller(seller_username, request, response)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        return await get_orders_page(
+            seller_id, limit=limit, cursor=cursor, date_from=date_from, date_to=date_to, category=category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{seller_username}/listings", response_model=ListingPage)
+async def seller_listings(
+    seller_username: str,
+    request: Request,
+    response: Response,
+    _user: Dict[str, Any] = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    category: Optional[str] = Query(None),
+) -> ListingPage:
+    seller_id, data_version, not_modified = await resolve_seller(seller_username, request, response)
+    if not_modified is not None:
+        return not_modified
 
-    return get_category_breakdown(seller_id)
+    try:
+        return await get_listings_page(
+            seller_id, limit=limit, cursor=cursor, date_from=date_from, date_to=date_to, category=category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
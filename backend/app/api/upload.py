@@ -1,117 +1,67 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Depends
-from typing import Dict, Any
+from fastapi.concurrency import run_in_threadpool
+from typing import BinaryIO, Dict, Any
 
-from app.db.connection import get_db_conn
-from app.services.ingest_service import ingest_sales_csv_bytes, ensure_seller
-from app.services.cleanup_service import clear_seller_data
-from app.services.analytics_service import get_seller_summary
+from app.db.connection import db_conn
+from app.schemas.jobs import IngestJobAccepted
+from app.services.job_service import enqueue_ingest_job, ingest_workers
 from app.auth import get_current_user
+from app.metrics import TimedRoute
 
-router = APIRouter(prefix="/sellers", tags=["upload"])
+router = APIRouter(prefix="/sellers", tags=["upload"], route_class=TimedRoute)
 
 
-@router.post("/upload-sales")
-async def upload_sales_csv(
-    _user: Dict[str, Any] = Depends(get_current_user),
-    seller_username: str = Form(...),
-    file: UploadFile = File(...),
-    replace: bool = Query(False),
-) -> dict:
-    if file.filename is None or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Please upload a .csv file")
-
-    csv_bytes = await file.read()
-    if len(csv_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    conn = None
-    try:
-        conn = get_db_conn()
-
-        seller_id = ensure_seller(conn, seller_username)
-
-        if replace:
-            clear_seller_data(conn, seller_id)
-
-        seller_id, listings_inserted, orders_inserted = ingest_sales_csv_bytes(
+def store_upload(seller_username: str, stream: BinaryIO, replace: bool, include_summary: bool) -> int:
+    with db_conn() as conn:
+        job_id = enqueue_ingest_job(
             conn=conn,
             seller_username=seller_username,
-            csv_bytes=csv_bytes,
+            stream=stream,
+            replace=replace,
+            include_summary=include_summary,
         )
-
         conn.commit()
+    return job_id
+
 
-        return {
-            "seller_id": seller_id,
-            "listings_inserted": listings_inserted,
-            "orders_inserted": orders_inserted,
-            "replaced": replace,
-        }
+async def accept_upload(
+    seller_username: str,
+    file: UploadFile,
+    replace: bool,
+    include_summary: bool,
+) -> IngestJobAccepted:
+    if file.filename is None or not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Please upload a .csv file")
 
+    try:
+        job_id = await run_in_threadpool(store_upload, seller_username, file.file, replace, include_summary)
     except ValueError as e:
-        if conn is not None:
-            conn.rollback()
         raise HTTPException(status_code=400, detail=str(e))
-
     except Exception as e:
-        if conn is not None:
-            conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        if conn is not None:
-            conn.close()
+    ingest_workers.notify()
+    return IngestJobAccepted(job_id=job_id, status="queued", status_url=f"/ingest-jobs/{job_id}")
 
-@router.post("/upload-and-summary")
-async def upload_sales_and_summary(
+
+@router.post("/upload-sales", status_code=202, response_model=IngestJobAccepted)
+async def upload_sales_csv(
     _user: Dict[str, Any] = Depends(get_current_user),
     seller_username: str = Form(...),
     file: UploadFile = File(...),
     replace: bool = Query(False),
-) -> dict:
-    if file.filename is None or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Please upload a .csv file")
+) -> IngestJobAccepted:
+    return await accept_upload(seller_username, file, replace, include_summary=False)
 
-    csv_bytes = await file.read()
-    if len(csv_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Empty file")
 
-    conn = None
-    try:
-        conn = get_db_conn()
-
-        seller_id = ensure_seller(conn, seller_username)
-
-        if replace:
-            clear_seller_data(conn, seller_id)
-
-        seller_id, listings_inserted, orders_inserted = ingest_sales_csv_bytes(
-            conn=conn,
-            seller_username=seller_username,
-            csv_bytes=csv_bytes,
-        )
-
-        conn.commit()
-
-        summary = get_seller_summary(seller_id)
-
-        return {
-            "seller_id": seller_id,
-            "listings_inserted": listings_inserted,
-            "orders_inserted": orders_inserted,
-            "summary": summary,
-        }
-
-    except ValueError as e:
-        if conn is not None:
-            conn.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
-
-    except Exception as e:
-        if conn is not None:
-            conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-
-    finally:
-        if conn is not None:
-            conn.close()
+@router.post("/upload-and-summary", status_code=202, response_model=IngestJobAccepted)
+async def upload_sales_and_summary(
+    _user: Dict[str, Any] = Depends(get_current_user),
+    seller_username: str = Form(...),
+    file: UploadFile = File(...),
+    replace: bool = Query(False),
+) -> IngestJobAccepted:
+    """
+    same as /upload-sales; the finished job's status response also carries the seller summary.
+    """
+    return await accept_upload(seller_username, file, replace, include_summary=True)
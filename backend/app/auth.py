@@ -1,17 +1,30 @@
 from fastapi import Header, HTTPException
 from typing import Optional, Dict, Any
 import os
+import copy
 import json
+import hashlib
+import threading
+import time
 import urllib.request
-from functools import lru_cache
+from collections import OrderedDict
 
-from jose import jwt
-from jose.exceptions import JWTError
+from jose import jwk, jwt
+from jose.exceptions import JOSEError, JWTError
+
+from app.metrics import timed_phase
 
 COGNITO_REGION = os.getenv("COGNITO_REGION")
 COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID")
 COGNITO_APP_CLIENT_ID = os.getenv("COGNITO_APP_CLIENT_ID")
 
+# a local jwks.json (tests, offline dev) instead of the user pool's endpoint
+COGNITO_JWKS_FILE = os.getenv("COGNITO_JWKS_FILE")
+JWKS_TTL_SECONDS = float(os.getenv("JWKS_TTL_SECONDS", "3600"))
+# an unknown kid refetches the key set at most this often, so junk tokens can't hammer cognito
+JWKS_MIN_REFETCH_SECONDS = float(os.getenv("JWKS_MIN_REFETCH_SECONDS", "30"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "4096"))
+
 if not COGNITO_REGION or not COGNITO_USER_POOL_ID or not COGNITO_APP_CLIENT_ID:
     print(
         "WARNING: Missing Cognito env vars "
@@ -19,16 +32,187 @@ if not COGNITO_REGION or not COGNITO_USER_POOL_ID or not COGNITO_APP_CLIENT_ID:
     )
 
 
-@lru_cache(maxsize=1)
-def get_jwks() -> Dict[str, Any]:
-    jwks_url = (
-        f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/"
-        f"{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
-    )
-    with urllib.request.urlopen(jwks_url) as response:
+def get_issuer() -> str:
+    return f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
+
+
+def load_jwks() -> Dict[str, Any]:
+    if COGNITO_JWKS_FILE:
+        with open(COGNITO_JWKS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    jwks_url = get_issuer() + "/.well-known/jwks.json"
+    with urllib.request.urlopen(jwks_url, timeout=5) as response:
         return json.loads(response.read().decode("utf-8"))
 
 
+class JwksKeySet:
+    """
+    the user pool's public keys by kid, parsed once. refreshed every ttl_seconds by a background
+    thread (or on the request path if that thread isn't running) and refetched when a token
+    names a kid we haven't seen, so key rotation doesn't need a restart.
+    """
+
+    def __init__(self, ttl_seconds: float = JWKS_TTL_SECONDS, min_refetch_seconds: float = JWKS_MIN_REFETCH_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.min_refetch_seconds = min_refetch_seconds
+        self._keys: Dict[str, Any] = dict()
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> None:
+        """
+        raises if the key set can't be loaded; the previous keys stay in place.
+        """
+        self._attempted_at = time.monotonic()
+        jwks = load_jwks()
+
+        keys = dict()
+        for key in jwks.get("keys", []):
+            kid = key.get("kid")
+            if kid is None:
+                continue
+            try:
+                keys[kid] = jwk.construct(key, algorithm=key.get("alg", "RS256"))
+            except JOSEError as e:
+                print(f"WARNING: skipping unusable JWKS key {kid}: {e}")
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    def get_key(self, kid: Optional[str]) -> Optional[Any]:
+        key = self._keys.get(kid)
+        now = time.monotonic()
+        stale = self._fetched_at is None or now - self._fetched_at > self.ttl_seconds
+        if key is not None and not stale:
+            return key
+
+        with self._lock:
+            # another request may have refreshed while we waited
+            key = self._keys.get(kid)
+            stale = self._fetched_at is None or now - self._fetched_at > self.ttl_seconds
+            if key is not None and not stale:
+                return key
+            if self._attempted_at is not None and now - self._attempted_at < self.min_refetch_seconds:
+                return key
+
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"WARNING: could not refresh JWKS: {e}")
+            return self._keys.get(kid)
+
+    def has_key(self, kid: Optional[str]) -> bool:
+        return kid in self._keys
+
+    def stats(self) -> Dict[str, Any]:
+        fetched_at = self._fetched_at
+        return {
+            "keys": sorted(self._keys.keys()),
+            "age_seconds": None if fetched_at is None else round(time.monotonic() - fetched_at, 1),
+            "ttl_seconds": self.ttl_seconds,
+            "background_refresh": self._thread is not None,
+        }
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if not COGNITO_JWKS_FILE and (not COGNITO_REGION or not COGNITO_USER_POOL_ID):
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with self._lock:
+                    self.refresh()
+                wait_seconds = self.ttl_seconds / 2
+            except Exception as e:
+                print(f"WARNING: could not refresh JWKS: {e}")
+                wait_seconds = self.min_refetch_seconds
+            self._stop.wait(wait_seconds)
+
+
+class VerifiedTokenCache:
+    """
+    claims of tokens that already passed verification, keyed by sha256(token), each kept until
+    its exp. bounded LRU; the raw token is never stored.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token_hash: str) -> Optional[tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, kid, claims = entry
+            if expires_at <= time.time():
+                del self._entries[token_hash]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return kid, claims
+
+    def set(self, token_hash: str, kid: str, claims: Dict[str, Any]) -> None:
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+
+        with self._lock:
+            self._entries[token_hash] = (float(expires_at), kid, claims)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+jwks_keys = JwksKeySet()
+verified_tokens = VerifiedTokenCache()
+
+
+def get_auth_cache_stats() -> Dict[str, Any]:
+    return {
+        "jwks": jwks_keys.stats(),
+        "verified_tokens": verified_tokens.stats(),
+    }
+
+
 def get_token_from_header(authorization: Optional[str]) -> str:
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
@@ -41,8 +225,12 @@ def get_token_from_header(authorization: Optional[str]) -> str:
 
 
 def verify_cognito_jwt(token: str) -> Dict[str, Any]:
-    jwks = get_jwks()
-    keys = jwks.get("keys", [])
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = verified_tokens.get(token_hash)
+    # a key dropped from the JWKS also invalidates the tokens it signed
+    if cached is not None and jwks_keys.has_key(cached[0]):
+        # callers get their own claims; the cached ones are shared by every request with this token
+        return copy.deepcopy(cached[1])
 
     try:
         header = jwt.get_unverified_header(token)
@@ -50,18 +238,16 @@ def verify_cognito_jwt(token: str) -> Dict[str, Any]:
         raise HTTPException(status_code=401, detail="Invalid JWT header")
 
     kid = header.get("kid")
-    key = next((k for k in keys if k.get("kid") == kid), None)
+    key = jwks_keys.get_key(kid)
     if key is None:
         raise HTTPException(status_code=401, detail="Public key not found for token")
 
-    issuer = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
-
     try:
         claims = jwt.decode(
             token,
             key,
             algorithms=["RS256"],
-            issuer=issuer,
+            issuer=get_issuer(),
             audience=COGNITO_APP_CLIENT_ID,
             options={"verify_aud": True},
         )
@@ -71,6 +257,7 @@ def verify_cognito_jwt(token: str) -> Dict[str, Any]:
     if not claims.get("sub"):
         raise HTTPException(status_code=401, detail="JWT missing sub")
 
+    verified_tokens.set(token_hash, kid, copy.deepcopy(claims))
     return claims
 
 
@@ -78,7 +265,8 @@ def get_current_user(
     authorization: Optional[str] = Header(default=None),
 ) -> Dict[str, Any]:
     token = get_token_from_header(authorization)
-    claims = verify_cognito_jwt(token)
+    with timed_phase("auth"):
+        claims = verify_cognito_jwt(token)
 
     return {
         "seller_id": claims.get("sub"),
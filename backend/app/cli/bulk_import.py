@@ -0,0 +1,337 @@
+"""
+bulk-load many sellers' sales exports at once.
+
+files are parsed in a process pool and loaded over a bounded number of db connections,
+one transaction per seller. every committed seller is recorded in bulk_imports (in the
+same transaction), so an interrupted run can simply be started again and skips what is done.
+
+usage (from backend/):
+    python -m app.cli.bulk_import DIR_OR_MANIFEST [--workers N] [--connections N] [--replace]
+
+a directory holds <username>.csv files and/or <username>/ folders of csv files (loaded in name order).
+a manifest is a csv with seller_username,csv_path columns; relative paths are resolved against
+the manifest's folder and a seller's files are loaded in manifest order.
+"""
+import argparse
+import concurrent.futures
+import csv
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.db.connection import close_pool, db_conn, open_pool
+from app.db.partitions import ensure_order_partitions_for
+from app.db.sellers import bump_seller_data_version
+from app.services.ingest_service import (
+    BATCH_SIZE,
+    PARSE_MODE,
+    ensure_seller,
+    iter_parsed_rows,
+    iter_stream_chunks,
+    load_parsed_rows,
+    open_sales_csv,
+)
+from app.services.replace_service import replace_seller_data
+
+
+def discover_imports(source: Path) -> dict[str, list[Path]]:
+    """
+    this returns: {seller_username: [csv paths in load order]}
+    """
+    imports = dict()
+
+    if source.is_dir():
+        for entry in sorted(source.iterdir()):
+            if entry.is_file() and entry.suffix.lower() == ".csv":
+                imports.setdefault(entry.stem, []).append(entry)
+            elif entry.is_dir():
+                files = sorted(p for p in entry.iterdir() if p.is_file() and p.suffix.lower() == ".csv")
+                if len(files) > 0:
+                    imports.setdefault(entry.name, []).extend(files)
+        return imports
+
+    with open(source, newline="") as f:
+        reader = csv.DictReader(f)
+        for col in ["seller_username", "csv_path"]:
+            if reader.fieldnames is None or col not in reader.fieldnames:
+                raise ValueError("Manifest is missing column: " + col)
+        for row in reader:
+            username = (row["seller_username"] or "").strip()
+            csv_path = (row["csv_path"] or "").strip()
+            if username == "" or csv_path == "":
+                continue
+            path = Path(csv_path)
+            if not path.is_absolute():
+                path = source.parent / path
+            imports.setdefault(username, []).append(path)
+    return imports
+
+
+def make_fingerprint(paths: list[Path]) -> str:
+    """
+    path + size + mtime of every file; a re-exported or edited file imports again.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = path.stat()
+        digest.update(f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_completed_imports() -> set[tuple[str, str]]:
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT seller_username, fingerprint FROM bulk_imports;")
+            rows = cur.fetchall()
+    return {(row["seller_username"], row["fingerprint"]) for row in rows}
+
+
+def parse_seller_files(paths: list[str], parse_mode: str, batch_size: int) -> dict:
+    """
+    runs in a worker process. this returns the staging tuples (without row_num) for all of a
+    seller's files, in order, plus counters.
+    """
+    started = time.perf_counter()
+    rows = list()
+    rows_skipped = 0
+    total_bytes = 0
+
+    for path in paths:
+        with open(path, "rb") as f:
+            reader, header = open_sales_csv(iter_stream_chunks(f))
+            for parsed in iter_parsed_rows(reader, header, parse_mode, batch_size):
+                if parsed is None:
+                    rows_skipped += 1
+                else:
+                    rows.append(parsed)
+        total_bytes += os.path.getsize(path)
+
+    return {
+        "rows": rows,
+        "rows_skipped": rows_skipped,
+        "bytes": total_bytes,
+        "parse_seconds": time.perf_counter() - started,
+    }
+
+
+def load_seller(seller_username: str, fingerprint: str, files: int, parsed: dict, replace: bool, batch_size: int) -> dict:
+    """
+    runs on a loader thread: one transaction (and one pooled connection) per seller.
+    """
+    started = time.perf_counter()
+    # own transaction: adding a partition locks orders until commit (see ensure_order_partitions)
+    with db_conn() as conn:
+        ensure_order_partitions_for(conn, (row[6] for row in parsed["rows"]))
+
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            # same per-seller lock as the api ingest workers
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", ("ingest:" + seller_username,))
+
+        seller_id = ensure_seller(conn, seller_username)
+        if replace:
+            counts = replace_seller_data(conn, seller_id, parsed["rows"], batch_size=batch_size)
+            orders_inserted = counts["orders_inserted"]
+            # already present: stored exactly as uploaded, or repeated across the seller's files
+            orders_duplicate = counts["orders_unchanged"] + counts["orders_duplicate"]
+            if counts["changed"]:
+                bump_seller_data_version(conn, seller_id)
+        else:
+            _, orders_inserted, orders_duplicate = load_parsed_rows(
+                conn, seller_id, parsed["rows"], batch_size=batch_size
+            )
+            if orders_inserted > 0:
+                bump_seller_data_version(conn, seller_id)
+
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO bulk_imports (seller_username, fingerprint, files, rows_loaded, rows_skipped, orders_inserted)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (seller_username, fingerprint) DO NOTHING;
+                """,
+                (seller_username, fingerprint, files, len(parsed["rows"]), parsed["rows_skipped"], orders_inserted),
+            )
+
+    return {
+        "orders_inserted": orders_inserted,
+        "orders_duplicate": orders_duplicate,
+        "load_seconds": time.perf_counter() - started,
+    }
+
+
+def run_bulk_import(
+    imports: dict[str, list[Path]],
+    workers: int,
+    connections: int,
+    replace: bool = False,
+    batch_size: int = BATCH_SIZE,
+    parse_mode: str = PARSE_MODE,
+) -> dict:
+    """
+    this returns the run totals. parsed sellers waiting for a connection are capped at
+    workers + connections so memory stays bounded no matter how many sellers are queued.
+    """
+    started = time.perf_counter()
+    totals = {
+        "sellers": len(imports),
+        "imported": 0,
+        "already_done": 0,
+        "failed": 0,
+        "files": 0,
+        "bytes": 0,
+        "rows": 0,
+        "rows_skipped": 0,
+        "orders_inserted": 0,
+        "orders_duplicate": 0,
+        "parse_seconds": 0.0,
+        "load_seconds": 0.0,
+    }
+
+    completed = get_completed_imports()
+    pending = list()
+    for seller_username, paths in imports.items():
+        fingerprint = make_fingerprint(paths)
+        if (seller_username, fingerprint) in completed:
+            totals["already_done"] += 1
+        else:
+            pending.append((seller_username, paths, fingerprint))
+
+    max_in_flight = workers + connections
+    queue = iter(pending)
+    done = 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as parsers, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=connections) as loaders:
+        parsing = dict()
+        loading = dict()
+
+        def submit_next_parse() -> None:
+            item = next(queue, None)
+            if item is None:
+                return
+            future = parsers.submit(parse_seller_files, [str(p) for p in item[1]], parse_mode, batch_size)
+            parsing[future] = item
+
+        for _ in range(max_in_flight):
+            submit_next_parse()
+
+        while len(parsing) > 0 or len(loading) > 0:
+            finished, _ = concurrent.futures.wait(
+                list(parsing.keys()) + list(loading.keys()),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in finished:
+                if future in parsing:
+                    seller_username, paths, fingerprint = parsing.pop(future)
+                    try:
+                        parsed = future.result()
+                    except Exception as e:
+                        done += 1
+                        totals["failed"] += 1
+                        print(f"WARNING: [{done}/{len(pending)}] {seller_username}: could not parse: {e}")
+                        submit_next_parse()
+                        continue
+
+                    totals["parse_seconds"] += parsed["parse_seconds"]
+                    load_future = loaders.submit(
+                        load_seller, seller_username, fingerprint, len(paths), parsed, replace, batch_size
+                    )
+                    loading[load_future] = (seller_username, paths, parsed)
+                    continue
+
+                seller_username, paths, parsed = loading.pop(future)
+                done += 1
+                try:
+                    loaded = future.result()
+                except Exception as e:
+                    totals["failed"] += 1
+                    print(f"WARNING: [{done}/{len(pending)}] {seller_username}: load rolled back: {e}")
+                    submit_next_parse()
+                    continue
+
+                totals["imported"] += 1
+                totals["files"] += len(paths)
+                totals["bytes"] += parsed["bytes"]
+                totals["rows"] += len(parsed["rows"])
+                totals["rows_skipped"] += parsed["rows_skipped"]
+                totals["orders_inserted"] += loaded["orders_inserted"]
+                totals["orders_duplicate"] += loaded["orders_duplicate"]
+                totals["load_seconds"] += loaded["load_seconds"]
+                print(
+                    f"[{done}/{len(pending)}] {seller_username}: {len(parsed['rows']):,} rows "
+                    f"(parse {parsed['parse_seconds']:.2f}s, load {loaded['load_seconds']:.2f}s)"
+                )
+                submit_next_parse()
+
+    totals["elapsed_seconds"] = time.perf_counter() - started
+    return totals
+
+
+def print_summary(totals: dict, workers: int, connections: int) -> None:
+    elapsed = max(totals["elapsed_seconds"], 1e-9)
+    megabytes = totals["bytes"] / (1024 * 1024)
+    print(
+        f"sellers: {totals['imported']} imported, {totals['already_done']} already done, "
+        f"{totals['failed']} failed (of {totals['sellers']})"
+    )
+    print(f"files: {totals['files']}, {megabytes:,.1f} MiB")
+    print(
+        f"rows: {totals['rows']:,} loaded, {totals['rows_skipped']:,} skipped, "
+        f"{totals['orders_inserted']:,} orders inserted, {totals['orders_duplicate']:,} already present"
+    )
+    print(
+        f"elapsed: {elapsed:.1f}s -> {totals['rows'] / elapsed:,.0f} rows/sec, "
+        f"{megabytes / elapsed:,.2f} MiB/sec"
+    )
+    print(
+        f"parse: {totals['parse_seconds']:.1f}s over {workers} process(es), "
+        f"load: {totals['load_seconds']:.1f}s over {connections} connection(s)"
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-import seller sales exports")
+    parser.add_argument("source", type=Path, help="directory of exports or a seller_username,csv_path manifest")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes")
+    parser.add_argument("--connections", type=int, default=4, help="concurrent db connections / seller transactions")
+    parser.add_argument("--replace", action="store_true", help="make each seller's data match the files (diffed against what is stored)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    if not args.source.exists():
+        print(f"{args.source} does not exist")
+        return 1
+
+    imports = discover_imports(args.source)
+    if len(imports) == 0:
+        print("No csv files found")
+        return 1
+
+    workers = max(1, args.workers)
+    connections = max(1, args.connections)
+
+    # the pool never needs more than one connection per loader thread
+    os.environ["DB_POOL_MAX_SIZE"] = str(connections)
+    os.environ["DB_POOL_MIN_SIZE"] = str(min(connections, int(os.environ.get("DB_POOL_MIN_SIZE", "2"))))
+    open_pool()
+    try:
+        totals = run_bulk_import(
+            imports,
+            workers=workers,
+            connections=connections,
+            replace=args.replace,
+            batch_size=args.batch_size,
+        )
+    finally:
+        close_pool()
+
+    print_summary(totals, workers, connections)
+    return 1 if totals["failed"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
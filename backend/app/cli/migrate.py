@@ -0,0 +1,51 @@
+"""
+apply or inspect the versioned schema migrations in app/migrations.
+
+usage (from backend/):
+    python -m app.cli.migrate status
+    python -m app.cli.migrate apply
+
+run `apply` at deploy time when the api pods start with DB_MIGRATE_ON_STARTUP=0.
+"""
+import argparse
+import os
+import sys
+
+from app.db.connection import close_pool, db_conn, open_pool
+from app.db.migrations import find_migrations_dir, get_migration_status, load_migrations
+from app.services.migration_service import migrate_database
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or inspect schema migrations")
+    parser.add_argument("command", choices=["status", "apply"])
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DB_POOL_MIN_SIZE", "1")
+    open_pool()
+    try:
+        if args.command == "apply":
+            try:
+                applied = migrate_database()
+            except ValueError as e:
+                print(f"ERROR: {e}")
+                return 1
+            print(f"applied {len(applied)} migration(s)")
+            return 0
+
+        migrations_dir = find_migrations_dir()
+        if migrations_dir is None:
+            print("app/migrations not found")
+            return 1
+        with db_conn() as conn:
+            status = get_migration_status(conn, load_migrations(migrations_dir))
+        for row in status:
+            print(f"{row['state']:<8} {row['file']}")
+        return 1 if any(row["state"] == "changed" for row in status) else 0
+
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
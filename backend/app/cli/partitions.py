@@ -0,0 +1,97 @@
+"""
+manage the monthly orders partitions (DB_PARTITION_ORDERS=1 layout).
+
+usage (from backend/):
+    python -m app.cli.partitions list
+    python -m app.cli.partitions migrate
+    python -m app.cli.partitions create [--months N]
+    python -m app.cli.partitions detach --before YYYY-MM [--drop]
+
+detach takes every month that ends on or before the first day of --before out of orders; the
+detached tables keep their rows unless --drop is given. the rollups still include the detached
+orders until `python -m app.cli.rollups rebuild` is run.
+"""
+import argparse
+import sys
+from datetime import date, datetime
+
+from psycopg import sql
+
+from app.db.connection import get_db_conn
+from app.db.partitions import (
+    detach_order_partitions,
+    ensure_order_partitions,
+    is_orders_partitioned,
+    list_order_partitions,
+    migrate_orders_to_partitioned,
+    month_start,
+    next_month,
+)
+
+
+def parse_month(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected YYYY-MM")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage monthly orders partitions")
+    parser.add_argument("command", choices=["list", "migrate", "create", "detach"])
+    parser.add_argument("--months", type=int, default=3, help="create: months ahead of the current one")
+    parser.add_argument("--before", type=parse_month, default=None, help="detach: first month to keep (YYYY-MM)")
+    parser.add_argument("--drop", action="store_true", help="detach: drop the detached tables")
+    args = parser.parse_args(argv)
+
+    conn = get_db_conn()
+    try:
+        partitioned = is_orders_partitioned(conn)
+
+        if args.command == "migrate":
+            if partitioned:
+                print("orders is already partitioned")
+                return 0
+            moved = migrate_orders_to_partitioned(conn)
+            conn.commit()
+            print(f"partitioned orders by month ({moved} order(s) moved)")
+            return 0
+
+        if not partitioned:
+            print("orders is not partitioned (set DB_PARTITION_ORDERS=1 or run `migrate`)")
+            return 1
+
+        if args.command == "list":
+            with conn.cursor() as cur:
+                for row in list_order_partitions(conn):
+                    cur.execute(sql.SQL("SELECT COUNT(*)::bigint AS n FROM {};").format(sql.Identifier(row["name"])))
+                    print(f"{row['name']:<16} {cur.fetchone()['n']:>12,}  {row['bounds']}")
+            return 0
+
+        if args.command == "create":
+            months = list()
+            month = month_start(datetime.now())
+            for _ in range(max(0, args.months) + 1):
+                months.append(month)
+                month = next_month(month)
+            created = ensure_order_partitions(conn, months)
+            conn.commit()
+            print(f"created {created} partition(s)")
+            return 0
+
+        if args.before is None:
+            print("detach needs --before YYYY-MM")
+            return 1
+        detached = detach_order_partitions(conn, args.before, drop=args.drop)
+        conn.commit()
+        for name in detached:
+            print(("dropped " if args.drop else "detached ") + name)
+        print(f"{len(detached)} partition(s) {'dropped' if args.drop else 'detached'}")
+        return 0
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
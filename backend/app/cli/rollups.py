@@ -0,0 +1,63 @@
+"""
+rebuild or verify the per-seller analytics rollups against the raw orders/listings tables.
+
+usage (from backend/):
+    python -m app.cli.rollups verify [--seller USERNAME]
+    python -m app.cli.rollups rebuild [--seller USERNAME]
+"""
+import argparse
+import sys
+
+from app.db.connection import get_db_conn
+from app.db.sellers import bump_seller_data_version
+from app.services.rollup_service import rebuild_seller_rollups, verify_seller_rollups
+
+
+def list_seller_ids(conn, seller_username=None) -> list[int]:
+    with conn.cursor() as cur:
+        if seller_username is None:
+            cur.execute("SELECT id FROM sellers ORDER BY id;")
+        else:
+            cur.execute("SELECT id FROM sellers WHERE username = %s;", (seller_username,))
+        rows = cur.fetchall()
+    return [int(row["id"]) for row in rows]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild or verify seller analytics rollups")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--seller", default=None, help="only this seller username")
+    args = parser.parse_args(argv)
+
+    conn = get_db_conn()
+    try:
+        seller_ids = list_seller_ids(conn, args.seller)
+        if len(seller_ids) == 0:
+            print("No matching sellers")
+            return 1
+
+        mismatched = 0
+        for seller_id in seller_ids:
+            mismatches = verify_seller_rollups(conn, seller_id)
+            for line in mismatches:
+                print("MISMATCH " + line)
+            if len(mismatches) > 0:
+                mismatched += 1
+
+            if args.command == "rebuild":
+                rebuild_seller_rollups(conn, seller_id)
+                bump_seller_data_version(conn, seller_id)
+                conn.commit()
+
+        print(f"checked {len(seller_ids)} seller(s), {mismatched} mismatched")
+        if args.command == "rebuild":
+            print(f"rebuilt {len(seller_ids)} seller(s)")
+            return 0
+        return 1 if mismatched > 0 else 0
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,152 @@
 import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
 import psycopg
+from psycopg.conninfo import make_conninfo
 from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
+from app.metrics import record_phase, timed_phase
+
+_pool: Optional[ConnectionPool] = None
+_async_pool: Optional[AsyncConnectionPool] = None
 
-def get_db_conn() -> psycopg.Connection:
-    database_url = os.environ.get("DATABASE_URL")
 
+def get_conninfo() -> str:
+    database_url = os.environ.get("DATABASE_URL")
     if database_url:
-        conn = psycopg.connect(database_url, row_factory=dict_row)
-    else:
-        db_host = os.environ.get("DB_HOST", "localhost")
-        db_port = int(os.environ.get("DB_PORT", "5432"))
-        db_name = os.environ.get("DB_NAME", "mydepop")
-        db_user = os.environ.get("DB_USER", "mydepop_user")
-        db_password = os.environ.get("DB_PASSWORD", "mydepop_password")
-
-        conn = psycopg.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-            row_factory=dict_row,
-        )
-    return conn
\ No newline at end of file
+        return database_url
+
+    return make_conninfo(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=int(os.environ.get("DB_PORT", "5432")),
+        dbname=os.environ.get("DB_NAME", "mydepop"),
+        user=os.environ.get("DB_USER", "mydepop_user"),
+        password=os.environ.get("DB_PASSWORD", "mydepop_password"),
+    )
+
+
+def get_db_conn() -> psycopg.Connection:
+    """
+    this opens a standalone connection outside the pool (scripts, one-off jobs).
+    request handlers should use db_conn() instead.
+    """
+    with timed_phase("db_connect"):
+        return psycopg.connect(get_conninfo(), row_factory=dict_row)
+
+
+def get_pool_settings() -> dict:
+    """
+    pool sizes and recycling are configurable via env:
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_LIFETIME (s), DB_POOL_MAX_IDLE (s), DB_POOL_TIMEOUT (s).
+    """
+    return {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+        "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800")),
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    }
+
+
+def open_pool() -> ConnectionPool:
+    """
+    this creates the process-wide sync pool (uploads, migrations).
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    _pool = ConnectionPool(
+        conninfo=get_conninfo(),
+        kwargs={"row_factory": dict_row},
+        check=ConnectionPool.check_connection,
+        name="depop-seller-hub",
+        open=False,
+        **get_pool_settings(),
+    )
+    # not waiting here so the api can still boot while the db is unreachable
+    _pool.open(wait=False)
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    if _pool is None:
+        return
+    _pool.close()
+    _pool = None
+
+
+def get_pool() -> ConnectionPool:
+    if _pool is None:
+        return open_pool()
+    return _pool
+
+
+def get_pool_stats() -> dict:
+    """
+    this returns psycopg_pool's counters for each pool that is open, by pool name.
+    """
+    stats = dict()
+    for pool in (_pool, _async_pool):
+        if pool is not None:
+            stats[pool.name] = pool.get_stats()
+    return stats
+
+
+@contextmanager
+def db_conn() -> Iterator[psycopg.Connection]:
+    """
+    this borrows a pooled connection. the transaction is committed on clean exit
+    and rolled back if the block raises, then the connection goes back to the pool.
+    """
+    started = time.perf_counter()
+    with get_pool().connection() as conn:
+        record_phase("db_connect", (time.perf_counter() - started) * 1000.0)
+        yield conn
+
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """
+    this creates the process-wide async pool used by the read-only analytics routes.
+    it shares the DB_POOL_* settings with the sync pool.
+    """
+    global _async_pool
+    if _async_pool is not None:
+        return _async_pool
+
+    _async_pool = AsyncConnectionPool(
+        conninfo=get_conninfo(),
+        kwargs={"row_factory": dict_row},
+        check=AsyncConnectionPool.check_connection,
+        name="depop-seller-hub-async",
+        open=False,
+        **get_pool_settings(),
+    )
+    await _async_pool.open(wait=False)
+    return _async_pool
+
+
+async def close_async_pool() -> None:
+    global _async_pool
+    if _async_pool is None:
+        return
+    await _async_pool.close()
+    _async_pool = None
+
+
+@asynccontextmanager
+async def async_db_conn() -> AsyncIterator[psycopg.AsyncConnection]:
+    """
+    async counterpart of db_conn().
+    """
+    pool = _async_pool
+    if pool is None:
+        pool = await open_async_pool()
+    started = time.perf_counter()
+    async with pool.connection() as conn:
+        record_phase("db_connect", (time.perf_counter() - started) * 1000.0)
+        yield conn
@@ -0,0 +1,152 @@
+"""
+versioned schema migrations: app/migrations/NNNN_name.sql, applied in order and recorded in
+schema_migrations with a checksum of the file. they ship inside the app package, so every image
+or checkout that can run the api can also migrate its database.
+
+startup only pays one SELECT when everything is applied. pending files are applied one per
+transaction under an advisory lock, so when several workers or replicas start together only
+one of them runs the DDL and the others find nothing left to do once they get the lock.
+an applied file must not be edited (startup fails if one was); add a new one instead.
+this runner is the only thing that executes these files, so they don't need to be idempotent.
+"""
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+import psycopg
+
+# DB_MIGRATE_ON_STARTUP=0 on api pods that should never issue DDL (run `python -m app.cli.migrate` at deploy)
+MIGRATE_ON_STARTUP = os.environ.get("DB_MIGRATE_ON_STARTUP", "1") != "0"
+MIGRATIONS_DIR = os.environ.get("DB_MIGRATIONS_DIR")
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_([A-Za-z0-9_]+)\.sql$")
+
+
+def find_migrations_dir() -> Optional[Path]:
+    if MIGRATIONS_DIR:
+        path = Path(MIGRATIONS_DIR)
+        return path if path.is_dir() else None
+
+    path = Path(__file__).resolve().parent.parent / "migrations"
+    return path if path.is_dir() else None
+
+
+def load_migrations(migrations_dir: Path) -> list[dict]:
+    """
+    this returns [{"version", "name", "path", "checksum"}] ordered by version.
+    """
+    migrations = list()
+    for path in migrations_dir.iterdir():
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if match is None:
+            continue
+        migrations.append({
+            "version": int(match.group(1)),
+            "name": match.group(2),
+            "path": path,
+            "checksum": hashlib.sha256(path.read_bytes()).hexdigest(),
+        })
+
+    migrations.sort(key=lambda m: m["version"])
+    for prev, cur in zip(migrations, migrations[1:]):
+        if prev["version"] == cur["version"]:
+            raise ValueError(f"Duplicate migration version {cur['version']}: {prev['path'].name}, {cur['path'].name}")
+    return migrations
+
+
+def get_applied_migrations(conn: psycopg.Connection) -> dict[int, str]:
+    """
+    this returns {version: checksum}; empty before the first migration has run.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT version, checksum FROM schema_migrations;")
+            rows = cur.fetchall()
+    except psycopg.errors.UndefinedTable:
+        conn.rollback()
+        return dict()
+    return {int(row["version"]): row["checksum"] for row in rows}
+
+
+def check_applied_checksums(migrations: list[dict], applied: dict[int, str]) -> None:
+    for migration in migrations:
+        checksum = applied.get(migration["version"])
+        if checksum is not None and checksum != migration["checksum"]:
+            raise ValueError(
+                f"Migration {migration['path'].name} was edited after it was applied "
+                "(add a new migration instead)"
+            )
+
+
+def apply_migration(conn: psycopg.Connection, migration: dict) -> bool:
+    """
+    this applies one migration in its own transaction and returns False if another process
+    got to it first.
+    """
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'));")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    checksum TEXT NOT NULL,
+                    duration_ms INTEGER NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                );
+                """
+            )
+            cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s;", (migration["version"],))
+            if cur.fetchone() is not None:
+                return False
+
+            started = time.perf_counter()
+            cur.execute(migration["path"].read_text())
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            cur.execute(
+                """
+                INSERT INTO schema_migrations (version, name, checksum, duration_ms)
+                VALUES (%s, %s, %s, %s);
+                """,
+                (migration["version"], migration["name"], migration["checksum"], duration_ms),
+            )
+    return True
+
+
+def run_pending_migrations(conn: psycopg.Connection, migrations: list[dict]) -> list[str]:
+    """
+    this returns the file names applied by this process (empty when up to date).
+    raises ValueError if an applied file has changed.
+    """
+    applied = get_applied_migrations(conn)
+    check_applied_checksums(migrations, applied)
+
+    pending = [m for m in migrations if m["version"] not in applied]
+    if len(pending) == 0:
+        return list()
+
+    # close the read transaction so each migration gets its own
+    conn.commit()
+    names = list()
+    for migration in pending:
+        if apply_migration(conn, migration):
+            names.append(migration["path"].name)
+    return names
+
+
+def get_migration_status(conn: psycopg.Connection, migrations: list[dict]) -> list[dict]:
+    applied = get_applied_migrations(conn)
+    status = list()
+    for migration in migrations:
+        checksum = applied.get(migration["version"])
+        if checksum is None:
+            state = "pending"
+        elif checksum != migration["checksum"]:
+            state = "changed"
+        else:
+            state = "applied"
+        status.append({"file": migration["path"].name, "state": state})
+    return status
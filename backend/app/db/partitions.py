@@ -0,0 +1,216 @@
+"""
+opt-in monthly range partitioning of orders by sold_at (DB_PARTITION_ORDERS=1).
+
+partitioned layout:
+    orders                  PARTITION BY RANGE (sold_at), primary key (id, sold_at)
+    orders_pYYYYMM          one partition per calendar month (session time zone)
+
+there is no default partition: writers call ensure_order_partitions_for() with the sale times
+they are about to insert, in a short transaction before the one that inserts, so a month's
+partition exists before its first order arrives and old months can be detached without scanning
+a catch-all partition.
+"""
+import os
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+import psycopg
+from psycopg import sql
+
+PARTITION_ORDERS = os.environ.get("DB_PARTITION_ORDERS", "0") == "1"
+
+
+def is_orders_partitioned(conn: psycopg.Connection) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('orders');")
+        row = cur.fetchone()
+    return row is not None and row["relkind"] == "p"
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"orders_p{month.year:04d}{month.month:02d}"
+
+
+def list_order_partitions(conn: psycopg.Connection) -> list[dict]:
+    """
+    this returns [{"name", "bounds"}] for the attached partitions, oldest first.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bounds
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass('orders')
+            ORDER BY c.relname;
+            """
+        )
+        return cur.fetchall()
+
+
+def ensure_order_partitions(conn: psycopg.Connection, months: Iterable[date]) -> int:
+    """
+    this creates the missing monthly partitions and returns how many were created.
+    each one is created standalone and then attached: ATTACH PARTITION only takes SHARE UPDATE
+    EXCLUSIVE on orders (reads and inserts carry on) where CREATE ... PARTITION OF takes ACCESS
+    EXCLUSIVE. the locks (including the ones on the tables orders references) are held until
+    commit, so commit right after, never inside an ingest transaction.
+    """
+    months = sorted(set(months))
+    existing = {row["name"] for row in list_order_partitions(conn)}
+    if all(partition_name(month) in existing for month in months):
+        return 0
+
+    created = 0
+    with conn.cursor() as cur:
+        # two writers that need the same new month: the second one finds it attached
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('orders_partitions'));")
+        existing = {row["name"] for row in list_order_partitions(conn)}
+        for month in months:
+            name = partition_name(month)
+            if name in existing:
+                continue
+            cur.execute(
+                sql.SQL("CREATE TABLE IF NOT EXISTS {} (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS);").format(
+                    sql.Identifier(name)
+                )
+            )
+            cur.execute(
+                sql.SQL("ALTER TABLE orders ATTACH PARTITION {} FOR VALUES FROM ({}) TO ({});").format(
+                    sql.Identifier(name),
+                    sql.Literal(month.isoformat()),
+                    sql.Literal(next_month(month).isoformat()),
+                )
+            )
+            existing.add(name)
+            created += 1
+    return created
+
+
+def ensure_order_partitions_between(conn: psycopg.Connection, start: datetime, end: datetime) -> int:
+    months = list()
+    month = month_start(start)
+    while month <= month_start(end):
+        months.append(month)
+        month = next_month(month)
+    return ensure_order_partitions(conn, months)
+
+
+def ensure_upcoming_order_partitions(conn: psycopg.Connection) -> int:
+    """
+    this month and next, so the first orders of a new month never wait on DDL.
+    """
+    current = month_start(datetime.now())
+    return ensure_order_partitions(conn, [current, next_month(current)])
+
+
+def ensure_order_partitions_for(conn: psycopg.Connection, sold_ats: Iterable[datetime]) -> int:
+    """
+    this creates the partitions for the (naive, session time zone) sale times about to be inserted.
+    a no-op for the plain layout. see ensure_order_partitions for when to commit.
+    """
+    if not is_orders_partitioned(conn):
+        return 0
+    return ensure_order_partitions(conn, {month_start(sold_at) for sold_at in sold_ats})
+
+
+def migrate_orders_to_partitioned(conn: psycopg.Connection) -> int:
+    """
+    this rewrites the plain orders table into the partitioned layout in one transaction
+    (orders is locked for the duration) and returns the number of orders moved.
+    index names are kept.
+    """
+    with conn.cursor() as cur:
+        cur.execute("LOCK TABLE orders IN ACCESS EXCLUSIVE MODE;")
+        # another api instance may have migrated while we waited for the lock
+        if is_orders_partitioned(conn):
+            return 0
+        cur.execute("ALTER TABLE orders RENAME TO orders_unpartitioned;")
+        cur.execute("ALTER TABLE orders_unpartitioned RENAME CONSTRAINT orders_pkey TO orders_unpartitioned_pkey;")
+
+        cur.execute(
+            """
+            CREATE TABLE orders (
+                id INTEGER NOT NULL DEFAULT nextval('orders_id_seq'),
+                listing_id INTEGER NOT NULL REFERENCES listings(id) ON DELETE CASCADE,
+                seller_id INTEGER NOT NULL REFERENCES sellers(id) ON DELETE CASCADE,
+                sold_price_cents INTEGER NOT NULL CHECK (sold_price_cents >= 0),
+                depop_fee_cents INTEGER NOT NULL DEFAULT 0,
+                payment_fee_cents INTEGER NOT NULL DEFAULT 0,
+                boosting_fee_cents INTEGER NOT NULL DEFAULT 0,
+                shipping_cost_cents INTEGER NOT NULL DEFAULT 0,
+                refunded_cents INTEGER NOT NULL DEFAULT 0,
+                fees_refunded_cents INTEGER NOT NULL DEFAULT 0,
+                sold_at TIMESTAMPTZ NOT NULL,
+                order_key TEXT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (id, sold_at)
+            ) PARTITION BY RANGE (sold_at);
+            """
+        )
+
+        cur.execute("SELECT MIN(sold_at) AS first_at, MAX(sold_at) AS last_at FROM orders_unpartitioned;")
+        row = cur.fetchone()
+        if row["first_at"] is not None:
+            ensure_order_partitions_between(conn, row["first_at"], row["last_at"])
+        ensure_upcoming_order_partitions(conn)
+
+        columns = (
+            "id, listing_id, seller_id, sold_price_cents, depop_fee_cents, payment_fee_cents, "
+            "boosting_fee_cents, shipping_cost_cents, refunded_cents, fees_refunded_cents, "
+            "sold_at, order_key, created_at"
+        )
+        cur.execute(f"INSERT INTO orders ({columns}) SELECT {columns} FROM orders_unpartitioned;")
+        moved = cur.rowcount
+
+        cur.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id;")
+        cur.execute("DROP TABLE orders_unpartitioned;")
+
+        # unique indexes on a partitioned table must contain the partition key; order_key already
+        # embeds the sale minute, so (seller_id, order_key, sold_at) is as strict as (seller_id, order_key)
+        cur.execute("CREATE UNIQUE INDEX orders_seller_order_key_uidx ON orders (seller_id, order_key, sold_at);")
+        cur.execute("CREATE INDEX idx_orders_seller_sold_at ON orders (seller_id, sold_at);")
+        cur.execute("CREATE INDEX idx_orders_listing_id ON orders (listing_id);")
+
+    return moved
+
+
+def detach_order_partitions(conn: psycopg.Connection, before: date, drop: bool = False) -> list[str]:
+    """
+    this detaches (and optionally drops) every monthly partition that ends on or before `before`
+    and returns their names. detached tables keep their rows and can be archived or re-attached.
+    """
+    detached = list()
+    with conn.cursor() as cur:
+        for row in list_order_partitions(conn):
+            name = row["name"]
+            if not name.startswith("orders_p") or len(name) != len("orders_p000000"):
+                continue
+            month = date(int(name[8:12]), int(name[12:14]), 1)
+            if next_month(month) > before:
+                continue
+
+            cur.execute(sql.SQL("ALTER TABLE orders DETACH PARTITION {};").format(sql.Identifier(name)))
+            if drop:
+                cur.execute(sql.SQL("DROP TABLE {};").format(sql.Identifier(name)))
+            detached.append(name)
+    return detached
+
+
+def get_orders_layout(conn: psycopg.Connection) -> Optional[str]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('orders') IS NOT NULL AS present;")
+        present = cur.fetchone()["present"]
+    if not present:
+        return None
+    return "partitioned" if is_orders_partitioned(conn) else "plain"
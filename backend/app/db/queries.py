@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from app.metrics import record_phase
+
+QUERIES_DIR = Path(__file__).resolve().parent.parent / "queries"
+
+# server-side prepared statements need session-pinned connections; turn off behind pgbouncer (transaction mode)
+PREPARE_QUERIES = os.environ.get("DB_PREPARE_QUERIES", "1") != "0"
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float, failed: bool) -> None:
+        self.calls += 1
+        if failed:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        avg_ms = self.total_ms / self.calls if self.calls > 0 else 0.0
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(avg_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+def load_queries(directory: Path = QUERIES_DIR) -> Dict[str, str]:
+    queries = dict()
+    for path in sorted(directory.glob("*.sql")):
+        queries[path.stem] = path.read_text()
+    return queries
+
+
+_queries = load_queries()
+_stats = {name: QueryStats() for name in _queries}
+_stats_lock = threading.Lock()
+
+
+def get_query(name: str) -> str:
+    sql = _queries.get(name)
+    if sql is None:
+        raise KeyError("Unknown query: " + name)
+    return sql
+
+
+def record_query(name: str, elapsed_ms: float, failed: bool = False) -> None:
+    record_phase("db_query", elapsed_ms)
+    with _stats_lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = QueryStats()
+            _stats[name] = stats
+        stats.record(elapsed_ms, failed)
+
+
+def get_query_stats() -> Dict[str, Dict[str, Any]]:
+    with _stats_lock:
+        return {name: stats.to_dict() for name, stats in _stats.items()}
+
+
+def run_query(cur, name: str, params: dict) -> None:
+    """
+    this executes a registered query on a sync cursor as a prepared statement and records its latency.
+    """
+    sql = get_query(name)
+    started = time.perf_counter()
+    failed = True
+    try:
+        cur.execute(sql, params, prepare=PREPARE_QUERIES)
+        failed = False
+    finally:
+        record_query(name, (time.perf_counter() - started) * 1000.0, failed)
+
+
+async def run_query_async(cur, name: str, params: dict) -> None:
+    """
+    async counterpart of run_query().
+    """
+    sql = get_query(name)
+    started = time.perf_counter()
+    failed = True
+    try:
+        await cur.execute(sql, params, prepare=PREPARE_QUERIES)
+        failed = False
+    finally:
+        record_query(name, (time.perf_counter() - started) * 1000.0, failed)
@@ -1,21 +1,61 @@
-from typing import Optional
-from app.db.connection import get_db_conn
+from typing import Optional, Tuple
+
+import psycopg
+from app.db.connection import db_conn, async_db_conn
+from app.db.queries import PREPARE_QUERIES
+
+
+SELLER_ID_QUERY = """
+    SELECT id, data_version
+    FROM sellers
+    WHERE username = %s
+    LIMIT 1
+"""
 
 
 def get_seller_id_by_username(seller_username: str) -> Optional[int]:
-    query = """
-        SELECT id
-        FROM sellers
-        WHERE username = %s
-        LIMIT 1
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(SELLER_ID_QUERY, (seller_username,), prepare=PREPARE_QUERIES)
+            row = cur.fetchone()
+
+    if row is None:
+        return None
+
+    return int(row["id"])
+
+
+def bump_seller_data_version(conn: psycopg.Connection, seller_id: int) -> int:
     """
+    this marks the seller's analytics as changed. call it inside the write transaction,
+    so the new version only becomes visible together with the data it describes.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE sellers SET data_version = data_version + 1 WHERE id = %s RETURNING data_version;",
+            (seller_id,),
+        )
+        row = cur.fetchone()
+    return int(row["data_version"])
+
 
-    conn = get_db_conn()
+def get_seller_data_version(conn: psycopg.Connection, seller_id: int) -> int:
     with conn.cursor() as cur:
-        cur.execute(query, (seller_username,))
+        cur.execute("SELECT data_version FROM sellers WHERE id = %s;", (seller_id,))
         row = cur.fetchone()
+    return int(row["data_version"])
+
+
+async def get_seller_by_username_async(seller_username: str) -> Optional[Tuple[int, int]]:
+    """
+    this returns (seller_id, data_version) or None.
+    """
+    async with async_db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(SELLER_ID_QUERY, (seller_username,), prepare=PREPARE_QUERIES)
+            row = await cur.fetchone()
 
     if row is None:
         return None
 
-    return int(row["id"])
\ No newline at end of file
+    return (int(row["id"]), int(row["data_version"]))
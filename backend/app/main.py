@@ -1,14 +1,56 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict, Any
 
-from app.auth import get_current_user
+from app.auth import get_current_user, jwks_keys
+from app.db.connection import open_pool, close_pool, open_async_pool, close_async_pool
+from app.db.migrations import MIGRATE_ON_STARTUP
+from app.metrics import TimedRoute, timing_middleware
+from app.services.migration_service import migrate_database
+from app.services.job_service import ingest_workers
 from app.api.health import router as health_router
 from app.api.sellers import router as sellers_router
 from app.api.upload import router as upload_router
+from app.api.ingest_jobs import router as ingest_jobs_router
 
-app = FastAPI(title="Depop Seller Hub API", version="0.1.0")
+
+def run_migrations():
+    if not MIGRATE_ON_STARTUP:
+        print("DB_MIGRATE_ON_STARTUP=0, skipping auto-migration")
+        return
+
+    try:
+        applied = migrate_database()
+        if len(applied) > 0:
+            print(f"DB schema migration complete ({len(applied)} migration(s) applied)")
+        else:
+            print("DB schema up to date")
+    except ValueError:
+        # missing migrations folder or an edited migration: serving on an unknown schema is worse than not starting
+        raise
+    except Exception as e:
+        print(f"WARNING: schema migration failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    open_pool()
+    run_migrations()
+    await open_async_pool()
+    jwks_keys.start()
+    ingest_workers.start()
+    yield
+    ingest_workers.stop()
+    jwks_keys.stop()
+    await close_async_pool()
+    close_pool()
+
+
+app = FastAPI(title="Depop Seller Hub API", version="0.1.0", lifespan=lifespan)
+# so /me is timed like the routers' routes
+app.router.route_class = TimedRoute
 
 allowed_origins = ["http://localhost:5173", "http://127.0.0.1:5173"]
 frontend_url = os.environ.get("FRONTEND_URL")
@@ -21,34 +63,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
+# registered last, so it is the outermost middleware and total covers CORS too
+app.middleware("http")(timing_middleware)
 
 app.include_router(health_router)
 app.include_router(sellers_router)
 app.include_router(upload_router)
-
-
-@app.on_event("startup")
-def run_migrations():
-    from app.db.connection import get_db_conn
-    from pathlib import Path
-
-    schema_path = Path(__file__).resolve().parent.parent.parent / "db" / "schema.sql"
-    if not schema_path.exists():
-        schema_path = Path(__file__).resolve().parent / "schema.sql"
-    if not schema_path.exists():
-        print("WARNING: schema.sql not found, skipping auto-migration")
-        return
-
-    try:
-        conn = get_db_conn()
-        with conn.cursor() as cur:
-            cur.execute(schema_path.read_text())
-        conn.commit()
-        conn.close()
-        print("DB schema migration complete")
-    except Exception as e:
-        print(f"WARNING: schema migration failed: {e}")
+app.include_router(ingest_jobs_router)
 
 
 @app.get("/me")
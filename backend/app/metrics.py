@@ -0,0 +1,285 @@
+"""
+per-request phase timings (Server-Timing header) and process metrics in prometheus text format.
+
+code on the request path reports a phase with record_phase() / timed_phase(); the durations
+are summed per request, sent back as Server-Timing and added to the per-route histograms that
+GET /metrics exports. phases can nest (db_query runs inside handler), so they don't add up to total.
+"""
+import asyncio
+import bisect
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "1") != "0"
+
+# seconds; covers a cached 304 through a slow cold dashboard
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASE_ORDER = ("auth", "db_connect", "db_query", "handler", "serialize")
+
+_request_phases: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "request_phases", default=None
+)
+
+
+class Histogram:
+    """
+    cumulative-bucket histogram per label tuple, the shape prometheus expects.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], list] = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+
+        for labels, counts, total, count in sorted(snapshot):
+            base = format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {total:.6f}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class IngestMetrics:
+    def __init__(self) -> None:
+        self.jobs = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.last_rows_per_second = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, rows: int, seconds: float) -> None:
+        with self._lock:
+            self.jobs += 1
+            self.rows += rows
+            self.seconds += seconds
+            self.last_rows_per_second = rows / seconds if seconds > 0 else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            jobs, rows, seconds, last = self.jobs, self.rows, self.seconds, self.last_rows_per_second
+        return [
+            "# HELP ingest_jobs_total Ingest jobs completed by this process.",
+            "# TYPE ingest_jobs_total counter",
+            f"ingest_jobs_total {jobs}",
+            "# HELP ingest_rows_total CSV rows processed by completed ingest jobs (rate() gives rows/sec).",
+            "# TYPE ingest_rows_total counter",
+            f"ingest_rows_total {rows}",
+            "# HELP ingest_seconds_total Wall time spent in completed ingest jobs.",
+            "# TYPE ingest_seconds_total counter",
+            f"ingest_seconds_total {seconds:.6f}",
+            "# HELP ingest_last_job_rows_per_second Throughput of the most recent ingest job.",
+            "# TYPE ingest_last_job_rows_per_second gauge",
+            f"ingest_last_job_rows_per_second {last:.3f}",
+        ]
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route, method and status.",
+    ("route", "method", "status"),
+)
+phase_duration = Histogram(
+    "http_request_phase_duration_seconds",
+    "Time per request spent in each phase (auth, db_connect, db_query, handler, serialize).",
+    ("route", "phase"),
+)
+ingest_metrics = IngestMetrics()
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if len(names) == 0:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def record_phase(phase: str, elapsed_ms: float) -> None:
+    """
+    no-op outside a request (workers, cli, startup).
+    """
+    phases = _request_phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + elapsed_ms
+
+
+@contextmanager
+def timed_phase(phase: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, (time.perf_counter() - started) * 1000.0)
+
+
+def record_ingest(rows: int, seconds: float) -> None:
+    ingest_metrics.record(rows, seconds)
+
+
+def format_server_timing(phases: Dict[str, float], total_ms: float) -> str:
+    names = [name for name in PHASE_ORDER if name in phases]
+    names += sorted(name for name in phases if name not in PHASE_ORDER)
+    entries = [f"{name};dur={phases[name]:.2f}" for name in names]
+    entries.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(entries)
+
+
+async def timing_middleware(request: Request, call_next):
+    phases: Dict[str, Any] = dict()
+    token = _request_phases.set(phases)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        total_ms = (time.perf_counter() - started) * 1000.0
+        _request_phases.reset(token)
+        # set by TimedRoute; the path template keeps the label set small
+        route = phases.pop("route", None) or "unmatched"
+        request_duration.observe((route, request.method, str(status)), total_ms / 1000.0)
+        for phase, elapsed_ms in phases.items():
+            phase_duration.observe((route, phase), elapsed_ms / 1000.0)
+
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = format_server_timing(phases, total_ms)
+    return response
+
+
+class TimedRoute(APIRoute):
+    """
+    route class that splits a request into handler (the endpoint function) and serialize
+    (validation, dependencies other than auth, and response_model serialization).
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any) -> None:
+        # wrapped before the dependant is built; functools.wraps keeps the signature fastapi inspects
+        if not getattr(endpoint, "_timed", False):
+            endpoint = wrap_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_route_handler(request: Request):
+            phases = _request_phases.get()
+            if phases is None:
+                return await route_handler(request)
+
+            phases["route"] = path
+            started = time.perf_counter()
+            try:
+                return await route_handler(request)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                overhead_ms = elapsed_ms - phases.get("handler", 0.0) - phases.get("auth", 0.0)
+                phases["serialize"] = max(0.0, overhead_ms)
+
+        return timed_route_handler
+
+
+def wrap_endpoint(endpoint: Callable) -> Callable:
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_timed(*args, **kwargs):
+            with timed_phase("handler"):
+                return await endpoint(*args, **kwargs)
+        async_timed._timed = True
+        return async_timed
+
+    @functools.wraps(endpoint)
+    def timed(*args, **kwargs):
+        with timed_phase("handler"):
+            return endpoint(*args, **kwargs)
+    timed._timed = True
+    return timed
+
+
+def render_query_stats(query_stats: Dict[str, Dict[str, Any]]) -> List[str]:
+    lines = [
+        "# HELP db_query_calls_total Executions of each registered query.",
+        "# TYPE db_query_calls_total counter",
+    ]
+    lines += [f'db_query_calls_total{{query="{escape_label(name)}"}} {s["calls"]}' for name, s in sorted(query_stats.items())]
+    lines += [
+        "# HELP db_query_errors_total Failed executions of each registered query.",
+        "# TYPE db_query_errors_total counter",
+    ]
+    lines += [f'db_query_errors_total{{query="{escape_label(name)}"}} {s["errors"]}' for name, s in sorted(query_stats.items())]
+    lines += [
+        "# HELP db_query_seconds_total Time spent executing each registered query.",
+        "# TYPE db_query_seconds_total counter",
+    ]
+    lines += [
+        f'db_query_seconds_total{{query="{escape_label(name)}"}} {s["total_ms"] / 1000.0:.6f}'
+        for name, s in sorted(query_stats.items())
+    ]
+    return lines
+
+
+# psycopg_pool get_stats() key -> (metric, type, help)
+POOL_METRICS = (
+    ("pool_size", "db_pool_connections", "gauge", "Connections currently open (in use + idle)."),
+    ("pool_available", "db_pool_connections_idle", "gauge", "Idle connections ready to be handed out."),
+    ("pool_max", "db_pool_connections_max", "gauge", "Configured maximum pool size."),
+    ("requests_waiting", "db_pool_requests_waiting", "gauge", "Callers currently waiting for a connection."),
+    ("requests_num", "db_pool_requests_total", "counter", "Connection requests served by the pool."),
+    ("requests_wait_ms", "db_pool_requests_wait_ms_total", "counter", "Time callers spent waiting for a connection."),
+    ("connections_num", "db_pool_connects_total", "counter", "Connection attempts made by the pool."),
+)
+
+
+def render_pool_stats(pool_stats: Dict[str, Dict[str, int]]) -> List[str]:
+    lines = list()
+    for key, metric, metric_type, help_text in POOL_METRICS:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {metric_type}"]
+        for name, stats in sorted(pool_stats.items()):
+            # psycopg_pool leaves out counters that are still zero
+            lines.append(f'{metric}{{pool="{escape_label(name)}"}} {stats.get(key, 0)}')
+    return lines
+
+
+def render_metrics(query_stats: Dict[str, Dict[str, Any]], pool_stats: Dict[str, Dict[str, int]]) -> str:
+    lines = list()
+    lines += request_duration.render()
+    lines += phase_duration.render()
+    lines += ingest_metrics.render()
+    lines += render_query_stats(query_stats)
+    lines += render_pool_stats(pool_stats)
+    return "\n".join(lines) + "\n"
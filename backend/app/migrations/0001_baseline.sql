@@ -1,3 +1,4 @@
+-- the schema databases had before versioned migrations; IF NOT EXISTS lets those adopt it as-is
 CREATE TABLE IF NOT EXISTS sellers (
     id SERIAL PRIMARY KEY,
     username TEXT NOT NULL UNIQUE,
@@ -40,4 +41,4 @@ CREATE INDEX IF NOT EXISTS idx_orders_seller_sold_at
     ON orders (seller_id, sold_at);
 
 CREATE INDEX IF NOT EXISTS idx_orders_listing_id
-    ON orders (listing_id);
\ No newline at end of file
+    ON orders (listing_id);
@@ -0,0 +1,98 @@
+ALTER TABLE sellers ADD COLUMN data_version BIGINT NOT NULL DEFAULT 0;
+
+ALTER TABLE listings ADD COLUMN first_sold_at TIMESTAMPTZ;
+
+-- existing orders get their keys from backfill_order_keys after this runs
+ALTER TABLE orders ADD COLUMN order_key TEXT;
+
+-- active (never sold) listings; small next to the full listings index
+CREATE INDEX idx_listings_seller_unsold
+    ON listings (seller_id) WHERE first_sold_at IS NULL;
+
+-- the partitioned layout (DB_PARTITION_ORDERS=1) replaces this with a version that includes sold_at
+CREATE UNIQUE INDEX orders_seller_order_key_uidx
+    ON orders (seller_id, order_key);
+
+CREATE TABLE seller_totals (
+    seller_id INTEGER PRIMARY KEY REFERENCES sellers(id) ON DELETE CASCADE,
+    listed_count INTEGER NOT NULL DEFAULT 0,
+    active_listings INTEGER NOT NULL DEFAULT 0,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    gmv_cents BIGINT NOT NULL DEFAULT 0,
+    total_fees_cents BIGINT NOT NULL DEFAULT 0,
+    refunded_cents BIGINT NOT NULL DEFAULT 0,
+    fees_refunded_cents BIGINT NOT NULL DEFAULT 0,
+    days_to_sell_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE seller_monthly_sales (
+    seller_id INTEGER NOT NULL REFERENCES sellers(id) ON DELETE CASCADE,
+    month TEXT NOT NULL,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue_cents BIGINT NOT NULL DEFAULT 0,
+    total_fees_cents BIGINT NOT NULL DEFAULT 0,
+    refunded_cents BIGINT NOT NULL DEFAULT 0,
+    fees_refunded_cents BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (seller_id, month)
+);
+
+CREATE TABLE seller_category_sales (
+    seller_id INTEGER NOT NULL REFERENCES sellers(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue_cents BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (seller_id, category)
+);
+
+CREATE TABLE ingest_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    seller_username TEXT NOT NULL,
+    replace BOOLEAN NOT NULL DEFAULT FALSE,
+    include_summary BOOLEAN NOT NULL DEFAULT FALSE,
+    status TEXT NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    payload_bytes BIGINT NOT NULL DEFAULT 0,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    rows_skipped INTEGER NOT NULL DEFAULT 0,
+    seller_id INTEGER REFERENCES sellers(id) ON DELETE CASCADE,
+    listings_inserted INTEGER,
+    listings_updated INTEGER,
+    listings_deleted INTEGER,
+    orders_inserted INTEGER,
+    orders_updated INTEGER,
+    orders_deleted INTEGER,
+    orders_duplicate INTEGER,
+    data_version BIGINT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE TABLE ingest_job_chunks (
+    job_id BIGINT NOT NULL REFERENCES ingest_jobs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    data BYTEA NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+
+CREATE INDEX idx_ingest_jobs_queued
+    ON ingest_jobs (id) WHERE status = 'queued';
+
+CREATE INDEX idx_ingest_jobs_seller_open
+    ON ingest_jobs (seller_username, id) WHERE status IN ('queued', 'running');
+
+CREATE TABLE bulk_imports (
+    seller_username TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    files INTEGER NOT NULL,
+    rows_loaded INTEGER NOT NULL,
+    rows_skipped INTEGER NOT NULL,
+    orders_inserted INTEGER NOT NULL,
+    imported_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (seller_username, fingerprint)
+);
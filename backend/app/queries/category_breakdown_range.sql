@@ -0,0 +1,12 @@
+SELECT
+  l.category,
+  COUNT(*)::int AS units_sold,
+  SUM(o.sold_price_cents) AS revenue_cents
+FROM orders o
+JOIN listings l
+  ON l.id = o.listing_id
+WHERE o.seller_id = %(seller_id)s
+  AND o.sold_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+  AND o.sold_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+GROUP BY l.category
+ORDER BY revenue_cents DESC;
@@ -0,0 +1,18 @@
+SELECT
+    l.id AS listing_id,
+    l.title,
+    l.category,
+    l.list_price_cents,
+    l.listed_at,
+    l.first_sold_at
+FROM listings l
+WHERE l.seller_id = %(seller_id)s
+  AND l.listed_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+  AND l.listed_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+  AND (l.listed_at, l.id) < (
+      COALESCE(%(after_at)s::timestamptz, 'infinity'),
+      COALESCE(%(after_id)s::int, 2147483647)
+  )
+  AND (%(category)s::text IS NULL OR l.category = %(category)s::text)
+ORDER BY l.listed_at DESC, l.id DESC
+LIMIT %(limit)s;
@@ -0,0 +1,23 @@
+SELECT
+    o.id AS order_id,
+    o.listing_id,
+    l.title,
+    l.category,
+    o.sold_at,
+    o.sold_price_cents,
+    o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents AS total_fees_cents,
+    o.refunded_cents,
+    o.fees_refunded_cents
+FROM orders o
+JOIN listings l
+    ON l.id = o.listing_id
+WHERE o.seller_id = %(seller_id)s
+  AND o.sold_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+  AND o.sold_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+  AND (o.sold_at, o.id) < (
+      COALESCE(%(after_at)s::timestamptz, 'infinity'),
+      COALESCE(%(after_id)s::int, 2147483647)
+  )
+  AND (%(category)s::text IS NULL OR l.category = %(category)s::text)
+ORDER BY o.sold_at DESC, o.id DESC
+LIMIT %(limit)s;
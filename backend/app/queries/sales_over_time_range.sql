@@ -0,0 +1,45 @@
+WITH filtered AS (
+  SELECT
+    date_trunc(%(granularity)s::text, o.sold_at) AS bucket,
+    o.sold_at,
+    o.sold_price_cents,
+    (o.sold_price_cents - o.depop_fee_cents - o.payment_fee_cents - o.boosting_fee_cents
+      - o.shipping_cost_cents - o.refunded_cents + o.fees_refunded_cents) AS profit_cents
+  FROM orders o
+  WHERE o.seller_id = %(seller_id)s
+    AND o.sold_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+    AND o.sold_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+),
+totals AS (
+  SELECT
+    f.bucket,
+    COUNT(*)::int AS units_sold,
+    SUM(f.sold_price_cents) AS revenue_cents,
+    SUM(f.profit_cents) AS profit_cents
+  FROM filtered f
+  GROUP BY f.bucket
+),
+buckets AS (
+  -- every bucket in the requested range (or between the first and last sale), including empty ones;
+  -- capped at max_buckets so an open range over decades is rejected instead of built
+  SELECT s.bucket
+  FROM generate_series(
+    date_trunc(%(granularity)s::text, COALESCE(%(start_at)s::timestamptz, (SELECT MIN(f.sold_at) FROM filtered f))),
+    COALESCE(%(end_at)s::timestamptz - INTERVAL '1 microsecond', (SELECT MAX(f.sold_at) FROM filtered f)),
+    ('1 ' || %(granularity)s::text)::interval
+  ) AS s(bucket)
+  LIMIT %(max_buckets)s
+)
+SELECT
+  CASE
+    WHEN %(granularity)s::text = 'month' THEN TO_CHAR(b.bucket, 'YYYY-MM')
+    ELSE TO_CHAR(b.bucket, 'YYYY-MM-DD')
+  END AS period,
+  TO_CHAR(b.bucket, 'YYYY-MM') AS month,
+  COALESCE(t.units_sold, 0) AS units_sold,
+  COALESCE(t.revenue_cents, 0) AS revenue_cents,
+  COALESCE(t.profit_cents, 0) AS profit_cents
+FROM buckets b
+LEFT JOIN totals t
+  ON t.bucket = b.bucket
+ORDER BY b.bucket;
@@ -0,0 +1,136 @@
+-- the orders-backed dashboard (a from/to range or a finer granularity) in one scan of the seller's
+-- orders: GROUPING SETS give the summary, the per-bucket series, the categories and the top items.
+WITH
+sold AS (
+  SELECT
+    o.listing_id,
+    l.title,
+    l.category,
+    date_trunc(%(granularity)s::text, o.sold_at) AS bucket,
+    o.sold_at,
+    o.sold_price_cents,
+    (o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents) AS fees_cents,
+    o.refunded_cents,
+    o.fees_refunded_cents,
+    EXTRACT(EPOCH FROM (o.sold_at - l.listed_at)) / 86400.0 AS days_to_sell
+  FROM orders o
+  JOIN listings l
+    ON l.id = o.listing_id
+  WHERE o.seller_id = %(seller_id)s
+    AND o.sold_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+    AND o.sold_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+),
+-- grp: 7 = seller totals, 3 = per bucket, 5 = per category, 4 = per listing
+grouped AS (
+  SELECT
+    GROUPING(bucket, category, listing_id) AS grp,
+    bucket,
+    category,
+    listing_id,
+    title,
+    COUNT(*)::int AS units_sold,
+    COALESCE(SUM(sold_price_cents), 0) AS revenue_cents,
+    COALESCE(SUM(fees_cents), 0) AS total_fees_cents,
+    COALESCE(SUM(sold_price_cents - fees_cents - refunded_cents + fees_refunded_cents), 0) AS profit_cents,
+    SUM(days_to_sell) AS days_to_sell_sum,
+    MIN(sold_at) AS first_sold_at,
+    MAX(sold_at) AS last_sold_at
+  FROM sold
+  GROUP BY GROUPING SETS ((), (bucket), (category), (listing_id, title, category))
+),
+totals AS (
+  SELECT * FROM grouped WHERE grp = 7
+),
+buckets AS (
+  -- same gap-filled, capped series as sales_over_time_range.sql
+  SELECT s.bucket
+  FROM generate_series(
+    date_trunc(%(granularity)s::text, COALESCE(%(start_at)s::timestamptz, (SELECT t.first_sold_at FROM totals t))),
+    COALESCE(%(end_at)s::timestamptz - INTERVAL '1 microsecond', (SELECT t.last_sold_at FROM totals t)),
+    ('1 ' || %(granularity)s::text)::interval
+  ) AS s(bucket)
+  LIMIT %(max_buckets)s
+),
+ranked AS (
+  SELECT
+    g.*,
+    ROW_NUMBER() OVER (PARTITION BY g.grp ORDER BY g.revenue_cents DESC, g.listing_id) AS item_rank
+  FROM grouped g
+  WHERE g.grp IN (4, 5)
+),
+listed AS (
+  SELECT
+    COUNT(*)::int AS listed_count,
+    COUNT(*) FILTER (WHERE l.first_sold_at IS NULL)::int AS active_listings
+  FROM listings l
+  WHERE l.seller_id = %(seller_id)s
+    AND l.listed_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+    AND l.listed_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+)
+SELECT
+  7 AS grp,
+  NULL::timestamptz AS bucket,
+  NULL::text AS period,
+  NULL::text AS month,
+  NULL::text AS category,
+  NULL::int AS listing_id,
+  NULL::text AS title,
+  t.units_sold,
+  t.revenue_cents AS gmv_cents,
+  t.revenue_cents,
+  t.profit_cents,
+  t.total_fees_cents,
+  (t.revenue_cents::float / NULLIF(t.units_sold, 0)) AS avg_sale_price_cents,
+  (t.days_to_sell_sum / NULLIF(t.units_sold, 0)) AS avg_days_to_sell,
+  listed.listed_count,
+  listed.active_listings,
+  0::bigint AS item_rank
+FROM totals t, listed
+UNION ALL
+SELECT
+  3,
+  b.bucket,
+  CASE
+    WHEN %(granularity)s::text = 'month' THEN TO_CHAR(b.bucket, 'YYYY-MM')
+    ELSE TO_CHAR(b.bucket, 'YYYY-MM-DD')
+  END,
+  TO_CHAR(b.bucket, 'YYYY-MM'),
+  NULL,
+  NULL,
+  NULL,
+  COALESCE(g.units_sold, 0),
+  NULL,
+  COALESCE(g.revenue_cents, 0),
+  COALESCE(g.profit_cents, 0),
+  NULL,
+  NULL,
+  NULL,
+  NULL,
+  NULL,
+  0
+FROM buckets b
+LEFT JOIN grouped g
+  ON g.grp = 3
+ AND g.bucket = b.bucket
+UNION ALL
+SELECT
+  r.grp,
+  NULL,
+  NULL,
+  NULL,
+  r.category,
+  r.listing_id,
+  r.title,
+  r.units_sold,
+  NULL,
+  r.revenue_cents,
+  r.profit_cents,
+  NULL,
+  NULL,
+  NULL,
+  NULL,
+  NULL,
+  r.item_rank
+FROM ranked r
+WHERE r.grp = 5 OR r.item_rank <= %(limit)s
+ORDER BY grp, bucket, item_rank;
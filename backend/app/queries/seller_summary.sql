@@ -1,37 +1,14 @@
-WITH
-listed AS (
-  SELECT COUNT(*)::int AS listed_count
-  FROM listings
-  WHERE seller_id = %(seller_id)s
-),
-sold AS (
-  SELECT
-    COUNT(*)::int AS units_sold,
-    COALESCE(SUM(o.sold_price_cents), 0)::int AS gmv_cents,
-    COALESCE(SUM(o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents), 0)::int AS total_fees_cents,
-    COALESCE(SUM(o.refunded_cents), 0)::int AS total_refunded_cents,
-    COALESCE(SUM(o.fees_refunded_cents), 0)::int AS total_fees_refunded_cents,
-    AVG(o.sold_price_cents)::float AS avg_sale_price_cents,
-    AVG(EXTRACT(EPOCH FROM (o.sold_at - l.listed_at)) / 86400.0)::float AS avg_days_to_sell
-  FROM orders o
-  JOIN listings l ON l.id = o.listing_id
-  WHERE o.seller_id = %(seller_id)s
-),
-active AS (
-  SELECT COUNT(*)::int AS active_listings
-  FROM listings l
-  LEFT JOIN orders o ON o.listing_id = l.id
-  WHERE l.seller_id = %(seller_id)s
-    AND o.id IS NULL
-)
 SELECT
   %(seller_id)s::int AS seller_id,
-  listed.listed_count,
-  sold.units_sold,
-  sold.gmv_cents,
-  (sold.gmv_cents - sold.total_fees_cents - sold.total_refunded_cents + sold.total_fees_refunded_cents)::int AS profit_cents,
-  sold.total_fees_cents,
-  sold.avg_sale_price_cents,
-  sold.avg_days_to_sell,
-  active.active_listings
-FROM listed, sold, active;
+  t.listed_count,
+  t.units_sold,
+  t.gmv_cents,
+  (t.gmv_cents - t.total_fees_cents - t.refunded_cents + t.fees_refunded_cents) AS profit_cents,
+  t.total_fees_cents,
+  (t.gmv_cents::float / NULLIF(t.units_sold, 0)) AS avg_sale_price_cents,
+  (t.days_to_sell_sum / NULLIF(t.units_sold, 0)) AS avg_days_to_sell,
+  t.active_listings
+-- always one row: a seller without a totals row yet (e.g. every uploaded row was skipped) gets zeros
+FROM (SELECT 1) AS one
+LEFT JOIN seller_totals t
+  ON t.seller_id = %(seller_id)s;
@@ -0,0 +1,35 @@
+WITH sold AS (
+  SELECT
+    COUNT(*)::int AS units_sold,
+    COALESCE(SUM(o.sold_price_cents), 0) AS gmv_cents,
+    COALESCE(SUM(o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents), 0) AS total_fees_cents,
+    COALESCE(SUM(o.refunded_cents), 0) AS refunded_cents,
+    COALESCE(SUM(o.fees_refunded_cents), 0) AS fees_refunded_cents,
+    SUM(EXTRACT(EPOCH FROM (o.sold_at - l.listed_at)) / 86400.0) AS days_to_sell_sum
+  FROM orders o
+  JOIN listings l
+    ON l.id = o.listing_id
+  WHERE o.seller_id = %(seller_id)s
+    AND o.sold_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+    AND o.sold_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+),
+listed AS (
+  SELECT
+    COUNT(*)::int AS listed_count,
+    COUNT(*) FILTER (WHERE l.first_sold_at IS NULL)::int AS active_listings
+  FROM listings l
+  WHERE l.seller_id = %(seller_id)s
+    AND l.listed_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+    AND l.listed_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
+)
+SELECT
+  %(seller_id)s::int AS seller_id,
+  listed.listed_count,
+  sold.units_sold,
+  sold.gmv_cents,
+  (sold.gmv_cents - sold.total_fees_cents - sold.refunded_cents + sold.fees_refunded_cents) AS profit_cents,
+  sold.total_fees_cents,
+  (sold.gmv_cents::float / NULLIF(sold.units_sold, 0)) AS avg_sale_price_cents,
+  (sold.days_to_sell_sum / NULLIF(sold.units_sold, 0)) AS avg_days_to_sell,
+  listed.active_listings
+FROM sold, listed;
@@ -8,6 +8,8 @@ FROM orders o
 JOIN listings l
     ON l.id = o.listing_id
 WHERE o.seller_id = %(seller_id)s
+  AND o.sold_at >= COALESCE(%(start_at)s::timestamptz, '-infinity')
+  AND o.sold_at < COALESCE(%(end_at)s::timestamptz, 'infinity')
 GROUP BY l.id, l.title, l.category
 ORDER BY revenue_cents DESC
-LIMIT %(limit)s;
\ No newline at end of file
+LIMIT %(limit)s;
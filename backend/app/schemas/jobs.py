@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.seller import SellerSummary
+
+
+class IngestJobAccepted(BaseModel):
+    job_id: int
+    status: str
+    status_url: str
+
+
+class IngestJob(BaseModel):
+    job_id: int
+    seller_username: str
+    status: str
+    replace: bool
+
+    payload_bytes: int
+    rows_processed: int
+    rows_skipped: int
+    rows_per_second: float
+
+    seller_id: Optional[int] = None
+    listings_inserted: Optional[int] = None
+    listings_updated: Optional[int] = None
+    listings_deleted: Optional[int] = None
+    orders_inserted: Optional[int] = None
+    orders_updated: Optional[int] = None
+    orders_deleted: Optional[int] = None
+    orders_duplicate: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int
+
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    summary: Optional[SellerSummary] = None
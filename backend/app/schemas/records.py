@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class OrderRecord(BaseModel):
+    order_id: int
+    listing_id: int
+    title: str
+    category: str
+    sold_at: datetime
+    sold_price_cents: int
+    total_fees_cents: int
+    refunded_cents: int
+    fees_refunded_cents: int
+
+
+class ListingRecord(BaseModel):
+    listing_id: int
+    title: str
+    category: str
+    list_price_cents: int
+    listed_at: datetime
+    first_sold_at: Optional[datetime] = None
+    sold: bool
+
+
+class OrderPage(BaseModel):
+    items: list[OrderRecord]
+    next_cursor: Optional[str] = None
+
+
+class ListingPage(BaseModel):
+    items: list[ListingRecord]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from app.schemas.items import TopItem
+
 
 class SellerSummary(BaseModel):
     seller_id: int
@@ -19,6 +21,8 @@ class SellerSummary(BaseModel):
 
 class MonthlySales(BaseModel):
     month: str
+    # bucket label: YYYY-MM for month granularity, the bucket's first day (YYYY-MM-DD) for day/week
+    period: str
     revenue_cents: int
     profit_cents: int
     units_sold: int
@@ -28,3 +32,10 @@ class CategoryBreakdown(BaseModel):
     category: str
     revenue_cents: int
     units_sold: int
+
+
+class SellerDashboard(BaseModel):
+    summary: SellerSummary
+    sales_over_time: list[MonthlySales]
+    category_breakdown: list[CategoryBreakdown]
+    top_items: list[TopItem]
@@ -1,65 +1,90 @@
-from app.db.connection import get_db_conn
+from typing import Optional
+
+from app.db.connection import db_conn
+from app.db.queries import run_query
 from app.schemas.seller import SellerSummary, MonthlySales, CategoryBreakdown
 from app.schemas.items import TopItem
 
 
-def load_sql_file(path: str) -> str:
-    with open(path, "r") as f:
-        return f.read()
+def build_seller_summary(seller_id: int, row: Optional[dict]) -> SellerSummary:
+    if row is None:
+        row = dict()
+    listed_count = int(row.get("listed_count") or 0)
+    units_sold = int(row.get("units_sold") or 0)
+    gmv_cents = int(row.get("gmv_cents") or 0)
+    profit_cents = int(row.get("profit_cents") or 0)
+    total_fees_cents = int(row.get("total_fees_cents") or 0)
+
+    avg_sale_price_cents_float = row.get("avg_sale_price_cents")
+    if avg_sale_price_cents_float is None:
+        avg_sale_price_cents = 0
+    else:
+        avg_sale_price_cents = int(round(float(avg_sale_price_cents_float)))
+
+    avg_days_to_sell_float = row.get("avg_days_to_sell")
+    if avg_days_to_sell_float is None:
+        avg_days_to_sell = 0.0
+    else:
+        avg_days_to_sell = float(avg_days_to_sell_float)
+
+    active_listings = int(row.get("active_listings") or 0)
+
+    if listed_count == 0:
+        sell_through_rate = 0.0
+    else:
+        sell_through_rate = units_sold / listed_count
+
+    summary = SellerSummary(
+        seller_id=seller_id,
+        gmv_cents=gmv_cents,
+        profit_cents=profit_cents,
+        total_fees_cents=total_fees_cents,
+        units_sold=units_sold,
+        avg_sale_price_cents=avg_sale_price_cents,
+        listed_count=listed_count,
+        sell_through_rate=sell_through_rate,
+        avg_days_to_sell=avg_days_to_sell,
+        active_listings=active_listings,
+    )
+    return summary
+
+
+def build_top_item(row: dict) -> TopItem:
+    return TopItem(
+        listing_id=int(row.get("listing_id")),
+        title=str(row.get("title") or ""),
+        category=str(row.get("category") or ""),
+        units_sold=int(row.get("units_sold") or 0),
+        revenue_cents=int(row.get("revenue_cents") or 0),
+    )
+
+
+def build_monthly_sales(row: dict) -> MonthlySales:
+    return MonthlySales(
+        month=str(row.get("month")),
+        period=str(row.get("period") or row.get("month")),
+        revenue_cents=int(row.get("revenue_cents") or 0),
+        profit_cents=int(row.get("profit_cents") or 0),
+        units_sold=int(row.get("units_sold") or 0),
+    )
+
+
+def build_category_breakdown(row: dict) -> CategoryBreakdown:
+    return CategoryBreakdown(
+        category=str(row.get("category") or "Unknown"),
+        revenue_cents=int(row.get("revenue_cents") or 0),
+        units_sold=int(row.get("units_sold") or 0),
+    )
 
 
 def get_seller_summary(seller_id: int) -> SellerSummary:
-    sql = load_sql_file("app/queries/seller_summary.sql")
-
-    conn = None
-    try:
-        conn = get_db_conn()
+    with db_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, {"seller_id": seller_id})
+            run_query(cur, "seller_summary", {"seller_id": seller_id})
             row = cur.fetchone()
 
-        listed_count = int(row.get("listed_count") or 0)
-        units_sold = int(row.get("units_sold") or 0)
-        gmv_cents = int(row.get("gmv_cents") or 0)
-        profit_cents = int(row.get("profit_cents") or 0)
-        total_fees_cents = int(row.get("total_fees_cents") or 0)
-
-        avg_sale_price_cents_float = row.get("avg_sale_price_cents")
-        if avg_sale_price_cents_float is None:
-            avg_sale_price_cents = 0
-        else:
-            avg_sale_price_cents = int(round(float(avg_sale_price_cents_float)))
-
-        avg_days_to_sell_float = row.get("avg_days_to_sell")
-        if avg_days_to_sell_float is None:
-            avg_days_to_sell = 0.0
-        else:
-            avg_days_to_sell = float(avg_days_to_sell_float)
-
-        active_listings = int(row.get("active_listings") or 0)
-
-        if listed_count == 0:
-            sell_through_rate = 0.0
-        else:
-            sell_through_rate = units_sold / listed_count
-
-        summary = SellerSummary(
-            seller_id=seller_id,
-            gmv_cents=gmv_cents,
-            profit_cents=profit_cents,
-            total_fees_cents=total_fees_cents,
-            units_sold=units_sold,
-            avg_sale_price_cents=avg_sale_price_cents,
-            listed_count=listed_count,
-            sell_through_rate=sell_through_rate,
-            avg_days_to_sell=avg_days_to_sell,
-            active_listings=active_listings,
-        )
-        return summary
-
-    finally:
-        if conn is not None:
-            conn.close()
+    return build_seller_summary(seller_id, row)
+
 
 def get_top_items(seller_id: int, limit: int) -> list[TopItem]:
     if limit < 1:
@@ -67,83 +92,38 @@ def get_top_items(seller_id: int, limit: int) -> list[TopItem]:
     elif limit > 50:
         limit = 50
 
-    sql = load_sql_file("app/queries/top_items.sql")
-
-    conn = None
-    try:
-        conn = get_db_conn()
+    with db_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, {"seller_id": seller_id, "limit": limit})
+            run_query(cur, "top_items", {"seller_id": seller_id, "limit": limit, "start_at": None, "end_at": None})
             rows = cur.fetchall()
 
-        items = list()
-        for row in rows:
-            listing_id = int(row.get("listing_id"))
-            title = str(row.get("title") or "")
-            category = str(row.get("category") or "")
-            units_sold = int(row.get("units_sold") or 0)
-            revenue_cents = int(row.get("revenue_cents") or 0)
-
-            item = TopItem(
-                listing_id=listing_id,
-                title=title,
-                category=category,
-                units_sold=units_sold,
-                revenue_cents=revenue_cents,
-            )
-            items.append(item)
+    items = list()
+    for row in rows:
+        items.append(build_top_item(row))
 
-        return items
-
-    finally:
-        if conn is not None:
-            conn.close()
+    return items
 
 
 def get_sales_over_time(seller_id: int) -> list[MonthlySales]:
-    sql = load_sql_file("app/queries/sales_over_time.sql")
-
-    conn = None
-    try:
-        conn = get_db_conn()
+    with db_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, {"seller_id": seller_id})
+            run_query(cur, "sales_over_time", {"seller_id": seller_id})
             rows = cur.fetchall()
 
-        results = []
-        for row in rows:
-            results.append(MonthlySales(
-                month=str(row.get("month")),
-                revenue_cents=int(row.get("revenue_cents") or 0),
-                profit_cents=int(row.get("profit_cents") or 0),
-                units_sold=int(row.get("units_sold") or 0),
-            ))
-        return results
-
-    finally:
-        if conn is not None:
-            conn.close()
+    results = []
+    for row in rows:
+        results.append(build_monthly_sales(row))
+    return results
 
 
 def get_category_breakdown(seller_id: int) -> list[CategoryBreakdown]:
-    sql = load_sql_file("app/queries/category_breakdown.sql")
-
-    conn = None
-    try:
-        conn = get_db_conn()
+    with db_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, {"seller_id": seller_id})
+            run_query(cur, "category_breakdown", {"seller_id": seller_id})
             rows = cur.fetchall()
 
-        results = []
-        for row in rows:
-            results.append(CategoryBreakdown(
-                category=str(row.get("category") or "Unknown"),
-                revenue_cents=int(row.get("revenue_cents") or 0),
-                units_sold=int(row.get("units_sold") or 0),
-            ))
-        return results
-
-    finally:
-        if conn is not None:
-            conn.close()
+    results = []
+    for row in rows:
+        results.append(build_category_breakdown(row))
+    return results
+
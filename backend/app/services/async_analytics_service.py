@@ -0,0 +1,198 @@
+import asyncio
+from datetime import date
+from typing import Optional
+
+from app.db.connection import async_db_conn
+from app.db.queries import run_query_async
+from app.schemas.seller import SellerSummary, MonthlySales, CategoryBreakdown, SellerDashboard
+from app.schemas.items import TopItem
+from app.services.analytics_service import (
+    build_seller_summary,
+    build_top_item,
+    build_monthly_sales,
+    build_category_breakdown,
+)
+from app.services.cache_service import seller_cached
+from app.services.date_range import (
+    GRANULARITIES,
+    MAX_BUCKETS,
+    check_bucket_count,
+    make_day_range,
+    raise_too_many_buckets,
+)
+
+
+async def fetch_all(query_name: str, params: dict) -> list[dict]:
+    async with async_db_conn() as conn:
+        async with conn.cursor() as cur:
+            await run_query_async(cur, query_name, params)
+            return await cur.fetchall()
+
+
+def is_all_time_monthly(date_from: Optional[date], date_to: Optional[date], granularity: str) -> bool:
+    # the default view is served from the rollup tables; anything narrower reads orders by sold_at range
+    return date_from is None and date_to is None and granularity == "month"
+
+
+def make_range_params(seller_id: int, date_from: Optional[date], date_to: Optional[date]) -> dict:
+    start_at, end_at = make_day_range(date_from, date_to)
+    return {"seller_id": seller_id, "start_at": start_at, "end_at": end_at}
+
+
+def clamp_top_items_limit(limit: int) -> int:
+    if limit < 1:
+        return 1
+    if limit > 50:
+        return 50
+    return limit
+
+
+@seller_cached("summary", SellerSummary)
+async def get_seller_summary(
+    seller_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> SellerSummary:
+    if date_from is None and date_to is None:
+        rows = await fetch_all("seller_summary", {"seller_id": seller_id})
+    else:
+        rows = await fetch_all("seller_summary_range", make_range_params(seller_id, date_from, date_to))
+
+    return build_seller_summary(seller_id, rows[0] if len(rows) > 0 else None)
+
+
+@seller_cached("top_items", list[TopItem])
+async def get_top_items(
+    seller_id: int,
+    limit: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> list[TopItem]:
+    params = make_range_params(seller_id, date_from, date_to)
+    params["limit"] = clamp_top_items_limit(limit)
+    rows = await fetch_all("top_items", params)
+    return [build_top_item(row) for row in rows]
+
+
+@seller_cached("sales_over_time", list[MonthlySales])
+async def get_sales_over_time(
+    seller_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    granularity: str = "month",
+) -> list[MonthlySales]:
+    """
+    gap-filled buckets (empty ones have zeros) when a range or a finer granularity is asked for.
+    raises ValueError past MAX_BUCKETS buckets.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError("granularity must be one of: " + ", ".join(GRANULARITIES))
+
+    if is_all_time_monthly(date_from, date_to, granularity):
+        rows = await fetch_all("sales_over_time", {"seller_id": seller_id})
+    else:
+        check_bucket_count(date_from, date_to, granularity)
+        params = make_range_params(seller_id, date_from, date_to)
+        params["granularity"] = granularity
+        # one past the cap, so an open range that runs over it is detected without building it all
+        params["max_buckets"] = MAX_BUCKETS[granularity] + 1
+        rows = await fetch_all("sales_over_time_range", params)
+        if len(rows) > MAX_BUCKETS[granularity]:
+            raise_too_many_buckets(granularity)
+    return [build_monthly_sales(row) for row in rows]
+
+
+@seller_cached("category_breakdown", list[CategoryBreakdown])
+async def get_category_breakdown(
+    seller_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> list[CategoryBreakdown]:
+    if date_from is None and date_to is None:
+        rows = await fetch_all("category_breakdown", {"seller_id": seller_id})
+    else:
+        rows = await fetch_all("category_breakdown_range", make_range_params(seller_id, date_from, date_to))
+    return [build_category_breakdown(row) for row in rows]
+
+
+@seller_cached("dashboard_range", SellerDashboard)
+async def get_seller_dashboard_range(
+    seller_id: int,
+    limit: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    granularity: str = "month",
+) -> SellerDashboard:
+    """
+    the orders-backed dashboard: one seller_dashboard_range query (a single scan of the range)
+    returns the summary, buckets, categories and top items, told apart by their grp column.
+    raises ValueError like get_sales_over_time.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError("granularity must be one of: " + ", ".join(GRANULARITIES))
+    check_bucket_count(date_from, date_to, granularity)
+
+    params = make_range_params(seller_id, date_from, date_to)
+    params["granularity"] = granularity
+    params["limit"] = clamp_top_items_limit(limit)
+    params["max_buckets"] = MAX_BUCKETS[granularity] + 1
+    rows = await fetch_all("seller_dashboard_range", params)
+
+    summary_row = None
+    sales_over_time = list()
+    category_breakdown = list()
+    top_items = list()
+    for row in rows:
+        if row["grp"] == 7:
+            summary_row = row
+        elif row["grp"] == 3:
+            sales_over_time.append(build_monthly_sales(row))
+        elif row["grp"] == 5:
+            category_breakdown.append(build_category_breakdown(row))
+        else:
+            top_items.append(build_top_item(row))
+
+    if len(sales_over_time) > MAX_BUCKETS[granularity]:
+        raise_too_many_buckets(granularity)
+
+    return SellerDashboard(
+        summary=build_seller_summary(seller_id, summary_row),
+        sales_over_time=sales_over_time,
+        category_breakdown=category_breakdown,
+        top_items=top_items,
+    )
+
+
+async def get_seller_dashboard(
+    seller_id: int,
+    limit: int = 10,
+    data_version: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    granularity: str = "month",
+) -> SellerDashboard:
+    """
+    the all-time monthly view reads the rollup tables, so its parts run concurrently, each on its
+    own pooled connection (top items is the only one that reads orders). a range or a finer
+    granularity has no rollup to read and goes through get_seller_dashboard_range in one query.
+    cached parts (see seller_cached) are served without touching the db.
+    """
+    if not is_all_time_monthly(date_from, date_to, granularity):
+        return await get_seller_dashboard_range(
+            seller_id, limit, date_from=date_from, date_to=date_to, granularity=granularity,
+            data_version=data_version,
+        )
+
+    summary, sales_over_time, category_breakdown, top_items = await asyncio.gather(
+        get_seller_summary(seller_id, data_version=data_version),
+        get_sales_over_time(seller_id, data_version=data_version),
+        get_category_breakdown(seller_id, data_version=data_version),
+        get_top_items(seller_id, limit, data_version=data_version),
+    )
+
+    return SellerDashboard(
+        summary=summary,
+        sales_over_time=sales_over_time,
+        category_breakdown=category_breakdown,
+        top_items=top_items,
+    )
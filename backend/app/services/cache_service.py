@@ -0,0 +1,138 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from pydantic import TypeAdapter
+
+CACHE_ENABLED = os.environ.get("ANALYTICS_CACHE_ENABLED", "1") != "0"
+CACHE_TTL_SECONDS = float(os.environ.get("ANALYTICS_CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.environ.get("ANALYTICS_CACHE_MAX_ENTRIES", "1024"))
+REDIS_URL = os.environ.get("REDIS_URL")
+
+
+class LruCache:
+    """
+    in-process LRU with a per-entry TTL. values are stored as json-ready python objects.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """
+    shared cache for multiple api replicas. works with any redis-protocol server.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float) -> None:
+        import redis.asyncio as redis_asyncio
+
+        self.ttl_seconds = ttl_seconds
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self._client.get(key)
+        except Exception as e:
+            # cache outages degrade to a miss instead of failing the request
+            print(f"WARNING: redis cache get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self._client.set(key, json.dumps(value), ex=max(1, int(self.ttl_seconds)))
+        except Exception as e:
+            print(f"WARNING: redis cache set failed: {e}")
+
+
+def create_cache_backend():
+    if REDIS_URL:
+        try:
+            return RedisCache(REDIS_URL, CACHE_TTL_SECONDS)
+        except ImportError:
+            print("WARNING: REDIS_URL is set but the redis package is not installed, using in-process cache")
+    return LruCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+cache_backend = create_cache_backend()
+
+
+def make_cache_key(kind: str, seller_id: int, data_version: int, arguments: dict) -> str:
+    """
+    arguments are every parameter after seller_id, by name with defaults filled in (see
+    seller_cached), so f(1, 10) and f(1, limit=10) share an entry.
+    """
+    parts = ["analytics", kind, str(seller_id), "v" + str(data_version)]
+    for name, value in arguments.items():
+        parts.append(name + "=" + str(value))
+    return ":".join(parts)
+
+
+def seller_cached(kind: str, return_type: Any):
+    """
+    this caches an async analytics function per (seller_id, data_version, args).
+    callers opt in by passing data_version=...; uploads bump the version so stale
+    entries are never read again and simply age out.
+    """
+    adapter = TypeAdapter(return_type)
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(seller_id: int, *args, data_version: Optional[int] = None, **kwargs):
+            if not CACHE_ENABLED or data_version is None:
+                return await fn(seller_id, *args, **kwargs)
+
+            bound = signature.bind(seller_id, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            del arguments["seller_id"]
+            key = make_cache_key(kind, seller_id, data_version, arguments)
+            hit = await cache_backend.get(key)
+            if hit is not None:
+                return adapter.validate_python(hit)
+
+            value = await fn(seller_id, *args, **kwargs)
+            await cache_backend.set(key, adapter.dump_python(value, mode="json"))
+            return value
+
+        return wrapper
+
+    return decorator
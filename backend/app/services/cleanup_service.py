@@ -1,11 +1,14 @@
 import psycopg
 
+from app.services.rollup_service import clear_seller_rollups
+
 
 def clear_seller_data(conn: psycopg.Connection, seller_id: int) -> None:
     """
     this deletes seller data so uploads can be replaced.
-    orders must be deleted before listings.
+    orders must be deleted before listings. rollup rows are reset with them.
     """
     with conn.cursor() as cur:
         cur.execute("DELETE FROM orders WHERE seller_id = %s;", (seller_id,))
         cur.execute("DELETE FROM listings WHERE seller_id = %s;", (seller_id,))
+    clear_seller_rollups(conn, seller_id)
@@ -0,0 +1,215 @@
+"""
+columnar parsing for the depop sales export.
+
+a batch of raw csv rows is split into column arrays, each column is factorized
+(pyarrow dictionary_encode, numpy unique, or a plain dict as fallback) and the scalar
+parsers from ingest_service run once per distinct value. exports repeat the same dates,
+prices and fee strings thousands of times, so most cells are never parsed individually,
+and because the scalar functions do the parsing the results are identical to row mode.
+"""
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+
+from app.services.ingest_service import (
+    fast_parse_clock,
+    format_title,
+    make_source_key_for_day,
+    parse_listing_date,
+    parse_money_to_cents,
+    parse_sale_datetime,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+
+
+def get_backend() -> str:
+    if pa is not None and np is not None:
+        return "pyarrow"
+    if np is not None:
+        return "numpy"
+    return "python"
+
+
+def factorize(values: Sequence[str]) -> tuple[list, Any]:
+    """
+    this returns (uniques, codes) with values[i] == uniques[codes[i]].
+    """
+    if pa is not None and np is not None:
+        encoded = pc.dictionary_encode(pa.array(values, type=pa.string()))
+        uniques = encoded.dictionary.to_pylist()
+        codes = encoded.indices.to_numpy(zero_copy_only=False)
+        return uniques, codes
+
+    if np is not None:
+        uniques, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+        return uniques.tolist(), codes
+
+    index = dict()
+    codes = list()
+    for value in values:
+        code = index.get(value)
+        if code is None:
+            code = len(index)
+            index[value] = code
+        codes.append(code)
+    return list(index.keys()), codes
+
+
+def map_unique(values: Sequence[str], fn: Callable[[str], Any], int64: bool = False) -> list:
+    """
+    this applies fn once per distinct value and broadcasts the results back to every row.
+    """
+    if len(values) == 0:
+        return []
+
+    uniques, codes = factorize(values)
+    parsed = [fn(value) for value in uniques]
+
+    if np is not None:
+        dtype = np.int64 if int64 else object
+        return np.asarray(parsed, dtype=dtype)[codes].tolist()
+
+    return [parsed[code] for code in codes]
+
+
+def parse_sale_time(time_str: str) -> datetime:
+    clock = fast_parse_clock(time_str.strip())
+    if clock is not None:
+        return datetime(1900, 1, 1, clock[0], clock[1])
+    return datetime.strptime(time_str.strip(), "%I:%M %p")
+
+
+def parse_sale_columns(dates: list[str], times: list[str]) -> list[datetime]:
+    """
+    sale date and time are factorized separately (sale times are close to unique per row,
+    sale days are not) and combined. cells that only parse as a combined string fall back
+    to parse_sale_datetime so the result always matches row mode.
+    """
+    def safe(fn: Callable[[str], datetime]) -> Callable[[str], Optional[datetime]]:
+        def wrapped(value: str) -> Optional[datetime]:
+            try:
+                return fn(value)
+            except ValueError:
+                return None
+        return wrapped
+
+    day_values = map_unique(dates, safe(parse_listing_date))
+    time_values = map_unique(times, safe(parse_sale_time))
+
+    sold_at = list()
+    for i in range(len(dates)):
+        day = day_values[i]
+        clock = time_values[i]
+        if day is None or clock is None:
+            sold_at.append(parse_sale_datetime(dates[i], times[i]))
+        else:
+            sold_at.append(day.replace(hour=clock.hour, minute=clock.minute))
+    return sold_at
+
+
+def get_column(header: list[str], rows: list[list[str]], name: str) -> list[Optional[str]]:
+    """
+    this mirrors csv.DictReader: a repeated header name maps to its last column,
+    and a row shorter than the header yields None for the missing cells.
+    """
+    index = None
+    for i, field in enumerate(header):
+        if field == name:
+            index = i
+
+    if index is None:
+        return [None] * len(rows)
+    return [row[index] if index < len(row) else None for row in rows]
+
+
+def parse_sales_columns(header: list[str], rows: list[list[str]]) -> tuple[list[tuple], int]:
+    """
+    columnar equivalent of calling parse_sales_row on every row.
+    this returns: (staging tuples without row_num, in input order; number of unusable rows skipped)
+    """
+    rows = [row for row in rows if row != []]
+
+    date_of_sale = get_column(header, rows, "Date of sale")
+    time_of_sale = get_column(header, rows, "Time of sale")
+    date_of_listing = get_column(header, rows, "Date of listing")
+    item_price = get_column(header, rows, "Item price")
+
+    usable = [
+        i for i in range(len(rows))
+        if date_of_sale[i] is not None
+        and time_of_sale[i] is not None
+        and date_of_listing[i] is not None
+        and item_price[i] is not None
+    ]
+    skipped = len(rows) - len(usable)
+    if skipped > 0:
+        rows = [rows[i] for i in usable]
+        date_of_sale = [date_of_sale[i] for i in usable]
+        time_of_sale = [time_of_sale[i] for i in usable]
+        date_of_listing = [date_of_listing[i] for i in usable]
+        item_price = [item_price[i] for i in usable]
+
+    def money_column(name: str) -> list[int]:
+        return map_unique([value or "" for value in get_column(header, rows, name)], parse_money_to_cents, int64=True)
+
+    sold_at = parse_sale_columns(date_of_sale, time_of_sale)
+    listed_at = map_unique(date_of_listing, parse_listing_date)
+    listed_day = map_unique(date_of_listing, lambda value: parse_listing_date(value).strftime("%Y-%m-%d"))
+
+    raw_category = get_column(header, rows, "Category")
+    category = map_unique([value or "" for value in raw_category], lambda value: (value or "Unknown").strip())
+    title = [
+        format_title(brand, cat, size, description)
+        for brand, cat, size, description in zip(
+            get_column(header, rows, "Brand"),
+            raw_category,
+            get_column(header, rows, "Size"),
+            get_column(header, rows, "Description"),
+        )
+    ]
+
+    list_price_cents = map_unique(item_price, parse_money_to_cents, int64=True)
+    depop_fee_cents = money_column("Depop fee")
+    payment_fee_cents = money_column("Depop Payments fee")
+    boosting_fee_cents = money_column("Boosting fee")
+    shipping_cost_cents = money_column("USPS Cost")
+    refunded_cents = money_column("Refunded to buyer amount")
+    fees_refunded_cents = money_column("Fees refunded to seller")
+
+    source_keys = dict()
+    parsed = list()
+    for i in range(len(rows)):
+        key = (title[i], category[i], listed_day[i], list_price_cents[i])
+        source_key = source_keys.get(key)
+        if source_key is None:
+            source_key = make_source_key_for_day(*key)
+            source_keys[key] = source_key
+
+        parsed.append((
+            source_key,
+            title[i],
+            category[i],
+            list_price_cents[i],
+            listed_at[i],
+            list_price_cents[i],
+            sold_at[i],
+            depop_fee_cents[i],
+            payment_fee_cents[i],
+            boosting_fee_cents[i],
+            shipping_cost_cents[i],
+            refunded_cents[i],
+            fees_refunded_cents[i],
+        ))
+
+    return parsed, skipped
@@ -0,0 +1,60 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+
+GRANULARITIES = ("day", "week", "month")
+# most buckets one sales-over-time response may hold; the series is gap-filled, so an
+# unbounded range would build (and cache) one row per day since year 1
+MAX_BUCKETS = {"day": 366, "week": 260, "month": 120}
+
+
+def make_day_range(date_from: Optional[date], date_to: Optional[date]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    this turns an inclusive [from, to] day range into a half-open [start_at, end_at) timestamp range,
+    so queries can compare sold_at/listed_at directly and stay on the (seller_id, <timestamp>) indexes.
+    naive, like the export timestamps, so both are read in the same session time zone.
+    raises ValueError when from is after to, or to is the last representable day.
+    """
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise ValueError("from must not be after to")
+    if date_to is not None and date_to >= date.max:
+        raise ValueError("to is out of range")
+
+    start_at = None
+    if date_from is not None:
+        start_at = datetime.combine(date_from, time())
+
+    end_at = None
+    if date_to is not None:
+        end_at = datetime.combine(date_to + timedelta(days=1), time())
+
+    return (start_at, end_at)
+
+
+def count_buckets(date_from: date, date_to: date, granularity: str) -> int:
+    """
+    number of day/week/month buckets an inclusive [from, to] range touches (weeks start on monday).
+    """
+    if granularity == "day":
+        return (date_to - date_from).days + 1
+    if granularity == "week":
+        first_monday = date_from - timedelta(days=date_from.weekday())
+        last_monday = date_to - timedelta(days=date_to.weekday())
+        return (last_monday - first_monday).days // 7 + 1
+    return (date_to.year - date_from.year) * 12 + (date_to.month - date_from.month) + 1
+
+
+def check_bucket_count(date_from: Optional[date], date_to: Optional[date], granularity: str) -> None:
+    """
+    raises ValueError when a bounded range needs more than MAX_BUCKETS[granularity] buckets.
+    open ranges are capped by the query itself (see get_sales_over_time).
+    """
+    if date_from is None or date_to is None or date_from > date_to:
+        return
+    if count_buckets(date_from, date_to, granularity) > MAX_BUCKETS[granularity]:
+        raise_too_many_buckets(granularity)
+
+
+def raise_too_many_buckets(granularity: str) -> None:
+    raise ValueError(
+        f"range spans more than {MAX_BUCKETS[granularity]} {granularity}s; narrow it or use a coarser granularity"
+    )
@@ -1,10 +1,26 @@
+import codecs
 import csv
+import io
+import itertools
+import os
 from datetime import datetime
-from typing import Tuple
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Tuple
 import hashlib
 import psycopg
 
+from app.services.rollup_service import apply_staging_to_rollups
 
+CHUNK_SIZE = 64 * 1024
+# every character str.splitlines() breaks on
+LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+BATCH_SIZE = 5000
+PARSE_MODE = os.environ.get("INGEST_PARSE_MODE", "columnar")
+# bounded memo for the cell parsers; exports repeat the same dates and fee strings a lot
+PARSE_CACHE_SIZE = int(os.environ.get("INGEST_PARSE_CACHE_SIZE", "8192"))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_money_to_cents(money_str: str) -> int:
     if money_str is None:
         return 0
@@ -22,20 +38,137 @@ def parse_money_to_cents(money_str: str) -> int:
     return cents
 
 
-def parse_sale_datetime(date_str: str, time_str: str) -> datetime:
-    combined = date_str.strip() + " " + time_str.strip()
-    return datetime.strptime(combined, "%m/%d/%Y %I:%M %p")
+def fast_parse_date(date_str: str) -> Optional[datetime]:
+    """
+    hand-rolled MM/DD/YYYY (1-2 digit month/day). returns None for anything it is not sure
+    about, and the caller falls back to strptime, so accepted inputs and errors stay the same.
+    """
+    parts = date_str.split("/")
+    if len(parts) != 3:
+        return None
 
+    month, day, year = parts
+    if not (1 <= len(month) <= 2 and 1 <= len(day) <= 2 and len(year) == 4):
+        return None
+    if not (month.isascii() and month.isdigit() and day.isascii() and day.isdigit()
+            and year.isascii() and year.isdigit()):
+        return None
 
+    try:
+        return datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def fast_parse_clock(time_str: str) -> Optional[Tuple[int, int]]:
+    """
+    hand-rolled hh:mm AM/PM, returns (hour_24, minute) or None (caller falls back to strptime).
+    """
+    parts = time_str.split()
+    if len(parts) != 2:
+        return None
+
+    clock, meridiem = parts
+    meridiem = meridiem.upper()
+    if meridiem != "AM" and meridiem != "PM":
+        return None
+
+    hours, sep, minutes = clock.partition(":")
+    if sep != ":" or not (1 <= len(hours) <= 2) or len(minutes) != 2:
+        return None
+    if not (hours.isascii() and hours.isdigit() and minutes.isascii() and minutes.isdigit()):
+        return None
+
+    hour = int(hours)
+    minute = int(minutes)
+    if hour < 1 or hour > 12 or minute > 59:
+        return None
+
+    hour = hour % 12
+    if meridiem == "PM":
+        hour += 12
+    return (hour, minute)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_listing_date(date_str: str) -> datetime:
+    day = fast_parse_date(date_str.strip())
+    if day is not None:
+        return day
+
     return datetime.strptime(date_str.strip(), "%m/%d/%Y")
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_sale_clock(time_str: str) -> Tuple[int, int]:
+    """
+    this returns (hour_24, minute) for hh:mm AM/PM.
+    """
+    clock = fast_parse_clock(time_str.strip())
+    if clock is not None:
+        return clock
+
+    parsed = datetime.strptime(time_str.strip(), "%I:%M %p")
+    return (parsed.hour, parsed.minute)
+
+
+def parse_sale_datetime(date_str: str, time_str: str) -> datetime:
+    """
+    the date and the clock are memoized separately: an export repeats each sale day many times
+    but hardly ever the same (day, minute) pair, so a pair cache mostly missed.
+    """
+    try:
+        day = parse_listing_date(date_str)
+        hour, minute = parse_sale_clock(time_str)
+    except ValueError:
+        # whatever only the combined format accepts, and the same error as before otherwise
+        combined = date_str.strip() + " " + time_str.strip()
+        return datetime.strptime(combined, "%m/%d/%Y %I:%M %p")
+    return day.replace(hour=hour, minute=minute)
+
+
+def get_parse_cache_stats() -> dict:
+    """
+    hit/miss counters of the memoized parsers since process start (or the last clear).
+    """
+    stats = dict()
+    for fn in (parse_listing_date, parse_sale_clock, parse_money_to_cents):
+        info = fn.cache_info()
+        lookups = info.hits + info.misses
+        stats[fn.__name__] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": round(info.hits / lookups, 4) if lookups > 0 else 0.0,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+        }
+    return stats
+
+
+def clear_parse_caches() -> None:
+    for fn in (parse_listing_date, parse_sale_clock, parse_money_to_cents):
+        fn.cache_clear()
+
+
 def build_title(row: dict) -> str:
-    brand = (row.get("Brand") or "").strip()
-    category = (row.get("Category") or "").strip()
-    size = (row.get("Size") or "").strip()
-    description = (row.get("Description") or "").strip()
+    return format_title(
+        row.get("Brand"),
+        row.get("Category"),
+        row.get("Size"),
+        row.get("Description"),
+    )
+
+
+def format_title(
+    brand: Optional[str],
+    category: Optional[str],
+    size: Optional[str],
+    description: Optional[str],
+) -> str:
+    brand = (brand or "").strip()
+    category = (category or "").strip()
+    size = (size or "").strip()
+    description = (description or "").strip()
 
     base = ""
     if brand != "" and category != "":
@@ -64,15 +197,33 @@ def make_source_key(
     category: str,
     listed_at: datetime,
     list_price_cents: int,
+) -> str:
+    return make_source_key_for_day(title, category, listed_at.strftime("%Y-%m-%d"), list_price_cents)
+
+
+def make_source_key_for_day(
+    title: str,
+    category: str,
+    listed_day: str,
+    list_price_cents: int,
 ) -> str:
     normalized_title = (title or "").strip().lower()
     normalized_category = (category or "").strip().lower()
-    listed_day = listed_at.strftime("%Y-%m-%d")
 
     raw = normalized_title + "|" + normalized_category + "|" + listed_day + "|" + str(list_price_cents)
     digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
     return digest
 
+def make_order_key(source_key: str, sold_at: datetime, occurrence: int) -> str:
+    """
+    natural key of one sale: the listing, the sale minute and which repeat of that pair it is
+    within the export (1 for the first). money columns are left out on purpose, so a corrected
+    refund is the same order (replace uploads update it, plain uploads skip it as a duplicate).
+    """
+    raw = source_key + "|" + sold_at.isoformat(" ", "minutes") + "|" + str(occurrence)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 def ensure_seller(conn: psycopg.Connection, username: str) -> int:
     with conn.cursor() as cur:
         cur.execute("SELECT id FROM sellers WHERE username = %s;", (username,))
@@ -85,162 +236,505 @@ def ensure_seller(conn: psycopg.Connection, username: str) -> int:
         return int(row2["id"])
 
 
-def insert_listing(
-    conn,
-    seller_id: int,
-    source_key: str,
-    title: str,
-    category: str,
-    list_price_cents: int,
-    listed_at,
-) -> int:
+def backfill_order_keys(conn: psycopg.Connection) -> int:
+    """
+    this gives orders loaded before order_key existed their key (in id order, so repeats of the same
+    sale get occurrence 1, 2, ...) and returns how many were updated. orders whose listing has no
+    source_key keep a NULL key and are never treated as duplicates.
+    one set-based UPDATE: the key is make_order_key computed in sql (sold_at is formatted in the
+    session time zone, the same one the naive export time was stored in).
+    """
     with conn.cursor() as cur:
         cur.execute(
             """
-            INSERT INTO listings (
-                seller_id,
-                source_key,
-                title,
-                category,
-                list_price_cents,
-                listed_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (seller_id, source_key)
-            DO UPDATE SET
-                title = EXCLUDED.title,
-                category = EXCLUDED.category,
-                list_price_cents = EXCLUDED.list_price_cents,
-                listed_at = EXCLUDED.listed_at
-            RETURNING id;
-            """,
-            (
-                seller_id,
-                source_key,
-                title,
-                category,
-                list_price_cents,
-                listed_at,
-            ),
+            UPDATE orders o
+            SET order_key = encode(sha256(convert_to(
+                k.source_key || '|' || to_char(k.sold_at, 'YYYY-MM-DD HH24:MI') || '|' || k.occurrence,
+                'UTF8'
+            )), 'hex')
+            FROM (
+                SELECT
+                    o2.id,
+                    o2.sold_at,
+                    l.source_key,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY o2.seller_id, l.source_key, o2.sold_at
+                        ORDER BY o2.id
+                    ) AS occurrence
+                FROM orders o2
+                JOIN listings l ON l.id = o2.listing_id
+                WHERE o2.order_key IS NULL
+                  AND l.source_key IS NOT NULL
+            ) k
+            WHERE o.id = k.id
+              AND o.sold_at = k.sold_at;
+            """
+        )
+        return cur.rowcount
+
+
+STAGING_COLUMNS = (
+    "row_num",
+    "source_key",
+    "title",
+    "category",
+    "list_price_cents",
+    "listed_at",
+    "sold_price_cents",
+    "sold_at",
+    "depop_fee_cents",
+    "payment_fee_cents",
+    "boosting_fee_cents",
+    "shipping_cost_cents",
+    "refunded_cents",
+    "fees_refunded_cents",
+    "order_key",
+)
+
+
+def parse_sales_row(row: dict) -> Optional[tuple]:
+    """
+    this turns one csv row into a staging tuple (without row_num), or None if the row is unusable.
+    """
+    date_of_sale = row.get("Date of sale")
+    time_of_sale = row.get("Time of sale")
+    date_of_listing = row.get("Date of listing")
+    item_price = row.get("Item price")
+
+    if date_of_sale is None or time_of_sale is None or date_of_listing is None or item_price is None:
+        return None
+
+    sold_at = parse_sale_datetime(date_of_sale, time_of_sale)
+    listed_at = parse_listing_date(date_of_listing)
+
+    category = (row.get("Category") or "Unknown").strip()
+    title = build_title(row)
+
+    list_price_cents = parse_money_to_cents(item_price)
+    sold_price_cents = list_price_cents
+
+    depop_fee_cents = parse_money_to_cents(row.get("Depop fee") or "")
+    payment_fee_cents = parse_money_to_cents(row.get("Depop Payments fee") or "")
+    boosting_fee_cents = parse_money_to_cents(row.get("Boosting fee") or "")
+    shipping_cost_cents = parse_money_to_cents(row.get("USPS Cost") or "")
+    refunded_cents = parse_money_to_cents(row.get("Refunded to buyer amount") or "")
+    fees_refunded_cents = parse_money_to_cents(row.get("Fees refunded to seller") or "")
+
+    source_key = make_source_key(
+        title=title,
+        category=category,
+        listed_at=listed_at,
+        list_price_cents=list_price_cents,
+    )
+
+    return (
+        source_key,
+        title,
+        category,
+        list_price_cents,
+        listed_at,
+        sold_price_cents,
+        sold_at,
+        depop_fee_cents,
+        payment_fee_cents,
+        boosting_fee_cents,
+        shipping_cost_cents,
+        refunded_cents,
+        fees_refunded_cents,
+    )
+
+
+def create_staging_table(conn: psycopg.Connection) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TEMP TABLE ingest_staging (
+                row_num INTEGER NOT NULL,
+                source_key TEXT NOT NULL,
+                title TEXT NOT NULL,
+                category TEXT NOT NULL,
+                list_price_cents INTEGER NOT NULL,
+                listed_at TIMESTAMPTZ NOT NULL,
+                sold_price_cents INTEGER NOT NULL,
+                sold_at TIMESTAMPTZ NOT NULL,
+                depop_fee_cents INTEGER NOT NULL,
+                payment_fee_cents INTEGER NOT NULL,
+                boosting_fee_cents INTEGER NOT NULL,
+                shipping_cost_cents INTEGER NOT NULL,
+                refunded_cents INTEGER NOT NULL,
+                fees_refunded_cents INTEGER NOT NULL,
+                order_key TEXT NOT NULL
+            ) ON COMMIT DROP;
+            """
         )
 
-        row = cur.fetchone()
-        return int(row["id"])
 
+def drop_staging_table(conn: psycopg.Connection) -> None:
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS ingest_staging;")
 
-def insert_order(
-    conn: psycopg.Connection,
-    listing_id: int,
-    seller_id: int,
-    sold_price_cents: int,
-    sold_at: datetime,
-    depop_fee_cents: int = 0,
-    payment_fee_cents: int = 0,
-    boosting_fee_cents: int = 0,
-    shipping_cost_cents: int = 0,
-    refunded_cents: int = 0,
-    fees_refunded_cents: int = 0,
-) -> int:
+
+def copy_rows_to_staging(conn: psycopg.Connection, rows: Iterable[tuple]) -> int:
+    """
+    this streams staging tuples (row_num first) into ingest_staging with COPY and returns the row count.
+    """
+    copied = 0
+    copy_sql = "COPY ingest_staging (" + ", ".join(STAGING_COLUMNS) + ") FROM STDIN"
+    with conn.cursor() as cur:
+        with cur.copy(copy_sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+                copied += 1
+    return copied
+
+
+def merge_staging(conn: psycopg.Connection, seller_id: int) -> Tuple[int, int, int]:
+    """
+    this merges ingest_staging into listings + orders.
+    this returns: (listings_inserted, orders_inserted, orders_duplicate); listings the seller already
+    had are updated in place and not counted.
+    orders whose order_key the seller already has, or that appear earlier in the batch, are removed
+    from staging first, so re-uploading an export is a no-op and the rollups (applied from staging
+    afterwards) only see new orders.
+    when a file repeats a source_key the last row wins, same as upserting row by row.
+    """
     with conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM ingest_staging s
+            USING orders o
+            WHERE o.seller_id = %(seller_id)s
+              AND o.order_key = s.order_key;
+            """,
+            {"seller_id": seller_id},
+        )
+        orders_duplicate = cur.rowcount
+
+        # the same order twice in one batch (overlapping exports of one seller in a bulk import):
+        # keep the first, so the rollups below add it once
+        cur.execute(
+            """
+            DELETE FROM ingest_staging s
+            USING ingest_staging d
+            WHERE d.order_key = s.order_key
+              AND d.row_num < s.row_num;
+            """
+        )
+        orders_duplicate += cur.rowcount
+
+        # xmax = 0 only on rows this statement inserted (an updated row carries the updater's xid)
+        cur.execute(
+            """
+            WITH upserted AS (
+                INSERT INTO listings (
+                    seller_id,
+                    source_key,
+                    title,
+                    category,
+                    list_price_cents,
+                    listed_at
+                )
+                SELECT DISTINCT ON (s.source_key)
+                    %(seller_id)s,
+                    s.source_key,
+                    s.title,
+                    s.category,
+                    s.list_price_cents,
+                    s.listed_at
+                FROM ingest_staging s
+                ORDER BY s.source_key, s.row_num DESC
+                ON CONFLICT (seller_id, source_key)
+                DO UPDATE SET
+                    title = EXCLUDED.title,
+                    category = EXCLUDED.category,
+                    list_price_cents = EXCLUDED.list_price_cents,
+                    listed_at = EXCLUDED.listed_at
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted) AS listings_inserted FROM upserted;
+            """,
+            {"seller_id": seller_id},
+        )
+        listings_inserted = int(cur.fetchone()["listings_inserted"])
+
         cur.execute(
             """
             INSERT INTO orders (
-                listing_id, seller_id, sold_price_cents, sold_at,
+                listing_id, seller_id, order_key, sold_price_cents, sold_at,
                 depop_fee_cents, payment_fee_cents, boosting_fee_cents,
                 shipping_cost_cents, refunded_cents, fees_refunded_cents
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id;
+            SELECT
+                l.id, %(seller_id)s, s.order_key, s.sold_price_cents, s.sold_at,
+                s.depop_fee_cents, s.payment_fee_cents, s.boosting_fee_cents,
+                s.shipping_cost_cents, s.refunded_cents, s.fees_refunded_cents
+            FROM ingest_staging s
+            JOIN listings l
+                ON l.seller_id = %(seller_id)s
+               AND l.source_key = s.source_key
+            ORDER BY s.row_num
+            ON CONFLICT DO NOTHING;
             """,
-            (
-                listing_id, seller_id, sold_price_cents, sold_at,
-                depop_fee_cents, payment_fee_cents, boosting_fee_cents,
-                shipping_cost_cents, refunded_cents, fees_refunded_cents,
-            ),
+            {"seller_id": seller_id},
         )
-        row = cur.fetchone()
-        return int(row["id"])
+        return (listings_inserted, cur.rowcount, orders_duplicate)
 
 
-def ingest_sales_csv_bytes(
-    conn: psycopg.Connection,
-    seller_username: str,
-    csv_bytes: bytes,
-) -> Tuple[int, int, int]:
+def truncate_staging_table(conn: psycopg.Connection) -> None:
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE ingest_staging;")
+
+
+def iter_text_lines(chunks: Iterable[bytes], encoding: str = "utf-8-sig") -> Iterator[str]:
     """
-    this returns: (seller_id, listings_inserted, orders_inserted)
-    notes: intentionally ignoring buyer/address fields (PII). sales export usually contains only sold items.
+    this decodes byte chunks incrementally and yields the same lines as str.splitlines() on the
+    whole text (no line endings), so only one chunk plus one partial line is held in memory at a time.
+    a quoted field that spans lines is therefore joined without its line break, as it was when the
+    whole upload went through splitlines() + DictReader; titles and source/order keys depend on that.
     """
-    seller_id = ensure_seller(conn, seller_username)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        if pending == "":
+            continue
+        lines = pending.splitlines()
+        last = pending[-1]
+        if last not in LINE_BREAKS:
+            pending = lines.pop()
+        elif last == "\r":
+            # may be the first half of a \r\n split across chunks
+            pending = lines.pop() + "\r"
+        else:
+            pending = ""
+        yield from lines
+
+    pending += decoder.decode(b"", final=True)
+    yield from pending.splitlines()
+
+
+def iter_stream_chunks(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_parsed_rows(
+    reader: Iterator[list[str]],
+    header: list[str],
+    parse_mode: str,
+    batch_size: int,
+) -> Iterator[Optional[tuple]]:
+    """
+    this yields one staging tuple (without row_num, order_key last) per data row, or None for unusable rows.
+    call it once per file: order keys count repeated (source_key, sold_at) pairs within the file.
+    """
+    occurrences = dict()
+    for parsed in iter_parsed_cells(reader, header, parse_mode, batch_size):
+        if parsed is None:
+            yield None
+            continue
+        source_key = parsed[0]
+        sold_at = parsed[6]
+        occurrence = occurrences.get((source_key, sold_at), 0) + 1
+        occurrences[(source_key, sold_at)] = occurrence
+        yield parsed + (make_order_key(source_key, sold_at, occurrence),)
+
+
+def iter_parsed_cells(
+    reader: Iterator[list[str]],
+    header: list[str],
+    parse_mode: str,
+    batch_size: int,
+) -> Iterator[Optional[tuple]]:
+    if parse_mode == "columnar":
+        from app.services.columnar_parse import parse_sales_columns
+
+        while True:
+            raw_rows = list(itertools.islice(reader, batch_size))
+            if len(raw_rows) == 0:
+                return
+            parsed_rows, skipped = parse_sales_columns(header, raw_rows)
+            yield from parsed_rows
+            for _ in range(skipped):
+                yield None
 
-    text = csv_bytes.decode("utf-8-sig")
-    lines = text.splitlines()
-    reader = csv.DictReader(lines)
+    else:
+        for row in reader:
+            # same mapping as csv.DictReader
+            if row == []:
+                continue
+            row_dict = dict(zip(header, row))
+            for key in header[len(row):]:
+                row_dict[key] = None
+            yield parse_sales_row(row_dict)
+
+
+def open_sales_csv(chunks: Iterable[bytes]) -> Tuple[Iterator[list[str]], list[str]]:
+    """
+    this returns: (csv reader positioned after the header, header)
+    raises ValueError for an empty file or a missing required column.
+    """
+    reader = csv.reader(iter_text_lines(chunks))
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("Empty file")
 
     required = ["Date of sale", "Time of sale", "Date of listing", "Item price"]
     for col in required:
-        if col not in reader.fieldnames:
+        if col not in header:
             raise ValueError("Missing required column: " + col)
 
-    listings_inserted = 0
-    orders_inserted = 0
+    return reader, header
+
 
+def scan_sale_datetimes(reader: Iterator[list[str]], header: list[str]) -> Iterator[datetime]:
+    """
+    this yields the sale time of every row it can parse, reading only the two sale columns.
+    used to create the orders partitions an upload needs before the ingest transaction starts.
+    """
+    date_index = header.index("Date of sale")
+    time_index = header.index("Time of sale")
     for row in reader:
-        date_of_sale = row.get("Date of sale")
-        time_of_sale = row.get("Time of sale")
-        date_of_listing = row.get("Date of listing")
-        item_price = row.get("Item price")
+        if len(row) <= max(date_index, time_index):
+            continue
+        try:
+            yield parse_sale_datetime(row[date_index], row[time_index])
+        except ValueError:
+            continue
+
 
-        if date_of_sale is None or time_of_sale is None or date_of_listing is None or item_price is None:
+def load_parsed_rows(
+    conn: psycopg.Connection,
+    seller_id: int,
+    parsed_rows: Iterable[Optional[tuple]],
+    batch_size: int = BATCH_SIZE,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, int, int]:
+    """
+    this returns: (listings_inserted, orders_inserted, orders_duplicate)
+    parsed_rows are staging tuples without row_num (None = unusable row), see iter_parsed_rows. every batch_size rows are
+    COPY'd into a temp staging table and merged with set-based inserts, then applied to the rollups.
+    on_progress(rows_processed, rows_skipped) is called after every merged batch.
+    """
+    listings_inserted = 0
+    orders_inserted = 0
+    orders_duplicate = 0
+    row_num = 0
+    rows_skipped = 0
+    staging_created = False
+    batch = list()
+
+    def flush_batch() -> None:
+        nonlocal listings_inserted, orders_inserted, orders_duplicate, staging_created
+        if not staging_created:
+            create_staging_table(conn)
+            staging_created = True
+        else:
+            truncate_staging_table(conn)
+        copy_rows_to_staging(conn, batch)
+        listings, orders, duplicate = merge_staging(conn, seller_id)
+        listings_inserted += listings
+        orders_inserted += orders
+        orders_duplicate += duplicate
+        apply_staging_to_rollups(conn, seller_id)
+        batch.clear()
+        if on_progress is not None:
+            on_progress(row_num, rows_skipped)
+
+    for parsed in parsed_rows:
+        if parsed is None:
+            rows_skipped += 1
             continue
+        batch.append((row_num,) + parsed)
+        row_num += 1
+        if len(batch) >= batch_size:
+            flush_batch()
 
-        sold_at = parse_sale_datetime(date_of_sale, time_of_sale)
-        listed_at = parse_listing_date(date_of_listing)
+    if len(batch) > 0:
+        flush_batch()
 
-        category = (row.get("Category") or "Unknown").strip()
-        title = build_title(row)
+    if staging_created:
+        drop_staging_table(conn)
 
-        list_price_cents = parse_money_to_cents(item_price)
-        sold_price_cents = list_price_cents
+    return (listings_inserted, orders_inserted, orders_duplicate)
 
-        depop_fee_cents = parse_money_to_cents(row.get("Depop fee") or "")
-        payment_fee_cents = parse_money_to_cents(row.get("Depop Payments fee") or "")
-        boosting_fee_cents = parse_money_to_cents(row.get("Boosting fee") or "")
-        shipping_cost_cents = parse_money_to_cents(row.get("USPS Cost") or "")
-        refunded_cents = parse_money_to_cents(row.get("Refunded to buyer amount") or "")
-        fees_refunded_cents = parse_money_to_cents(row.get("Fees refunded to seller") or "")
 
-        source_key = make_source_key(
-            title=title,
-            category=category,
-            listed_at=listed_at,
-            list_price_cents=list_price_cents,
-        )
+def ingest_sales_csv_counts(
+    conn: psycopg.Connection,
+    seller_username: str,
+    chunks: Iterable[bytes],
+    batch_size: int = BATCH_SIZE,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    parse_mode: str = PARSE_MODE,
+) -> dict:
+    """
+    this returns: {"seller_id", "listings_inserted", "orders_inserted", "orders_duplicate"}, where
+    orders_duplicate counts rows the seller already had or that repeat an earlier row of the file.
+    notes: intentionally ignoring buyer/address fields (PII). sales export usually contains only sold items.
+    chunks are decoded incrementally and parsed batch by batch (see load_parsed_rows), so peak memory
+    does not grow with the file.
+    parse_mode is "columnar" (see columnar_parse) or "row"; both produce the same rows.
+    """
+    seller_id = ensure_seller(conn, seller_username)
+
+    reader, header = open_sales_csv(chunks)
+    listings_inserted, orders_inserted, orders_duplicate = load_parsed_rows(
+        conn,
+        seller_id,
+        iter_parsed_rows(reader, header, parse_mode, batch_size),
+        batch_size=batch_size,
+        on_progress=on_progress,
+    )
+
+    return {
+        "seller_id": seller_id,
+        "listings_inserted": listings_inserted,
+        "orders_inserted": orders_inserted,
+        "orders_duplicate": orders_duplicate,
+    }
+
+
+def ingest_sales_csv_chunks(
+    conn: psycopg.Connection,
+    seller_username: str,
+    chunks: Iterable[bytes],
+    batch_size: int = BATCH_SIZE,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    parse_mode: str = PARSE_MODE,
+) -> Tuple[int, int, int]:
+    """
+    this returns: (seller_id, listings_inserted, orders_inserted)
+    see ingest_sales_csv_counts, which also reports the duplicates that were skipped.
+    """
+    counts = ingest_sales_csv_counts(
+        conn, seller_username, chunks, batch_size=batch_size, on_progress=on_progress, parse_mode=parse_mode
+    )
+    return (counts["seller_id"], counts["listings_inserted"], counts["orders_inserted"])
+
+
+def ingest_sales_csv_stream(
+    conn: psycopg.Connection,
+    seller_username: str,
+    stream: BinaryIO,
+    batch_size: int = BATCH_SIZE,
+) -> Tuple[int, int, int]:
+    """
+    this returns: (seller_id, listings_inserted, orders_inserted)
+    reads a binary file object in CHUNK_SIZE pieces, see ingest_sales_csv_chunks.
+    """
+    return ingest_sales_csv_chunks(conn, seller_username, iter_stream_chunks(stream), batch_size=batch_size)
 
-        listing_id = insert_listing(
-            conn=conn,
-            seller_id=seller_id,
-            source_key=source_key,
-            title=title,
-            category=category,
-            list_price_cents=list_price_cents,
-            listed_at=listed_at,
-        )
-        listings_inserted += 1
-
-        insert_order(
-            conn=conn,
-            listing_id=listing_id,
-            seller_id=seller_id,
-            sold_price_cents=sold_price_cents,
-            sold_at=sold_at,
-            depop_fee_cents=depop_fee_cents,
-            payment_fee_cents=payment_fee_cents,
-            boosting_fee_cents=boosting_fee_cents,
-            shipping_cost_cents=shipping_cost_cents,
-            refunded_cents=refunded_cents,
-            fees_refunded_cents=fees_refunded_cents,
-        )
-        orders_inserted += 1
 
-    return (seller_id, listings_inserted, orders_inserted)
\ No newline at end of file
+def ingest_sales_csv_bytes(
+    conn: psycopg.Connection,
+    seller_username: str,
+    csv_bytes: bytes,
+) -> Tuple[int, int, int]:
+    """
+    this returns: (seller_id, listings_inserted, orders_inserted)
+    in-memory convenience wrapper around ingest_sales_csv_stream.
+    """
+    return ingest_sales_csv_stream(conn, seller_username, io.BytesIO(csv_bytes))
@@ -0,0 +1,428 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import BinaryIO, Iterator, Optional
+
+import psycopg
+
+from app.db.connection import db_conn
+from app.db.partitions import ensure_order_partitions_for
+from app.db.sellers import bump_seller_data_version, get_seller_data_version
+from app.metrics import record_ingest
+from app.services.ingest_service import (
+    BATCH_SIZE,
+    PARSE_MODE,
+    ensure_seller,
+    ingest_sales_csv_counts,
+    iter_parsed_rows,
+    open_sales_csv,
+    scan_sale_datetimes,
+)
+from app.services.replace_service import replace_seller_data
+
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "2"))
+INGEST_POLL_SECONDS = float(os.environ.get("INGEST_POLL_SECONDS", "1.0"))
+INGEST_STALE_SECONDS = int(os.environ.get("INGEST_STALE_SECONDS", "300"))
+INGEST_MAX_ATTEMPTS = int(os.environ.get("INGEST_MAX_ATTEMPTS", "3"))
+# well under INGEST_STALE_SECONDS, so a live job is never mistaken for a dead one
+INGEST_HEARTBEAT_SECONDS = float(os.environ.get("INGEST_HEARTBEAT_SECONDS", "30"))
+STORED_CHUNK_SIZE = 1024 * 1024
+
+
+def enqueue_ingest_job(
+    conn: psycopg.Connection,
+    seller_username: str,
+    stream: BinaryIO,
+    replace: bool,
+    include_summary: bool = False,
+) -> int:
+    """
+    this stores the upload in ingest_job_chunks (1 MiB at a time) and queues a job for it.
+    the caller commits; any api replica's workers can then pick it up.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO ingest_jobs (seller_username, replace, include_summary)
+            VALUES (%s, %s, %s)
+            RETURNING id;
+            """,
+            (seller_username, replace, include_summary),
+        )
+        job_id = int(cur.fetchone()["id"])
+
+        seq = 0
+        total_bytes = 0
+        while True:
+            chunk = stream.read(STORED_CHUNK_SIZE)
+            if not chunk:
+                break
+            cur.execute(
+                "INSERT INTO ingest_job_chunks (job_id, seq, data) VALUES (%s, %s, %s);",
+                (job_id, seq, chunk),
+            )
+            seq += 1
+            total_bytes += len(chunk)
+
+        if total_bytes == 0:
+            raise ValueError("Empty file")
+
+        cur.execute(
+            "UPDATE ingest_jobs SET payload_bytes = %s WHERE id = %s;",
+            (total_bytes, job_id),
+        )
+
+    return job_id
+
+
+def requeue_stale_jobs(conn: psycopg.Connection) -> None:
+    """
+    jobs whose worker stopped heartbeating go back to the queue (their ingest transaction
+    was rolled back with the dead connection), or fail once they ran out of attempts.
+    a failed job's stored upload is deleted with it.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            WITH stale AS (
+                UPDATE ingest_jobs
+                SET
+                    status = CASE WHEN attempts >= %(max_attempts)s THEN 'failed' ELSE 'queued' END,
+                    error = CASE WHEN attempts >= %(max_attempts)s THEN 'Worker stopped responding' ELSE error END,
+                    finished_at = CASE WHEN attempts >= %(max_attempts)s THEN NOW() ELSE NULL END,
+                    worker_id = NULL
+                WHERE status = 'running'
+                  AND heartbeat_at < NOW() - make_interval(secs => %(stale_seconds)s)
+                RETURNING id, status
+            )
+            DELETE FROM ingest_job_chunks c
+            USING stale s
+            WHERE c.job_id = s.id
+              AND s.status = 'failed';
+            """,
+            {"max_attempts": INGEST_MAX_ATTEMPTS, "stale_seconds": INGEST_STALE_SECONDS},
+        )
+
+
+def claim_next_job(conn: psycopg.Connection, worker_id: str) -> Optional[dict]:
+    """
+    this claims the oldest queued job whose seller has no earlier unfinished job.
+    SKIP LOCKED lets several workers/replicas poll the same table without blocking each other,
+    and the per-seller check keeps one seller's uploads in order.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE ingest_jobs
+            SET
+                status = 'running',
+                worker_id = %(worker_id)s,
+                attempts = attempts + 1,
+                started_at = NOW(),
+                heartbeat_at = NOW(),
+                rows_processed = 0,
+                rows_skipped = 0
+            WHERE id = (
+                SELECT j.id
+                FROM ingest_jobs j
+                WHERE j.status = 'queued'
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM ingest_jobs e
+                      WHERE e.seller_username = j.seller_username
+                        AND e.status IN ('queued', 'running')
+                        AND e.id < j.id
+                  )
+                ORDER BY j.id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, seller_username, replace;
+            """,
+            {"worker_id": worker_id},
+        )
+        return cur.fetchone()
+
+
+def iter_job_chunks(conn: psycopg.Connection, job_id: int) -> Iterator[bytes]:
+    seq = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT data FROM ingest_job_chunks WHERE job_id = %s AND seq = %s;",
+                (job_id, seq),
+            )
+            row = cur.fetchone()
+        if row is None:
+            return
+        yield bytes(row["data"])
+        seq += 1
+
+
+def report_progress(job_id: int, worker_id: str, rows_processed: int, rows_skipped: int) -> None:
+    # separate connection: the ingest transaction is still open and invisible to pollers
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE ingest_jobs
+                SET rows_processed = %s, rows_skipped = %s, heartbeat_at = NOW()
+                WHERE id = %s AND worker_id = %s;
+                """,
+                (rows_processed, rows_skipped, job_id, worker_id),
+            )
+
+
+def send_heartbeat(job_id: int, worker_id: str) -> None:
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE ingest_jobs
+                SET heartbeat_at = NOW()
+                WHERE id = %s AND worker_id = %s AND status = 'running';
+                """,
+                (job_id, worker_id),
+            )
+
+
+class JobHeartbeat:
+    """
+    bumps a running job's heartbeat_at every interval_seconds from a background thread, on its
+    own pooled connection, for as long as the job runs. progress reports only come from COPY
+    batches; the advisory-lock wait, the replace diff and the rollup work report nothing, and a
+    job that went quiet for INGEST_STALE_SECONDS would be requeued while still running.
+    """
+
+    def __init__(self, job_id: int, worker_id: str, interval_seconds: float = INGEST_HEARTBEAT_SECONDS) -> None:
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "JobHeartbeat":
+        self._thread = threading.Thread(target=self._run, name=f"ingest-heartbeat-{self.job_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                send_heartbeat(self.job_id, self.worker_id)
+            except Exception as e:
+                print(f"WARNING: heartbeat for ingest job {self.job_id} failed: {e}")
+
+
+def mark_job_failed(job_id: int, worker_id: str, error: str) -> None:
+    """
+    failed is final (nothing retries it), so the stored upload is deleted too.
+    """
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE ingest_jobs
+                SET status = 'failed', error = %s, finished_at = NOW()
+                WHERE id = %s AND worker_id = %s;
+                """,
+                (error, job_id, worker_id),
+            )
+            if cur.rowcount == 1:
+                cur.execute("DELETE FROM ingest_job_chunks WHERE job_id = %s;", (job_id,))
+
+
+def prepare_order_partitions(job_id: int) -> None:
+    """
+    this creates the orders partitions the upload needs in a short transaction of its own.
+    adding a partition locks orders until commit, so doing it inside the ingest transaction
+    would stall reads of orders for the whole upload (and two jobs could deadlock).
+    """
+    with db_conn() as conn:
+        reader, header = open_sales_csv(iter_job_chunks(conn, job_id))
+        ensure_order_partitions_for(conn, scan_sale_datetimes(reader, header))
+
+
+def run_ingest_job(job: dict, worker_id: str) -> None:
+    job_id = int(job["id"])
+    seller_username = job["seller_username"]
+    started = time.perf_counter()
+    progress = {"rows_processed": 0, "rows_skipped": 0}
+
+    def on_progress(rows_processed: int, rows_skipped: int) -> None:
+        progress["rows_processed"] = rows_processed
+        progress["rows_skipped"] = rows_skipped
+        report_progress(job_id, worker_id, rows_processed, rows_skipped)
+
+    with JobHeartbeat(job_id, worker_id):
+        try:
+            prepare_order_partitions(job_id)
+
+            with db_conn() as conn:
+                with conn.cursor() as cur:
+                    # one writer per seller at a time, across every worker and replica
+                    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", ("ingest:" + seller_username,))
+                    cur.execute("SELECT status, worker_id FROM ingest_jobs WHERE id = %s;", (job_id,))
+                    current = cur.fetchone()
+                if current is None or current["status"] != "running" or current["worker_id"] != worker_id:
+                    # requeued to someone else while we waited for the lock
+                    return
+
+                seller_id = ensure_seller(conn, seller_username)
+
+                if job["replace"]:
+                    # diff against the stored rows instead of deleting and re-inserting everything
+                    reader, header = open_sales_csv(iter_job_chunks(conn, job_id))
+                    counts = replace_seller_data(
+                        conn,
+                        seller_id,
+                        iter_parsed_rows(reader, header, PARSE_MODE, BATCH_SIZE),
+                        on_progress=on_progress,
+                    )
+                    if counts["changed"]:
+                        data_version = bump_seller_data_version(conn, seller_id)
+                    else:
+                        # identical re-upload: keep cached analytics and ETags valid
+                        data_version = get_seller_data_version(conn, seller_id)
+                else:
+                    counts = ingest_sales_csv_counts(
+                        conn=conn,
+                        seller_username=seller_username,
+                        chunks=iter_job_chunks(conn, job_id),
+                        on_progress=on_progress,
+                    )
+                    counts.update(listings_updated=0, listings_deleted=0, orders_updated=0, orders_deleted=0)
+                    if counts["orders_inserted"] > 0:
+                        data_version = bump_seller_data_version(conn, seller_id)
+                    else:
+                        # re-upload of orders we already have
+                        data_version = get_seller_data_version(conn, seller_id)
+
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        UPDATE ingest_jobs
+                        SET
+                            status = 'succeeded',
+                            seller_id = %(seller_id)s,
+                            listings_inserted = %(listings_inserted)s,
+                            listings_updated = %(listings_updated)s,
+                            listings_deleted = %(listings_deleted)s,
+                            orders_inserted = %(orders_inserted)s,
+                            orders_updated = %(orders_updated)s,
+                            orders_deleted = %(orders_deleted)s,
+                            orders_duplicate = %(orders_duplicate)s,
+                            data_version = %(data_version)s,
+                            finished_at = NOW(),
+                            heartbeat_at = NOW()
+                        WHERE id = %(job_id)s AND worker_id = %(worker_id)s;
+                        """,
+                        {
+                            "seller_id": seller_id,
+                            "listings_inserted": counts["listings_inserted"],
+                            "listings_updated": counts["listings_updated"],
+                            "listings_deleted": counts["listings_deleted"],
+                            "orders_inserted": counts["orders_inserted"],
+                            "orders_updated": counts["orders_updated"],
+                            "orders_deleted": counts["orders_deleted"],
+                            "orders_duplicate": counts["orders_duplicate"],
+                            "data_version": data_version,
+                            "job_id": job_id,
+                            "worker_id": worker_id,
+                        },
+                    )
+                    if cur.rowcount != 1:
+                        raise RuntimeError("Job was reassigned while running")
+                    cur.execute("DELETE FROM ingest_job_chunks WHERE job_id = %s;", (job_id,))
+
+                conn.commit()
+
+            record_ingest(progress["rows_processed"] + progress["rows_skipped"], time.perf_counter() - started)
+
+        except Exception as e:
+            print(f"WARNING: ingest job {job_id} failed: {e}")
+            mark_job_failed(job_id, worker_id, str(e))
+
+
+def get_ingest_job(job_id: int) -> Optional[dict]:
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    id, seller_username, status, replace, include_summary,
+                    payload_bytes, rows_processed, rows_skipped,
+                    seller_id, listings_inserted, listings_updated, listings_deleted,
+                    orders_inserted, orders_updated, orders_deleted, orders_duplicate, data_version, error,
+                    attempts, created_at, started_at, finished_at,
+                    EXTRACT(EPOCH FROM (COALESCE(finished_at, NOW()) - started_at))::float AS elapsed_seconds
+                FROM ingest_jobs
+                WHERE id = %s;
+                """,
+                (job_id,),
+            )
+            return cur.fetchone()
+
+
+class IngestWorkerPool:
+    """
+    background threads that drain ingest_jobs. concurrency is bounded by the thread count;
+    INGEST_WORKERS=0 turns workers off on replicas that should only serve reads.
+    """
+
+    def __init__(self, concurrency: int = INGEST_WORKERS, poll_seconds: float = INGEST_POLL_SECONDS) -> None:
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = list()
+        self._name = socket.gethostname() + "-" + uuid.uuid4().hex[:8]
+
+    def start(self) -> None:
+        for i in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._run,
+                args=(f"{self._name}-{i}",),
+                name=f"ingest-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = list()
+
+    def _run(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                with db_conn() as conn:
+                    requeue_stale_jobs(conn)
+                    job = claim_next_job(conn, worker_id)
+            except Exception as e:
+                print(f"WARNING: ingest worker {worker_id} could not poll jobs: {e}")
+                job = None
+
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+
+            run_ingest_job(job, worker_id)
+
+
+ingest_workers = IngestWorkerPool()
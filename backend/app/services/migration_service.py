@@ -0,0 +1,64 @@
+from app.db.connection import db_conn
+from app.db.migrations import find_migrations_dir, load_migrations, run_pending_migrations
+from app.db.partitions import (
+    PARTITION_ORDERS,
+    ensure_upcoming_order_partitions,
+    is_orders_partitioned,
+    migrate_orders_to_partitioned,
+)
+from app.services.ingest_service import backfill_order_keys
+from app.services.rollup_service import backfill_first_sold_at, backfill_missing_rollups
+
+
+def run_data_backfills() -> None:
+    """
+    fills in columns and rollups that older rows predate. only needed after a schema migration.
+    """
+    with db_conn() as conn:
+        keyed = backfill_order_keys(conn)
+    if keyed > 0:
+        print(f"Added order keys to {keyed} existing order(s)")
+
+    with db_conn() as conn:
+        marked = backfill_first_sold_at(conn)
+    if marked > 0:
+        print(f"Marked {marked} existing listing(s) as sold")
+
+    with db_conn() as conn:
+        rebuilt = backfill_missing_rollups(conn)
+    if rebuilt > 0:
+        print(f"Built analytics rollups for {rebuilt} seller(s)")
+
+
+def ensure_orders_layout() -> None:
+    """
+    DB_PARTITION_ORDERS=1: convert orders once, then keep this and next month's partitions ready.
+    """
+    with db_conn() as conn:
+        if not is_orders_partitioned(conn):
+            moved = migrate_orders_to_partitioned(conn)
+            print(f"Partitioned orders by month ({moved} existing order(s) moved)")
+        ensure_upcoming_order_partitions(conn)
+
+
+def migrate_database() -> list[str]:
+    """
+    this applies pending migrations (then the backfills) and returns the files applied.
+    when the schema is current this is one SELECT (plus the layout check with DB_PARTITION_ORDERS=1).
+    raises ValueError if the migrations folder is missing or an applied file was edited.
+    """
+    migrations_dir = find_migrations_dir()
+    if migrations_dir is None:
+        raise ValueError("app/migrations not found (set DB_MIGRATIONS_DIR)")
+    migrations = load_migrations(migrations_dir)
+
+    with db_conn() as conn:
+        applied = run_pending_migrations(conn, migrations)
+    for name in applied:
+        print(f"Applied migration {name}")
+
+    if PARTITION_ORDERS:
+        ensure_orders_layout()
+    if len(applied) > 0:
+        run_data_backfills()
+    return applied
@@ -0,0 +1,132 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from app.schemas.records import ListingPage, ListingRecord, OrderPage, OrderRecord
+from app.services.async_analytics_service import fetch_all
+from app.services.date_range import make_day_range
+
+PAGE_SIZE_MAX = 500
+
+
+def encode_cursor(at: datetime, row_id: int) -> str:
+    """
+    opaque keyset cursor: the (timestamp, id) of the last row on the page.
+    """
+    raw = json.dumps({"at": at.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[Optional[datetime], Optional[int]]:
+    if cursor is None or cursor == "":
+        return (None, None)
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (datetime.fromisoformat(data["at"]), int(data["id"]))
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def build_page_params(
+    seller_id: int,
+    limit: int,
+    cursor: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    category: Optional[str],
+) -> dict:
+    if limit < 1:
+        limit = 1
+    elif limit > PAGE_SIZE_MAX:
+        limit = PAGE_SIZE_MAX
+
+    after_at, after_id = decode_cursor(cursor)
+    start_at, end_at = make_day_range(date_from, date_to)
+    return {
+        "seller_id": seller_id,
+        "start_at": start_at,
+        "end_at": end_at,
+        "after_at": after_at,
+        "after_id": after_id,
+        "category": category,
+        # one extra row tells us whether there is a next page
+        "limit": limit + 1,
+    }
+
+
+def build_order_record(row: dict) -> OrderRecord:
+    return OrderRecord(
+        order_id=int(row["order_id"]),
+        listing_id=int(row["listing_id"]),
+        title=str(row.get("title") or ""),
+        category=str(row.get("category") or ""),
+        sold_at=row["sold_at"],
+        sold_price_cents=int(row.get("sold_price_cents") or 0),
+        total_fees_cents=int(row.get("total_fees_cents") or 0),
+        refunded_cents=int(row.get("refunded_cents") or 0),
+        fees_refunded_cents=int(row.get("fees_refunded_cents") or 0),
+    )
+
+
+def build_listing_record(row: dict) -> ListingRecord:
+    return ListingRecord(
+        listing_id=int(row["listing_id"]),
+        title=str(row.get("title") or ""),
+        category=str(row.get("category") or ""),
+        list_price_cents=int(row.get("list_price_cents") or 0),
+        listed_at=row["listed_at"],
+        first_sold_at=row.get("first_sold_at"),
+        sold=row.get("first_sold_at") is not None,
+    )
+
+
+async def get_orders_page(
+    seller_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+) -> OrderPage:
+    """
+    newest first, keyset paginated on (sold_at, id) so deep pages cost the same as the first one.
+    raises ValueError for a bad cursor or date range.
+    """
+    params = build_page_params(seller_id, limit, cursor, date_from, date_to, category)
+    page_size = params["limit"] - 1
+
+    rows = await fetch_all("orders_page", params)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = encode_cursor(last["sold_at"], int(last["order_id"]))
+
+    return OrderPage(items=[build_order_record(row) for row in rows[:page_size]], next_cursor=next_cursor)
+
+
+async def get_listings_page(
+    seller_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+) -> ListingPage:
+    """
+    newest first, keyset paginated on (listed_at, id). raises ValueError for a bad cursor or date range.
+    """
+    params = build_page_params(seller_id, limit, cursor, date_from, date_to, category)
+    page_size = params["limit"] - 1
+
+    rows = await fetch_all("listings_page", params)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = encode_cursor(last["listed_at"], int(last["listing_id"]))
+
+    return ListingPage(items=[build_listing_record(row) for row in rows[:page_size]], next_cursor=next_cursor)
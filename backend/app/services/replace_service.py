@@ -0,0 +1,283 @@
+from typing import Callable, Iterable, Optional
+
+import psycopg
+
+from app.services.ingest_service import (
+    BATCH_SIZE,
+    copy_rows_to_staging,
+    create_staging_table,
+    drop_staging_table,
+)
+from app.services.rollup_service import (
+    apply_touched_orders_to_rollups,
+    refresh_listing_counts,
+    refresh_touched_first_sold_at,
+)
+
+ORDER_VALUE_COLUMNS = (
+    "sold_price_cents",
+    "depop_fee_cents",
+    "payment_fee_cents",
+    "boosting_fee_cents",
+    "shipping_cost_cents",
+    "refunded_cents",
+    "fees_refunded_cents",
+)
+
+
+def order_hash_sql(alias: str) -> str:
+    """
+    content hash of an order's money columns. orders are matched on order_key (which leaves the
+    money out), so a matched pair with a different hash is an update instead of a delete + insert.
+    """
+    return "md5(concat_ws('|', " + ", ".join(alias + "." + col for col in ORDER_VALUE_COLUMNS) + "))"
+
+
+def stage_all_rows(
+    conn: psycopg.Connection,
+    parsed_rows: Iterable[Optional[tuple]],
+    batch_size: int,
+    on_progress: Optional[Callable[[int, int], None]],
+) -> tuple[int, int]:
+    """
+    unlike load_parsed_rows the staging table is never truncated: the diff needs the whole file.
+    this returns: (rows_processed, rows_skipped)
+    """
+    create_staging_table(conn)
+
+    row_num = 0
+    rows_skipped = 0
+    batch = list()
+    for parsed in parsed_rows:
+        if parsed is None:
+            rows_skipped += 1
+            continue
+        batch.append((row_num,) + parsed)
+        row_num += 1
+        if len(batch) >= batch_size:
+            copy_rows_to_staging(conn, batch)
+            batch.clear()
+            if on_progress is not None:
+                on_progress(row_num, rows_skipped)
+
+    if len(batch) > 0:
+        copy_rows_to_staging(conn, batch)
+        if on_progress is not None:
+            on_progress(row_num, rows_skipped)
+
+    return row_num, rows_skipped
+
+
+def replace_seller_data(
+    conn: psycopg.Connection,
+    seller_id: int,
+    parsed_rows: Iterable[Optional[tuple]],
+    batch_size: int = BATCH_SIZE,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """
+    this makes the seller's listings/orders equal to parsed_rows by applying a set diff against
+    the stored rows, so a corrected line touches one row instead of rewriting the whole history.
+    listings are keyed by source_key and orders by order_key plus a content hash; when the upload
+    repeats a key the last row wins. must run inside the caller's transaction.
+    the rollups are adjusted by the orders the diff touches (deleted, updated, inserted, or whose
+    listing changed), see apply_touched_orders_to_rollups, so an edit costs the size of the edit.
+    this returns: the rows_processed / rows_skipped and inserted / updated / deleted counts, plus
+    orders_unchanged (already stored as uploaded) and orders_duplicate (repeats within the upload).
+    """
+    rows_processed, rows_skipped = stage_all_rows(conn, parsed_rows, batch_size, on_progress)
+    params = {"seller_id": seller_id}
+    counts = {
+        "rows_processed": rows_processed,
+        "rows_skipped": rows_skipped,
+    }
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE replace_incoming_orders ON COMMIT DROP AS
+            SELECT DISTINCT ON (s.order_key) s.*, {order_hash_sql("s")} AS content_hash
+            FROM ingest_staging s
+            ORDER BY s.order_key, s.row_num DESC;
+            """
+        )
+        counts["orders_duplicate"] = rows_processed - cur.rowcount
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE replace_existing_orders ON COMMIT DROP AS
+            SELECT o.id, o.sold_at, o.listing_id, o.order_key, {order_hash_sql("o")} AS content_hash
+            FROM orders o
+            WHERE o.seller_id = %(seller_id)s;
+            """,
+            params,
+        )
+        cur.execute(
+            """
+            CREATE TEMP TABLE replace_incoming_listings ON COMMIT DROP AS
+            SELECT DISTINCT ON (s.source_key)
+                s.source_key,
+                s.title,
+                s.category,
+                s.list_price_cents,
+                s.listed_at
+            FROM ingest_staging s
+            ORDER BY s.source_key, s.row_num DESC;
+            """
+        )
+
+        # every stored order whose rollup contribution the diff can change
+        cur.execute(
+            """
+            CREATE TEMP TABLE replace_touched_orders ON COMMIT DROP AS
+            SELECT e.id, e.sold_at, e.listing_id
+            FROM replace_existing_orders e
+            JOIN listings l ON l.id = e.listing_id
+            LEFT JOIN replace_incoming_orders i ON i.order_key = e.order_key
+            LEFT JOIN replace_incoming_listings r ON r.source_key = l.source_key
+            WHERE i.order_key IS NULL
+               OR i.content_hash <> e.content_hash
+               OR r.source_key IS NULL
+               OR (l.title, l.category, l.list_price_cents, l.listed_at)
+                  IS DISTINCT FROM (r.title, r.category, r.list_price_cents, r.listed_at);
+            """
+        )
+        cur.execute(
+            """
+            SELECT COUNT(*) AS unchanged
+            FROM replace_existing_orders e
+            JOIN replace_incoming_orders i ON i.order_key = e.order_key
+            WHERE i.content_hash = e.content_hash;
+            """
+        )
+        counts["orders_unchanged"] = int(cur.fetchone()["unchanged"])
+
+    apply_touched_orders_to_rollups(conn, seller_id, -1)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM orders o
+            USING replace_existing_orders e
+            WHERE o.id = e.id
+              AND o.sold_at = e.sold_at
+              AND NOT EXISTS (
+                  SELECT 1 FROM replace_incoming_orders i WHERE i.order_key = e.order_key
+              );
+            """
+        )
+        counts["orders_deleted"] = cur.rowcount
+
+        # their orders are gone by now: an order's key includes its listing's source_key
+        cur.execute(
+            """
+            DELETE FROM listings l
+            WHERE l.seller_id = %(seller_id)s
+              AND NOT EXISTS (
+                  SELECT 1 FROM replace_incoming_listings r WHERE r.source_key = l.source_key
+              );
+            """,
+            params,
+        )
+        counts["listings_deleted"] = cur.rowcount
+
+        cur.execute(
+            """
+            UPDATE listings l
+            SET
+                title = r.title,
+                category = r.category,
+                list_price_cents = r.list_price_cents,
+                listed_at = r.listed_at
+            FROM replace_incoming_listings r
+            WHERE l.seller_id = %(seller_id)s
+              AND l.source_key = r.source_key
+              AND (l.title, l.category, l.list_price_cents, l.listed_at)
+                  IS DISTINCT FROM (r.title, r.category, r.list_price_cents, r.listed_at);
+            """,
+            params,
+        )
+        counts["listings_updated"] = cur.rowcount
+
+        cur.execute(
+            """
+            INSERT INTO listings (seller_id, source_key, title, category, list_price_cents, listed_at)
+            SELECT %(seller_id)s, r.source_key, r.title, r.category, r.list_price_cents, r.listed_at
+            FROM replace_incoming_listings r
+            WHERE NOT EXISTS (
+                SELECT 1 FROM listings l WHERE l.seller_id = %(seller_id)s AND l.source_key = r.source_key
+            );
+            """,
+            params,
+        )
+        counts["listings_inserted"] = cur.rowcount
+
+        cur.execute(
+            """
+            UPDATE orders o
+            SET
+                sold_price_cents = i.sold_price_cents,
+                depop_fee_cents = i.depop_fee_cents,
+                payment_fee_cents = i.payment_fee_cents,
+                boosting_fee_cents = i.boosting_fee_cents,
+                shipping_cost_cents = i.shipping_cost_cents,
+                refunded_cents = i.refunded_cents,
+                fees_refunded_cents = i.fees_refunded_cents
+            FROM replace_existing_orders e
+            JOIN replace_incoming_orders i ON i.order_key = e.order_key
+            WHERE o.id = e.id
+              AND o.sold_at = e.sold_at
+              AND i.content_hash <> e.content_hash;
+            """
+        )
+        counts["orders_updated"] = cur.rowcount
+
+        cur.execute(
+            """
+            WITH inserted AS (
+                INSERT INTO orders (
+                    listing_id, seller_id, order_key, sold_price_cents, sold_at,
+                    depop_fee_cents, payment_fee_cents, boosting_fee_cents,
+                    shipping_cost_cents, refunded_cents, fees_refunded_cents
+                )
+                SELECT
+                    l.id, %(seller_id)s, i.order_key, i.sold_price_cents, i.sold_at,
+                    i.depop_fee_cents, i.payment_fee_cents, i.boosting_fee_cents,
+                    i.shipping_cost_cents, i.refunded_cents, i.fees_refunded_cents
+                FROM replace_incoming_orders i
+                JOIN listings l
+                    ON l.seller_id = %(seller_id)s
+                   AND l.source_key = i.source_key
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM replace_existing_orders e WHERE e.order_key = i.order_key
+                )
+                ORDER BY i.row_num
+                RETURNING id, sold_at, listing_id
+            )
+            INSERT INTO replace_touched_orders (id, sold_at, listing_id)
+            SELECT id, sold_at, listing_id FROM inserted;
+            """,
+            params,
+        )
+        counts["orders_inserted"] = cur.rowcount
+
+    counts["changed"] = any(
+        counts[name] > 0
+        for name in (
+            "listings_inserted", "listings_updated", "listings_deleted",
+            "orders_inserted", "orders_updated", "orders_deleted",
+        )
+    )
+    if counts["changed"]:
+        # deleted orders are gone, so this adds back the updated, moved and inserted ones
+        apply_touched_orders_to_rollups(conn, seller_id, 1)
+        refresh_touched_first_sold_at(conn)
+        refresh_listing_counts(conn, seller_id)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "DROP TABLE replace_incoming_orders, replace_existing_orders, replace_incoming_listings, "
+            "replace_touched_orders;"
+        )
+    drop_staging_table(conn)
+
+    return counts
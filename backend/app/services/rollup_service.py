@@ -0,0 +1,459 @@
+import psycopg
+
+
+def refresh_listing_counts(conn: psycopg.Connection, seller_id: int) -> None:
+    """
+    this recounts listed/active listings for one seller. it only runs on the write path
+    (ingest/replace); active listings come from the maintained first_sold_at and its partial
+    index, so there is no anti-join against orders.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO seller_totals (seller_id, listed_count, active_listings)
+            SELECT
+                %(seller_id)s,
+                (SELECT COUNT(*) FROM listings l WHERE l.seller_id = %(seller_id)s)::int,
+                (
+                    SELECT COUNT(*)
+                    FROM listings l
+                    WHERE l.seller_id = %(seller_id)s
+                      AND l.first_sold_at IS NULL
+                )::int
+            ON CONFLICT (seller_id)
+            DO UPDATE SET
+                listed_count = EXCLUDED.listed_count,
+                active_listings = EXCLUDED.active_listings,
+                updated_at = NOW();
+            """,
+            {"seller_id": seller_id},
+        )
+
+
+def mark_staged_listings_sold(conn: psycopg.Connection, seller_id: int) -> None:
+    """
+    this moves first_sold_at back to the earliest sale of the orders now in ingest_staging.
+    must run after merge_staging, inside the same transaction.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE listings l
+            SET first_sold_at = s.first_sold_at
+            FROM (
+                SELECT source_key, MIN(sold_at) AS first_sold_at
+                FROM ingest_staging
+                GROUP BY source_key
+            ) s
+            WHERE l.seller_id = %(seller_id)s
+              AND l.source_key = s.source_key
+              AND (l.first_sold_at IS NULL OR l.first_sold_at > s.first_sold_at);
+            """,
+            {"seller_id": seller_id},
+        )
+
+
+def refresh_first_sold_at(conn: psycopg.Connection, seller_id: int) -> None:
+    """
+    this recomputes first_sold_at for all of one seller's listings (after orders were deleted or moved).
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE listings l
+            SET first_sold_at = x.first_sold_at
+            FROM (
+                SELECT l2.id, MIN(o.sold_at) AS first_sold_at
+                FROM listings l2
+                LEFT JOIN orders o ON o.listing_id = l2.id
+                WHERE l2.seller_id = %(seller_id)s
+                GROUP BY l2.id
+            ) x
+            WHERE l.id = x.id
+              AND l.first_sold_at IS DISTINCT FROM x.first_sold_at;
+            """,
+            {"seller_id": seller_id},
+        )
+
+
+def backfill_first_sold_at(conn: psycopg.Connection) -> int:
+    """
+    this fills first_sold_at for sold listings that predate the column and returns how many were set.
+    only unsold-looking listings are probed, so after the first run this is cheap.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE listings l
+            SET first_sold_at = (SELECT MIN(o.sold_at) FROM orders o WHERE o.listing_id = l.id)
+            WHERE l.first_sold_at IS NULL
+              AND EXISTS (SELECT 1 FROM orders o WHERE o.listing_id = l.id);
+            """
+        )
+        return cur.rowcount
+
+
+def apply_staging_to_rollups(conn: psycopg.Connection, seller_id: int) -> None:
+    """
+    this adds the orders currently in ingest_staging onto the seller's rollup rows.
+    must run after merge_staging, inside the same transaction.
+    """
+    params = {"seller_id": seller_id}
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO seller_totals (
+                seller_id, units_sold, gmv_cents, total_fees_cents,
+                refunded_cents, fees_refunded_cents, days_to_sell_sum
+            )
+            SELECT
+                %(seller_id)s,
+                COUNT(*)::int,
+                COALESCE(SUM(s.sold_price_cents), 0),
+                COALESCE(SUM(s.depop_fee_cents + s.payment_fee_cents + s.boosting_fee_cents + s.shipping_cost_cents), 0),
+                COALESCE(SUM(s.refunded_cents), 0),
+                COALESCE(SUM(s.fees_refunded_cents), 0),
+                COALESCE(SUM(EXTRACT(EPOCH FROM (s.sold_at - l.listed_at)) / 86400.0), 0)
+            FROM ingest_staging s
+            JOIN listings l
+                ON l.seller_id = %(seller_id)s
+               AND l.source_key = s.source_key
+            ON CONFLICT (seller_id)
+            DO UPDATE SET
+                units_sold = seller_totals.units_sold + EXCLUDED.units_sold,
+                gmv_cents = seller_totals.gmv_cents + EXCLUDED.gmv_cents,
+                total_fees_cents = seller_totals.total_fees_cents + EXCLUDED.total_fees_cents,
+                refunded_cents = seller_totals.refunded_cents + EXCLUDED.refunded_cents,
+                fees_refunded_cents = seller_totals.fees_refunded_cents + EXCLUDED.fees_refunded_cents,
+                days_to_sell_sum = seller_totals.days_to_sell_sum + EXCLUDED.days_to_sell_sum,
+                updated_at = NOW();
+            """,
+            params,
+        )
+
+        cur.execute(
+            """
+            INSERT INTO seller_monthly_sales (
+                seller_id, month, units_sold, revenue_cents,
+                total_fees_cents, refunded_cents, fees_refunded_cents
+            )
+            SELECT
+                %(seller_id)s,
+                TO_CHAR(s.sold_at, 'YYYY-MM'),
+                COUNT(*)::int,
+                SUM(s.sold_price_cents),
+                SUM(s.depop_fee_cents + s.payment_fee_cents + s.boosting_fee_cents + s.shipping_cost_cents),
+                SUM(s.refunded_cents),
+                SUM(s.fees_refunded_cents)
+            FROM ingest_staging s
+            GROUP BY TO_CHAR(s.sold_at, 'YYYY-MM')
+            ON CONFLICT (seller_id, month)
+            DO UPDATE SET
+                units_sold = seller_monthly_sales.units_sold + EXCLUDED.units_sold,
+                revenue_cents = seller_monthly_sales.revenue_cents + EXCLUDED.revenue_cents,
+                total_fees_cents = seller_monthly_sales.total_fees_cents + EXCLUDED.total_fees_cents,
+                refunded_cents = seller_monthly_sales.refunded_cents + EXCLUDED.refunded_cents,
+                fees_refunded_cents = seller_monthly_sales.fees_refunded_cents + EXCLUDED.fees_refunded_cents;
+            """,
+            params,
+        )
+
+        cur.execute(
+            """
+            INSERT INTO seller_category_sales (seller_id, category, units_sold, revenue_cents)
+            SELECT
+                %(seller_id)s,
+                l.category,
+                COUNT(*)::int,
+                SUM(s.sold_price_cents)
+            FROM ingest_staging s
+            JOIN listings l
+                ON l.seller_id = %(seller_id)s
+               AND l.source_key = s.source_key
+            GROUP BY l.category
+            ON CONFLICT (seller_id, category)
+            DO UPDATE SET
+                units_sold = seller_category_sales.units_sold + EXCLUDED.units_sold,
+                revenue_cents = seller_category_sales.revenue_cents + EXCLUDED.revenue_cents;
+            """,
+            params,
+        )
+
+    mark_staged_listings_sold(conn, seller_id)
+    refresh_listing_counts(conn, seller_id)
+
+
+def apply_touched_orders_to_rollups(conn: psycopg.Connection, seller_id: int, sign: int) -> None:
+    """
+    this adds (sign=1) or subtracts (sign=-1) what the orders listed in replace_touched_orders
+    currently contribute to the seller's rollup rows, and drops month/category rows left empty.
+    replace uploads subtract the orders a diff will touch before applying it and add them back
+    after, so only those orders are read instead of the seller's whole history.
+    """
+    params = {"seller_id": seller_id, "sign": sign}
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO seller_totals (
+                seller_id, units_sold, gmv_cents, total_fees_cents,
+                refunded_cents, fees_refunded_cents, days_to_sell_sum
+            )
+            SELECT
+                %(seller_id)s,
+                %(sign)s * COUNT(*)::int,
+                %(sign)s * COALESCE(SUM(o.sold_price_cents), 0),
+                %(sign)s * COALESCE(SUM(o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents), 0),
+                %(sign)s * COALESCE(SUM(o.refunded_cents), 0),
+                %(sign)s * COALESCE(SUM(o.fees_refunded_cents), 0),
+                %(sign)s * COALESCE(SUM(EXTRACT(EPOCH FROM (o.sold_at - l.listed_at)) / 86400.0), 0)
+            FROM replace_touched_orders t
+            JOIN orders o ON o.id = t.id AND o.sold_at = t.sold_at
+            JOIN listings l ON l.id = o.listing_id
+            HAVING COUNT(*) > 0
+            ON CONFLICT (seller_id)
+            DO UPDATE SET
+                units_sold = seller_totals.units_sold + EXCLUDED.units_sold,
+                gmv_cents = seller_totals.gmv_cents + EXCLUDED.gmv_cents,
+                total_fees_cents = seller_totals.total_fees_cents + EXCLUDED.total_fees_cents,
+                refunded_cents = seller_totals.refunded_cents + EXCLUDED.refunded_cents,
+                fees_refunded_cents = seller_totals.fees_refunded_cents + EXCLUDED.fees_refunded_cents,
+                days_to_sell_sum = seller_totals.days_to_sell_sum + EXCLUDED.days_to_sell_sum,
+                updated_at = NOW();
+            """,
+            params,
+        )
+
+        cur.execute(
+            """
+            INSERT INTO seller_monthly_sales (
+                seller_id, month, units_sold, revenue_cents,
+                total_fees_cents, refunded_cents, fees_refunded_cents
+            )
+            SELECT
+                %(seller_id)s,
+                TO_CHAR(o.sold_at, 'YYYY-MM'),
+                %(sign)s * COUNT(*)::int,
+                %(sign)s * SUM(o.sold_price_cents),
+                %(sign)s * SUM(o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents),
+                %(sign)s * SUM(o.refunded_cents),
+                %(sign)s * SUM(o.fees_refunded_cents)
+            FROM replace_touched_orders t
+            JOIN orders o ON o.id = t.id AND o.sold_at = t.sold_at
+            GROUP BY TO_CHAR(o.sold_at, 'YYYY-MM')
+            ON CONFLICT (seller_id, month)
+            DO UPDATE SET
+                units_sold = seller_monthly_sales.units_sold + EXCLUDED.units_sold,
+                revenue_cents = seller_monthly_sales.revenue_cents + EXCLUDED.revenue_cents,
+                total_fees_cents = seller_monthly_sales.total_fees_cents + EXCLUDED.total_fees_cents,
+                refunded_cents = seller_monthly_sales.refunded_cents + EXCLUDED.refunded_cents,
+                fees_refunded_cents = seller_monthly_sales.fees_refunded_cents + EXCLUDED.fees_refunded_cents;
+            """,
+            params,
+        )
+
+        cur.execute(
+            """
+            INSERT INTO seller_category_sales (seller_id, category, units_sold, revenue_cents)
+            SELECT
+                %(seller_id)s,
+                l.category,
+                %(sign)s * COUNT(*)::int,
+                %(sign)s * SUM(o.sold_price_cents)
+            FROM replace_touched_orders t
+            JOIN orders o ON o.id = t.id AND o.sold_at = t.sold_at
+            JOIN listings l ON l.id = o.listing_id
+            GROUP BY l.category
+            ON CONFLICT (seller_id, category)
+            DO UPDATE SET
+                units_sold = seller_category_sales.units_sold + EXCLUDED.units_sold,
+                revenue_cents = seller_category_sales.revenue_cents + EXCLUDED.revenue_cents;
+            """,
+            params,
+        )
+
+        cur.execute(
+            "DELETE FROM seller_monthly_sales WHERE seller_id = %(seller_id)s AND units_sold = 0;", params
+        )
+        cur.execute(
+            "DELETE FROM seller_category_sales WHERE seller_id = %(seller_id)s AND units_sold = 0;", params
+        )
+
+
+def refresh_touched_first_sold_at(conn: psycopg.Connection) -> None:
+    """
+    refresh_first_sold_at for just the listings of the orders in replace_touched_orders.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE listings l
+            SET first_sold_at = x.first_sold_at
+            FROM (
+                SELECT l2.id, MIN(o.sold_at) AS first_sold_at
+                FROM listings l2
+                LEFT JOIN orders o ON o.listing_id = l2.id
+                WHERE l2.id IN (SELECT t.listing_id FROM replace_touched_orders t)
+                GROUP BY l2.id
+            ) x
+            WHERE l.id = x.id
+              AND l.first_sold_at IS DISTINCT FROM x.first_sold_at;
+            """
+        )
+
+
+def clear_seller_rollups(conn: psycopg.Connection, seller_id: int) -> None:
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM seller_monthly_sales WHERE seller_id = %s;", (seller_id,))
+        cur.execute("DELETE FROM seller_category_sales WHERE seller_id = %s;", (seller_id,))
+        cur.execute("DELETE FROM seller_totals WHERE seller_id = %s;", (seller_id,))
+
+
+def rebuild_seller_rollups(conn: psycopg.Connection, seller_id: int) -> None:
+    """
+    this recomputes all rollup rows for one seller from the raw orders/listings tables.
+    """
+    params = {"seller_id": seller_id}
+    clear_seller_rollups(conn, seller_id)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO seller_totals (
+                seller_id, units_sold, gmv_cents, total_fees_cents,
+                refunded_cents, fees_refunded_cents, days_to_sell_sum
+            )
+            SELECT
+                %(seller_id)s,
+                COUNT(*)::int,
+                COALESCE(SUM(o.sold_price_cents), 0),
+                COALESCE(SUM(o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents), 0),
+                COALESCE(SUM(o.refunded_cents), 0),
+                COALESCE(SUM(o.fees_refunded_cents), 0),
+                COALESCE(SUM(EXTRACT(EPOCH FROM (o.sold_at - l.listed_at)) / 86400.0), 0)
+            FROM orders o
+            JOIN listings l ON l.id = o.listing_id
+            WHERE o.seller_id = %(seller_id)s;
+            """,
+            params,
+        )
+
+        cur.execute(
+            """
+            INSERT INTO seller_monthly_sales (
+                seller_id, month, units_sold, revenue_cents,
+                total_fees_cents, refunded_cents, fees_refunded_cents
+            )
+            SELECT
+                %(seller_id)s,
+                TO_CHAR(o.sold_at, 'YYYY-MM'),
+                COUNT(*)::int,
+                SUM(o.sold_price_cents),
+                SUM(o.depop_fee_cents + o.payment_fee_cents + o.boosting_fee_cents + o.shipping_cost_cents),
+                SUM(o.refunded_cents),
+                SUM(o.fees_refunded_cents)
+            FROM orders o
+            WHERE o.seller_id = %(seller_id)s
+            GROUP BY TO_CHAR(o.sold_at, 'YYYY-MM');
+            """,
+            params,
+        )
+
+        cur.execute(
+            """
+            INSERT INTO seller_category_sales (seller_id, category, units_sold, revenue_cents)
+            SELECT
+                %(seller_id)s,
+                l.category,
+                COUNT(*)::int,
+                SUM(o.sold_price_cents)
+            FROM orders o
+            JOIN listings l ON l.id = o.listing_id
+            WHERE o.seller_id = %(seller_id)s
+            GROUP BY l.category;
+            """,
+            params,
+        )
+
+    refresh_first_sold_at(conn, seller_id)
+    refresh_listing_counts(conn, seller_id)
+
+
+def verify_seller_rollups(conn: psycopg.Connection, seller_id: int) -> list[str]:
+    """
+    this compares the stored rollups with a fresh aggregate over the raw tables
+    and returns a list of human readable mismatches (empty when they agree).
+    """
+    snapshots = list()
+    with conn.transaction(force_rollback=True):
+        snapshots.append(read_rollup_snapshot(conn, seller_id))
+        rebuild_seller_rollups(conn, seller_id)
+        snapshots.append(read_rollup_snapshot(conn, seller_id))
+
+    stored, expected = snapshots
+    mismatches = list()
+    for section in ("totals", "monthly", "category"):
+        if stored[section] != expected[section]:
+            mismatches.append(
+                f"seller {seller_id} {section}: stored={stored[section]} expected={expected[section]}"
+            )
+    return mismatches
+
+
+def read_rollup_snapshot(conn: psycopg.Connection, seller_id: int) -> dict:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT listed_count, active_listings, units_sold, gmv_cents, total_fees_cents,
+                   refunded_cents, fees_refunded_cents, ROUND(days_to_sell_sum::numeric, 3) AS days_to_sell_sum
+            FROM seller_totals
+            WHERE seller_id = %s;
+            """,
+            (seller_id,),
+        )
+        totals = cur.fetchone()
+
+        cur.execute(
+            """
+            SELECT month, units_sold, revenue_cents, total_fees_cents, refunded_cents, fees_refunded_cents
+            FROM seller_monthly_sales
+            WHERE seller_id = %s AND units_sold <> 0
+            ORDER BY month;
+            """,
+            (seller_id,),
+        )
+        monthly = cur.fetchall()
+
+        cur.execute(
+            """
+            SELECT category, units_sold, revenue_cents
+            FROM seller_category_sales
+            WHERE seller_id = %s AND units_sold <> 0
+            ORDER BY category;
+            """,
+            (seller_id,),
+        )
+        category = cur.fetchall()
+
+    return {"totals": totals, "monthly": monthly, "category": category}
+
+
+def backfill_missing_rollups(conn: psycopg.Connection) -> int:
+    """
+    this builds rollups for sellers that have none yet (e.g. data loaded before the
+    rollup tables existed) and returns how many sellers were rebuilt.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT s.id
+            FROM sellers s
+            LEFT JOIN seller_totals t ON t.seller_id = s.id
+            WHERE t.seller_id IS NULL
+            ORDER BY s.id;
+            """
+        )
+        rows = cur.fetchall()
+
+    for row in rows:
+        rebuild_seller_rollups(conn, int(row["id"]))
+    return len(rows)
@@ -0,0 +1,154 @@
+"""
+summary latency for one large seller (needs a database, see DATABASE_URL / DB_* env vars).
+
+seeds a throwaway seller with --listings listings (--sold-ratio of them sold) inside a transaction
+that is rolled back at the end, then times:
+    legacy      the original seller_summary.sql (listed / sold / LEFT JOIN anti-join CTEs)
+    counts      refresh_listing_counts (write path; active listings via first_sold_at + partial index)
+    rollup      seller_summary.sql as served today (one seller_totals row)
+    range_30d   seller_summary_range.sql for the last 30 days
+
+usage (from backend/):
+    python -m benchmarks.bench_summary [--listings 100000] [--sold-ratio 0.6] [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.db.connection import get_db_conn
+from app.db.partitions import ensure_order_partitions_between, is_orders_partitioned
+from app.db.queries import get_query
+from app.services.rollup_service import rebuild_seller_rollups, refresh_listing_counts
+
+LEGACY_SUMMARY_SQL = """
+WITH
+listed AS (
+  SELECT COUNT(*)::int AS listed_count
+  FROM listings
+  WHERE seller_id = %(seller_id)s
+),
+sold AS (
+  SELECT
+    COUNT(*)::int AS units_sold,
+    COALESCE(SUM(o.sold_price_cents), 0)::bigint AS gmv_cents,
+    AVG(EXTRACT(EPOCH FROM (o.sold_at - l.listed_at)) / 86400.0)::float AS avg_days_to_sell
+  FROM orders o
+  JOIN listings l ON l.id = o.listing_id
+  WHERE o.seller_id = %(seller_id)s
+),
+active AS (
+  SELECT COUNT(*)::int AS active_listings
+  FROM listings l
+  LEFT JOIN orders o ON o.listing_id = l.id
+  WHERE l.seller_id = %(seller_id)s
+    AND o.id IS NULL
+)
+SELECT listed.listed_count, sold.units_sold, sold.gmv_cents, sold.avg_days_to_sell, active.active_listings
+FROM listed, sold, active;
+"""
+
+
+def seed_seller(conn, listings: int, sold_ratio: float) -> int:
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO sellers (username) VALUES (%s) RETURNING id;",
+            ("bench-summary-" + uuid.uuid4().hex[:8],),
+        )
+        seller_id = int(cur.fetchone()["id"])
+
+        cur.execute(
+            """
+            INSERT INTO listings (seller_id, source_key, title, category, list_price_cents, listed_at)
+            SELECT
+                %(seller_id)s,
+                'bench-' || i,
+                'Item ' || i,
+                (ARRAY['Tops', 'Jeans', 'Jackets', 'Shoes', 'Accessories'])[1 + i %% 5],
+                500 + (i %% 80) * 100,
+                NOW() - ((i %% 730) || ' days')::interval
+            FROM generate_series(1, %(listings)s) AS i;
+            """,
+            {"seller_id": seller_id, "listings": listings},
+        )
+
+        if is_orders_partitioned(conn):
+            now = datetime.now()
+            ensure_order_partitions_between(conn, now - timedelta(days=731), now + timedelta(days=61))
+        cur.execute(
+            """
+            INSERT INTO orders (
+                listing_id, seller_id, order_key, sold_price_cents, sold_at,
+                depop_fee_cents, payment_fee_cents, shipping_cost_cents
+            )
+            SELECT
+                l.id, l.seller_id, 'bench-' || l.id, l.list_price_cents,
+                l.listed_at + ((l.id %% 60) || ' days')::interval,
+                l.list_price_cents / 10, l.list_price_cents / 30, 450
+            FROM listings l
+            WHERE l.seller_id = %(seller_id)s
+              AND random() < %(sold_ratio)s;
+            """,
+            {"seller_id": seller_id, "sold_ratio": sold_ratio},
+        )
+
+        rebuild_seller_rollups(conn, seller_id)
+        cur.execute("ANALYZE listings;")
+        cur.execute("ANALYZE orders;")
+
+    return seller_id
+
+
+def time_ms(fn, repeat: int) -> tuple[float, float]:
+    samples = list()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(round(len(samples) * 0.95)) - 1)]
+    return statistics.median(samples), p95
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark seller summary latency for a large seller")
+    parser.add_argument("--listings", type=int, default=100000)
+    parser.add_argument("--sold-ratio", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    conn = get_db_conn()
+    try:
+        with conn.transaction(force_rollback=True):
+            started = time.perf_counter()
+            seller_id = seed_seller(conn, args.listings, args.sold_ratio)
+            print(f"seeded {args.listings:,} listings in {time.perf_counter() - started:.1f}s (rolled back at exit)")
+
+            params = {"seller_id": seller_id}
+            end_at = datetime.now() + timedelta(days=1)
+            range_params = {"seller_id": seller_id, "start_at": end_at - timedelta(days=31), "end_at": end_at}
+
+            def run(sql: str, query_params: dict):
+                def fn():
+                    with conn.cursor() as cur:
+                        cur.execute(sql, query_params)
+                        cur.fetchall()
+                return fn
+
+            cases = [
+                ("legacy", run(LEGACY_SUMMARY_SQL, params)),
+                ("counts", lambda: refresh_listing_counts(conn, seller_id)),
+                ("rollup", run(get_query("seller_summary"), params)),
+                ("range_30d", run(get_query("seller_summary_range"), range_params)),
+            ]
+            for name, fn in cases:
+                fn()
+                median_ms, p95_ms = time_ms(fn, args.repeat)
+                print(f"{name:<10} median {median_ms:9.2f} ms   p95 {p95_ms:9.2f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+seller_cached keys and the in-process LruCache, without a database.
+
+usage (from backend/):
+    python -m pytest tests/test_analytics_cache.py
+"""
+import asyncio
+from typing import Optional
+
+import pytest
+
+from app.services import cache_service
+from app.services.cache_service import LruCache, make_cache_key, seller_cached
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    cache = LruCache(max_entries=16, ttl_seconds=60)
+    monkeypatch.setattr(cache_service, "CACHE_ENABLED", True)
+    monkeypatch.setattr(cache_service, "cache_backend", cache)
+    return cache
+
+
+def make_counted(calls: list):
+    @seller_cached("top_items", list[int])
+    async def top_items(seller_id: int, limit: int, date_from: Optional[str] = None) -> list[int]:
+        calls.append((seller_id, limit, date_from))
+        return list(range(limit))
+
+    return top_items
+
+
+def test_cache_key_lists_arguments_by_name():
+    key = make_cache_key("summary", 7, 3, {"date_from": None, "limit": 10})
+    assert key == "analytics:summary:7:v3:date_from=None:limit=10"
+
+
+def test_positional_and_keyword_calls_share_an_entry(backend):
+    calls = list()
+    top_items = make_counted(calls)
+
+    first = asyncio.run(top_items(1, 3, data_version=5))
+    second = asyncio.run(top_items(1, limit=3, data_version=5))
+    third = asyncio.run(top_items(1, 3, None, data_version=5))
+
+    assert first == second == third == [0, 1, 2]
+    assert calls == [(1, 3, None)]
+
+
+def test_key_includes_seller_version_and_arguments(backend):
+    calls = list()
+    top_items = make_counted(calls)
+
+    asyncio.run(top_items(1, 3, data_version=5))
+    asyncio.run(top_items(2, 3, data_version=5))
+    asyncio.run(top_items(1, 3, data_version=6))
+    asyncio.run(top_items(1, 4, data_version=5))
+    asyncio.run(top_items(1, 3, date_from="2024-01-01", data_version=5))
+
+    assert len(calls) == 5
+
+
+def test_without_data_version_nothing_is_cached(backend):
+    calls = list()
+    top_items = make_counted(calls)
+
+    asyncio.run(top_items(1, 3))
+    asyncio.run(top_items(1, 3))
+
+    assert len(calls) == 2
+
+
+def test_lru_evicts_oldest_and_expires_entries(monkeypatch):
+    cache = LruCache(max_entries=2, ttl_seconds=10)
+    now = [100.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+
+    asyncio.run(cache.set("a", 1))
+    asyncio.run(cache.set("b", 2))
+    # reading a makes b the least recently used
+    assert asyncio.run(cache.get("a")) == 1
+    asyncio.run(cache.set("c", 3))
+    assert asyncio.run(cache.get("b")) is None
+    assert asyncio.run(cache.get("a")) == 1
+
+    now[0] += 11
+    assert asyncio.run(cache.get("a")) is None
@@ -0,0 +1,123 @@
+"""
+verify_cognito_jwt against a local jwks.json (COGNITO_JWKS_FILE) and generated RS256 keys.
+
+usage (from backend/):
+    python -m pytest tests/test_auth.py
+"""
+import json
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from app import auth
+
+CLIENT_ID = "local-client"
+
+
+def make_key(kid: str) -> dict:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    public.update(kid=kid, alg="RS256", use="sig")
+    return {"kid": kid, "pem": pem, "public": public}
+
+
+def make_token(key: dict, expires_in: int = 300, **claims) -> str:
+    payload = {"sub": "seller-1", "aud": CLIENT_ID, "iss": auth.get_issuer(), "exp": int(time.time()) + expires_in}
+    payload.update(claims)
+    return jwt.encode(payload, key["pem"], algorithm="RS256", headers={"kid": key["kid"]})
+
+
+@pytest.fixture
+def jwks(tmp_path, monkeypatch):
+    """
+    this returns a function that rewrites the jwks file with the given keys.
+    the key set and token cache are fresh per test, and an unknown kid may refetch right away.
+    """
+    path = tmp_path / "jwks.json"
+
+    def write(*keys: dict) -> None:
+        path.write_text(json.dumps({"keys": [key["public"] for key in keys]}), encoding="utf-8")
+
+    write()
+    monkeypatch.setattr(auth, "COGNITO_JWKS_FILE", str(path))
+    monkeypatch.setattr(auth, "COGNITO_REGION", "eu-west-1")
+    monkeypatch.setattr(auth, "COGNITO_USER_POOL_ID", "eu-west-1_local")
+    monkeypatch.setattr(auth, "COGNITO_APP_CLIENT_ID", CLIENT_ID)
+    monkeypatch.setattr(auth, "jwks_keys", auth.JwksKeySet(min_refetch_seconds=0))
+    monkeypatch.setattr(auth, "verified_tokens", auth.VerifiedTokenCache())
+    return write
+
+
+def test_valid_token_is_cached_and_claims_are_copies(jwks):
+    key = make_key("k1")
+    jwks(key)
+    token = make_token(key, email="seller@example.com")
+
+    first = auth.verify_cognito_jwt(token)
+    first["sub"] = "someone-else"
+    second = auth.verify_cognito_jwt(token)
+
+    assert second["sub"] == "seller-1"
+    assert second["email"] == "seller@example.com"
+    assert second is not auth.verify_cognito_jwt(token)
+    assert auth.verified_tokens.stats()["hits"] == 2
+
+
+def test_unknown_kid_refetches_jwks(jwks):
+    old_key = make_key("k1")
+    jwks(old_key)
+    assert auth.verify_cognito_jwt(make_token(old_key))["sub"] == "seller-1"
+
+    # the pool rotated in a key this process hasn't seen yet
+    new_key = make_key("k2")
+    jwks(old_key, new_key)
+    assert auth.verify_cognito_jwt(make_token(new_key))["sub"] == "seller-1"
+    assert auth.jwks_keys.has_key("k2")
+
+
+def test_unknown_kid_not_in_jwks_is_rejected(jwks):
+    jwks(make_key("k1"))
+    with pytest.raises(HTTPException) as e:
+        auth.verify_cognito_jwt(make_token(make_key("k9")))
+    assert e.value.status_code == 401
+    assert e.value.detail == "Public key not found for token"
+
+
+def test_key_removed_from_jwks_invalidates_cached_token(jwks):
+    key = make_key("k1")
+    other = make_key("k2")
+    jwks(key, other)
+    token = make_token(key)
+    auth.verify_cognito_jwt(token)
+
+    jwks(other)
+    auth.jwks_keys.refresh()
+    with pytest.raises(HTTPException) as e:
+        auth.verify_cognito_jwt(token)
+    assert e.value.status_code == 401
+
+
+def test_expired_token_is_rejected(jwks):
+    key = make_key("k1")
+    jwks(key)
+    with pytest.raises(HTTPException) as e:
+        auth.verify_cognito_jwt(make_token(key, expires_in=-60))
+    assert e.value.detail == "JWT verification failed"
+
+
+def test_bad_signature_is_rejected(jwks):
+    key = make_key("k1")
+    jwks(key)
+    # signed by a different private key under the published kid
+    forged = make_token({"kid": "k1", "pem": make_key("k1")["pem"], "public": None})
+    with pytest.raises(HTTPException) as e:
+        auth.verify_cognito_jwt(forged)
+    assert e.value.detail == "JWT verification failed"
+    assert auth.verified_tokens.stats()["entries"] == 0
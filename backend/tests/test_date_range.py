@@ -0,0 +1,84 @@
+"""
+day ranges, bucket counting and the keyset cursors of the record pages.
+
+usage (from backend/):
+    python -m pytest tests/test_date_range.py
+"""
+from datetime import date, datetime
+
+import pytest
+
+from app.services.date_range import MAX_BUCKETS, check_bucket_count, count_buckets, make_day_range
+from app.services.records_service import PAGE_SIZE_MAX, build_page_params, decode_cursor, encode_cursor
+
+
+def test_day_range_is_half_open():
+    assert make_day_range(date(2024, 3, 1), date(2024, 3, 31)) == (datetime(2024, 3, 1), datetime(2024, 4, 1))
+    assert make_day_range(None, date(2024, 12, 31)) == (None, datetime(2025, 1, 1))
+    assert make_day_range(date(2024, 3, 1), None) == (datetime(2024, 3, 1), None)
+    assert make_day_range(None, None) == (None, None)
+
+
+def test_day_range_rejects_reversed_and_last_day():
+    with pytest.raises(ValueError):
+        make_day_range(date(2024, 3, 2), date(2024, 3, 1))
+    with pytest.raises(ValueError):
+        make_day_range(None, date.max)
+
+
+@pytest.mark.parametrize(
+    "date_from, date_to, granularity, expected",
+    [
+        (date(2024, 3, 1), date(2024, 3, 1), "day", 1),
+        (date(2024, 2, 1), date(2024, 3, 1), "day", 30),
+        # monday-based weeks: sun 2024-03-10 and mon 2024-03-11 are in different weeks
+        (date(2024, 3, 10), date(2024, 3, 11), "week", 2),
+        (date(2024, 3, 11), date(2024, 3, 17), "week", 1),
+        (date(2023, 12, 31), date(2024, 1, 1), "month", 2),
+        (date(2024, 1, 15), date(2024, 12, 1), "month", 12),
+    ],
+)
+def test_count_buckets(date_from, date_to, granularity, expected):
+    assert count_buckets(date_from, date_to, granularity) == expected
+
+
+def test_bucket_cap_is_inclusive():
+    check_bucket_count(date(2024, 1, 1), date(2024, 12, 31), "day")
+    with pytest.raises(ValueError) as e:
+        check_bucket_count(date(2023, 1, 1), date(2024, 1, 2), "day")
+    assert str(MAX_BUCKETS["day"]) in str(e.value)
+
+    check_bucket_count(date(2015, 1, 1), date(2024, 12, 31), "month")
+    with pytest.raises(ValueError):
+        check_bucket_count(date(2014, 12, 1), date(2024, 12, 31), "month")
+
+
+def test_open_ranges_are_left_to_the_query():
+    check_bucket_count(None, date(2024, 1, 1), "day")
+    check_bucket_count(date(1900, 1, 1), None, "day")
+
+
+def test_cursor_round_trip():
+    at = datetime(2024, 3, 14, 14, 5)
+    cursor = encode_cursor(at, 12345)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (at, 12345)
+    assert decode_cursor(None) == (None, None)
+    assert decode_cursor("") == (None, None)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(datetime(2024, 1, 1), 1)[:-3], "e30"])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_params_clamp_limit_and_fetch_one_extra():
+    cursor = encode_cursor(datetime(2024, 3, 14, 14, 5), 7)
+    params = build_page_params(1, 10_000, cursor, date(2024, 3, 1), None, "Tops")
+
+    assert params["limit"] == PAGE_SIZE_MAX + 1
+    assert (params["after_at"], params["after_id"]) == (datetime(2024, 3, 14, 14, 5), 7)
+    assert params["start_at"] == datetime(2024, 3, 1)
+    assert build_page_params(1, 0, None, None, None, None)["limit"] == 2
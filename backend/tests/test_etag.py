@@ -0,0 +1,106 @@
+"""
+ETag / If-None-Match handling of the seller endpoints, with the seller lookup faked out.
+
+usage (from backend/):
+    python -m pytest tests/test_etag.py
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.api import sellers
+from app.api.sellers import etag_matches, make_etag
+
+
+def make_request(path: str, query: str = "", if_none_match: str = None) -> Request:
+    headers = list()
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode("latin-1")))
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": headers})
+
+
+@pytest.fixture
+def seller(monkeypatch):
+    """
+    this returns a dict whose "version" is the data_version the fake seller lookup reports.
+    """
+    state = {"version": 4}
+
+    async def get_seller(username: str):
+        if username != "alice":
+            return None
+        return (1, state["version"])
+
+    monkeypatch.setattr(sellers, "get_seller_by_username_async", get_seller)
+    return state
+
+
+def test_etag_ignores_query_order_but_not_values():
+    a = make_etag(1, 4, make_request("/sellers/alice/top-items", "limit=5&from=2024-01-01"))
+    b = make_etag(1, 4, make_request("/sellers/alice/top-items", "from=2024-01-01&limit=5"))
+    c = make_etag(1, 4, make_request("/sellers/alice/top-items", "from=2024-01-01&limit=6"))
+
+    assert a == b
+    assert a != c
+    assert a.startswith('"') and a.endswith('"')
+
+
+def test_etag_changes_with_version_seller_and_path():
+    request = make_request("/sellers/alice/summary")
+    etag = make_etag(1, 4, request)
+
+    assert make_etag(1, 5, request) != etag
+    assert make_etag(2, 4, request) != etag
+    assert make_etag(1, 4, make_request("/sellers/alice/dashboard")) != etag
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ("", False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"other", W/"abc"', True),
+        ("*", True),
+        ('"other"', False),
+        ("abc", False),
+    ],
+)
+def test_if_none_match(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_resolve_seller_sets_etag_then_answers_304(seller):
+    response = Response()
+    _, version, not_modified = asyncio.run(
+        sellers.resolve_seller("alice", make_request("/sellers/alice/summary"), response)
+    )
+    etag = response.headers["etag"]
+    assert version == 4
+    assert not_modified is None
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    request = make_request("/sellers/alice/summary", if_none_match=etag)
+    _, _, not_modified = asyncio.run(sellers.resolve_seller("alice", request, Response()))
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+
+def test_new_upload_invalidates_client_etag(seller):
+    response = Response()
+    asyncio.run(sellers.resolve_seller("alice", make_request("/sellers/alice/summary"), response))
+    etag = response.headers["etag"]
+
+    seller["version"] += 1
+    request = make_request("/sellers/alice/summary", if_none_match=etag)
+    _, _, not_modified = asyncio.run(sellers.resolve_seller("alice", request, Response()))
+    assert not_modified is None
+
+
+def test_unknown_seller_is_404(seller):
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(sellers.resolve_seller("bob", make_request("/sellers/bob/summary"), Response()))
+    assert e.value.status_code == 404
@@ -0,0 +1,41 @@
+"""
+METRICS_TOKEN gating of /metrics and /health/*, on the health router alone (no database).
+
+usage (from backend/):
+    python -m pytest tests/test_health.py
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import health
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(health.router)
+    return TestClient(app)
+
+
+def test_liveness_probe_is_open(client, monkeypatch):
+    monkeypatch.setattr(health, "METRICS_TOKEN", None)
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/health/queries", "/health/parse-cache", "/health/auth-cache"])
+def test_internals_are_hidden_without_a_token(client, monkeypatch, path):
+    monkeypatch.setattr(health, "METRICS_TOKEN", None)
+    assert client.get(path, headers={"Authorization": "Bearer anything"}).status_code == 404
+
+
+def test_internals_need_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(health, "METRICS_TOKEN", "s3cret")
+
+    assert client.get("/health/parse-cache").status_code == 401
+    assert client.get("/health/parse-cache", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/health/parse-cache", headers={"Authorization": "s3cret"}).status_code == 401
+
+    response = client.get("/health/parse-cache", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.json() == health.get_parse_cache_stats()
@@ -0,0 +1,87 @@
+"""
+ingest parsing without a database: streamed lines, row vs columnar mode, and the keys they produce.
+
+usage (from backend/):
+    python -m pytest tests/test_ingest_parse.py
+"""
+import csv
+
+import pytest
+
+from app.services.ingest_service import iter_parsed_rows, iter_text_lines, open_sales_csv, parse_sales_row
+
+HEADER = (
+    "Date of sale,Time of sale,Date of listing,Item price,Category,Brand,Size,Description,"
+    "Depop fee,Depop Payments fee,Boosting fee,USPS Cost,Refunded to buyer amount,Fees refunded to seller"
+)
+
+EXPORT = (
+    HEADER + "\r\n"
+    + '03/14/2024,2:05 PM,01/02/2024,$25.00,Tops,Nike,M,"Great top\r\nworn once",$2.50,$1.05,,$4.50,,\r\n'
+    + '03/14/2024,2:05 PM,01/02/2024,$25.00,Tops,Nike,M,"Great top\r\nworn once",$2.50,$1.05,,$4.50,,\r\n'
+    + '03/15/2024,11:40 AM,02/10/2024,"$1,200.00",Jackets,,L,"line one\nline two\rline three",$120.00,,$3.00,,,\r\n'
+    + "\r\n"
+    + "03/16/2024,9:00 AM,02/11/2024,$8.00,,Zara,,plain,$0.80,,,,,\r\n"
+    + "03/16/2024,9:00 AM\r\n"
+).encode("utf-8")
+
+
+def chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def baseline_rows(data: bytes) -> list:
+    """
+    the rows the original whole-file ingest produced: splitlines() + DictReader + parse_sales_row.
+    """
+    reader = csv.DictReader(data.decode("utf-8-sig").splitlines())
+    return [parse_sales_row(row) for row in reader]
+
+
+def streamed_rows(data: bytes, chunk_size: int, parse_mode: str) -> list:
+    reader, header = open_sales_csv(chunked(data, chunk_size))
+    return list(iter_parsed_rows(reader, header, parse_mode, batch_size=2))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64 * 1024])
+def test_text_lines_match_splitlines(chunk_size):
+    text = "a,b\r\n1,\"x\r\ny\"\r\n\r\n2,\"p\rq\"\n3\x0c4 end"
+    assert list(iter_text_lines(chunked(text.encode("utf-8"), chunk_size))) == text.splitlines()
+
+
+@pytest.mark.parametrize("parse_mode", ["row", "columnar"])
+@pytest.mark.parametrize("chunk_size", [1, 5, 64 * 1024])
+def test_streamed_rows_match_baseline(parse_mode, chunk_size):
+    expected = [row for row in baseline_rows(EXPORT) if row is not None]
+    got = [row for row in streamed_rows(EXPORT, chunk_size, parse_mode) if row is not None]
+
+    # staging tuples, order_key appended last
+    assert [row[:-1] for row in got] == expected
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3, 100])
+def test_row_and_columnar_modes_agree(batch_size):
+    # skipped rows (None) included, so both modes also agree on what counts as unusable
+    reader, header = open_sales_csv(chunked(EXPORT, 7))
+    row_mode = list(iter_parsed_rows(reader, header, "row", batch_size))
+    reader, header = open_sales_csv(chunked(EXPORT, 7))
+    columnar_mode = list(iter_parsed_rows(reader, header, "columnar", batch_size))
+
+    assert columnar_mode == row_mode
+    assert None in row_mode
+
+
+def test_multi_line_description_is_joined_like_baseline():
+    rows = [row for row in streamed_rows(EXPORT, 3, "row") if row is not None]
+
+    assert rows[0][1] == "Nike - Tops (Size M) - Great topworn once"
+    assert rows[2][1] == "Jackets (Size L) - line oneline twoline three"
+    assert "\r" not in "".join(row[1] for row in rows)
+
+
+def test_repeated_sale_gets_next_occurrence():
+    rows = [row for row in streamed_rows(EXPORT, 64 * 1024, "columnar") if row is not None]
+
+    # same listing, same minute: one source_key, two order keys
+    assert rows[0][0] == rows[1][0]
+    assert rows[0][-1] != rows[1][-1]
@@ -0,0 +1,69 @@
+"""
+migration discovery and checksum checks, on a temporary migrations folder (no database).
+
+usage (from backend/):
+    python -m pytest tests/test_migrations.py
+"""
+import hashlib
+
+import pytest
+
+from app.db import migrations
+from app.db.migrations import check_applied_checksums, find_migrations_dir, load_migrations
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    (tmp_path / "0002_add_col.sql").write_text("ALTER TABLE t ADD COLUMN c INTEGER;\n")
+    (tmp_path / "0001_baseline.sql").write_text("CREATE TABLE t (id INTEGER);\n")
+    (tmp_path / "README.md").write_text("not a migration\n")
+    (tmp_path / "0003-bad-name.sql").write_text("SELECT 1;\n")
+    return tmp_path
+
+
+def test_load_orders_by_version_and_skips_other_files(migrations_dir):
+    loaded = load_migrations(migrations_dir)
+
+    assert [(m["version"], m["name"]) for m in loaded] == [(1, "baseline"), (2, "add_col")]
+    assert loaded[0]["checksum"] == hashlib.sha256(b"CREATE TABLE t (id INTEGER);\n").hexdigest()
+
+
+def test_duplicate_version_is_rejected(migrations_dir):
+    (migrations_dir / "0002_other.sql").write_text("SELECT 1;\n")
+    with pytest.raises(ValueError) as e:
+        load_migrations(migrations_dir)
+    assert "Duplicate migration version 2" in str(e.value)
+
+
+def test_unchanged_and_pending_files_pass(migrations_dir):
+    loaded = load_migrations(migrations_dir)
+    check_applied_checksums(loaded, {1: loaded[0]["checksum"]})
+    check_applied_checksums(loaded, dict())
+
+
+def test_edited_applied_file_is_detected(migrations_dir):
+    applied = {m["version"]: m["checksum"] for m in load_migrations(migrations_dir)}
+    (migrations_dir / "0001_baseline.sql").write_text("CREATE TABLE t (id BIGINT);\n")
+
+    with pytest.raises(ValueError) as e:
+        check_applied_checksums(load_migrations(migrations_dir), applied)
+    assert "0001_baseline.sql was edited" in str(e.value)
+
+
+def test_status_reports_changed_and_pending(migrations_dir, monkeypatch):
+    loaded = load_migrations(migrations_dir)
+    monkeypatch.setattr(migrations, "get_applied_migrations", lambda conn: {1: "0" * 64})
+
+    status = migrations.get_migration_status(None, loaded)
+    assert status == [
+        {"file": "0001_baseline.sql", "state": "changed"},
+        {"file": "0002_add_col.sql", "state": "pending"},
+    ]
+
+
+def test_packaged_migrations_are_found_and_load(monkeypatch):
+    monkeypatch.setattr(migrations, "MIGRATIONS_DIR", None)
+    path = find_migrations_dir()
+
+    assert path is not None and path.name == "migrations" and path.parent.name == "app"
+    assert [m["version"] for m in load_migrations(path)][:2] == [1, 2]
@@ -1,12 +1,27 @@
+type CachedResponse = {
+    etag: string;
+    body: unknown;
+};
+
+//last payload + ETag per GET path, so polls can revalidate with If-None-Match
+const etagCache = new Map<string, CachedResponse>();
+
 export async function apiFetch(path: string, options: RequestInit = {}) {
     const token = localStorage.getItem("access_token");
+    const method = (options.method ?? "GET").toUpperCase();
+    const cached = method === "GET" ? etagCache.get(path) : undefined;
 
     const headers: Record<string, string> = {};
     if (token) {
         headers["Authorization"] = `Bearer ${token}`;
     }
+    if (cached) {
+        headers["If-None-Match"] = cached.etag;
+    }
 
     const response = await fetch(`${import.meta.env.VITE_API_BASE}${path}`, {
+        //we handle revalidation ourselves, keep the browser cache from answering 304s for us
+        cache: method === "GET" ? "no-store" : options.cache,
         ...options,
         headers: {
             ...headers,
@@ -17,10 +32,15 @@ export async function apiFetch(path: string, options: RequestInit = {}) {
     if (response.status === 401) {
         localStorage.removeItem("access_token");
         localStorage.removeItem("id_token");
+        etagCache.clear();
         window.location.href = "/login";
         throw new Error("Session expired");
     }
 
+    if (response.status === 304 && cached) {
+        return cached.body;
+    }
+
     if (!response.ok) {
         const text = await response.text();
         throw new Error(`API ${response.status}: ${text}`);
@@ -28,8 +48,11 @@ export async function apiFetch(path: string, options: RequestInit = {}) {
 
     //some endpoints may return empty body so handle safely
     const contentType = response.headers.get("content-type") || "";
-    if (contentType.includes("application/json")) {
-        return response.json();
+    const body = contentType.includes("application/json") ? await response.json() : await response.text();
+
+    const etag = response.headers.get("etag");
+    if (method === "GET" && etag) {
+        etagCache.set(path, { etag, body });
     }
-    return response.text();
+    return body;
 }
@@ -1,6 +1,22 @@
 import { useRef, useState } from "react";
 import { apiFetch } from "../api/client";
 
+type IngestJob = {
+    job_id: number;
+    status: "queued" | "running" | "succeeded" | "failed";
+    rows_processed: number;
+    rows_per_second: number;
+    orders_inserted: number | null;
+    orders_duplicate: number | null;
+    error: string | null;
+};
+
+const POLL_INTERVAL_MS = 1000;
+
+function sleep(ms: number) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
 export function UploadCsv({
     sellerUsername,
     onUploaded,
@@ -26,12 +42,34 @@ export function UploadCsv({
             formData.append("seller_username", sellerUsername);
             formData.append("file", file);
 
-            await apiFetch("/sellers/upload-sales", {
+            const accepted = (await apiFetch("/sellers/upload-sales", {
                 method: "POST",
                 body: formData,
-            });
+            })) as { job_id: number };
+
+            //ingest runs in the background, poll until the job finishes
+            const jobPath = `/ingest-jobs/${accepted.job_id}`;
+            let job = (await apiFetch(jobPath)) as IngestJob;
+            while (job.status === "queued" || job.status === "running") {
+                setMessage(
+                    job.status === "queued"
+                        ? "Queued..."
+                        : `Processing... ${job.rows_processed} rows (${Math.round(job.rows_per_second)}/s)`
+                );
+                await sleep(POLL_INTERVAL_MS);
+                job = (await apiFetch(jobPath)) as IngestJob;
+            }
+
+            if (job.status === "failed") {
+                throw new Error(job.error ?? "Upload failed");
+            }
 
-            setMessage("Upload complete");
+            const duplicates = job.orders_duplicate ?? 0;
+            setMessage(
+                duplicates > 0
+                    ? `Upload complete (${job.orders_inserted ?? 0} new orders, ${duplicates} already uploaded)`
+                    : `Upload complete (${job.orders_inserted ?? 0} orders)`
+            );
             setIsError(false);
             onUploaded();
         } catch (err: any) {
@@ -20,6 +20,21 @@ type CategoryBreakdown = {
     units_sold: number;
 };
 
+type TopItem = {
+    listing_id: number;
+    title: string;
+    category: string;
+    units_sold: number;
+    revenue_cents: number;
+};
+
+type SellerDashboard = {
+    summary: Summary;
+    sales_over_time: MonthlySales[];
+    category_breakdown: CategoryBreakdown[];
+    top_items: TopItem[];
+};
+
 export default function Dashboard() {
     const [sellerUsername, setSellerUsername] = useState<string>("demo");
     const [kpis, setKpis] = useState<Summary | null>(null);
@@ -34,14 +49,10 @@ export default function Dashboard() {
         setKpis(null);
 
         try {
-            const [summary, timeSeries, categories] = await Promise.all([
-                apiFetch(`/sellers/${username}/summary`),
-                apiFetch(`/sellers/${username}/sales-over-time`),
-                apiFetch(`/sellers/${username}/category-breakdown`),
-            ]);
-            setKpis(summary as Summary);
-            setSalesOverTime(timeSeries as MonthlySales[]);
-            setCategoryData(categories as CategoryBreakdown[]);
+            const dashboard = (await apiFetch(`/sellers/${username}/dashboard`)) as SellerDashboard;
+            setKpis(dashboard.summary);
+            setSalesOverTime(dashboard.sales_over_time);
+            setCategoryData(dashboard.category_breakdown);
         } catch (err: any) {
             setError(err.message ?? "Failed to load data");
         } finally {